@@ -0,0 +1,80 @@
+"""
+Run the benchmark suite, or compare two saved runs.
+From the Python directory:
+    python -m src.benchmarks list
+    python -m src.benchmarks run --output before.json [--only micro. render.160x120] [--repeat N]
+    python -m src.benchmarks compare before.json after.json [--threshold 0.1]
+compare exits with status 1 if any benchmark got slower by more than the threshold.
+"""
+import argparse
+import sys
+
+from src.benchmarks.suite import benchmarks, compare, load, run, save
+
+
+def _format_time(seconds: float) -> str:
+    for (unit, scale) in (("s", 1), ("ms", 1e3), ("us", 1e6)):
+        if seconds * scale >= 1:
+            return f"{seconds * scale:8.3f} {unit}"
+    return f"{seconds * 1e9:8.1f} ns"
+
+
+def _selected(prefixes):
+    names = list(benchmarks())
+    if not prefixes:
+        return names
+    return [name for name in names if any(name.startswith(prefix) for prefix in prefixes)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.benchmarks", description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="list the benchmarks")
+    list_parser.add_argument("--only", nargs="*", metavar="PREFIX", help="only benchmarks starting with a prefix")
+
+    run_parser = commands.add_parser("run", help="run benchmarks and optionally save the results as JSON")
+    run_parser.add_argument("--only", nargs="*", metavar="PREFIX", help="only benchmarks starting with a prefix")
+    run_parser.add_argument("--repeat", type=int, help="override the number of repeats of every benchmark")
+    run_parser.add_argument("--output", help="JSON file to save the results and environment to")
+
+    compare_parser = commands.add_parser("compare", help="compare two saved runs")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="relative slowdown counted as a regression (default: 0.1, i.e. 10%%)")
+
+    args = parser.parse_args(argv)
+    if args.command == "list":
+        for name in _selected(args.only):
+            print(name)
+        return 0
+
+    if args.command == "run":
+        names = _selected(args.only)
+        if not names:
+            parser.error("no benchmarks match --only")
+        result = run(names, args.repeat,
+                     report=lambda name, r: print(f"{name:40} {_format_time(r['best'])}", flush=True))
+        if args.output:
+            save(result, args.output)
+        return 0
+
+    (baseline, current) = (load(args.baseline), load(args.current))
+    for key in ("python", "numpy", "platform", "machine", "cpu_count"):
+        (before, after) = (baseline["environment"].get(key), current["environment"].get(key))
+        if before != after:
+            print(f"warning: the runs differ in {key} ({before} vs {after}), so timings may not be comparable")
+    rows = compare(baseline, current, args.threshold)
+    print(f"{'benchmark':40} {'baseline':>11} {'current':>11} {'change':>8}")
+    for (name, before, after, change, regressed) in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:40} {_format_time(before)} {_format_time(after)} {change:+8.1%}{flag}")
+    regressions = sum(1 for row in rows if row[4])
+    if regressions:
+        print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+The benchmarks in the suite. Each setup function builds its inputs and returns the function to time.
+Names are prefixed with their group, so that a whole group can be selected with a prefix.
+"""
+from src.benchmarks.suite import benchmark
+from src.ray_tracer_challenge.canvas import Canvas
+from src.ray_tracer_challenge.color import Color, Colors
+from src.ray_tracer_challenge.material import Material
+from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.sphere import Sphere
+from src.ray_tracer_challenge.tuple import Light, Point, Vector
+from src.utils import Resolution, create_camera, create_world, resolution_480p, resolution_720p
+
+
+@benchmark("micro.matrix_inverse", number=2000)
+def matrix_inverse():
+    m = Matrix.translation(1, 2, 3) * Matrix.rotation_y(0.5) * Matrix.scaling(1, 2, 3)
+    return m.inverse
+
+
+@benchmark("micro.matrix_times_tuple", number=20000)
+def matrix_times_tuple():
+    (m, p) = (Matrix.translation(1, 2, 3) * Matrix.rotation_y(0.5), Point(1, 2, 3))
+    return lambda: m * p
+
+
+@benchmark("micro.sphere_intersect", number=20000)
+def sphere_intersect():
+    (sphere, ray) = (Sphere(), Ray(Point(0.1, 0.2, -5), Vector(0, 0, 1)))
+    return lambda: sphere.intersect(ray)
+
+
+@benchmark("micro.sphere_intersect_transformed", number=20000)
+def sphere_intersect_transformed():
+    # Not a translation and uniform scale, so this takes the general object space path.
+    sphere = Sphere()
+    sphere.transform = Matrix.rotation_z(0.3) * Matrix.scaling(2, 1, 1)
+    ray = Ray(Point(0.1, 0.2, -5), Vector(0, 0, 1))
+    return lambda: sphere.intersect(ray)
+
+
+@benchmark("micro.material_lighting", number=20000)
+def material_lighting():
+    (material, light) = (Material(), Light(Point(-10, 10, -10), Colors.WHITE))
+    (position, eye, normal) = (Point(0, 0, 0), Vector(0, 0, -1), Vector(0, 0, -1))
+    return lambda: material.lighting(light, position, eye, normal)
+
+
+@benchmark("micro.camera_ray_for_pixel", number=20000)
+def camera_ray_for_pixel():
+    camera = create_camera(resolution_720p)
+    return lambda: camera.ray_for_pixel(640, 360)
+
+
+@benchmark("micro.canvas_to_ppm", number=1)
+def canvas_to_ppm():
+    canvas = Canvas(640, 480)
+    for y in range(0, 480, 8):
+        for x in range(0, 640, 8):
+            canvas.set_pixel(x, y, Color(x / 640, y / 480, 0.5))
+    return canvas.to_ppm
+
+
+def _render(resolution):
+    (world, camera) = (create_world(), create_camera(resolution))
+    return lambda: camera.render(world)
+
+
+@benchmark("render.160x120", number=1, repeat=3)
+def render_160x120():
+    return _render(Resolution(160, 120))
+
+
+@benchmark("render.480p", number=1, repeat=1)
+def render_480p():
+    return _render(resolution_480p)
+
+
+@benchmark("render.720p", number=1, repeat=1)
+def render_720p():
+    return _render(resolution_720p)
+
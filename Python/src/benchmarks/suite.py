@@ -0,0 +1,133 @@
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+_BENCHMARKS = {}
+
+
+class Benchmark:
+    """
+    A named piece of code to time. The setup function builds whatever the benchmark needs,
+    outside of the timed region, and returns the function to time.
+    """
+
+    def __init__(self, name: str, setup: Callable[[], Callable[[], object]], number: int, repeat: int):
+        self.name = name
+        self.setup = setup
+        self.number = number
+        self.repeat = repeat
+
+    def __repr__(self):
+        return f"Benchmark(name:{self.name}, number:{self.number}, repeat:{self.repeat})"
+
+    def run(self, repeat: Optional[int] = None) -> dict:
+        """
+        Time the benchmark.
+        :param repeat: overrides the benchmark's own number of repeats
+        :return: the best, mean and worst time per call in seconds, with the number of calls per repeat and repeats
+        """
+        function = self.setup()
+        times = [t / self.number for t in timeit.repeat(function, number=self.number, repeat=repeat or self.repeat)]
+        return {"best": min(times), "mean": sum(times) / len(times), "worst": max(times),
+                "number": self.number, "repeat": len(times)}
+
+
+def benchmark(name: str, number: int = 1, repeat: int = 5):
+    """
+    Decorator registering a setup function as a benchmark.
+    :param number: calls per repeat; use many for fast code, so that timer resolution does not matter
+    :param repeat: the best of this many repeats is the reported time
+    """
+    def register(setup):
+        if name in _BENCHMARKS:
+            raise ValueError(f"Benchmark {name!r} is already registered")
+        _BENCHMARKS[name] = Benchmark(name, setup, number, repeat)
+        return setup
+
+    return register
+
+
+def benchmarks() -> Dict[str, Benchmark]:
+    # Importing the cases registers them.
+    from src.benchmarks import cases  # noqa: F401
+    return dict(_BENCHMARKS)
+
+
+def environment() -> dict:
+    """
+    Describe the machine and code a run was made with, since timings are only comparable between like runs.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=10,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def run(names=None, repeat: Optional[int] = None, report: Callable[[str, dict], None] = None) -> dict:
+    """
+    Run benchmarks and collect the results with the environment they were measured in.
+    :param names: the benchmarks to run, in order; all of them if None
+    :param repeat: overrides each benchmark's own number of repeats
+    :param report: called with the name and result of each benchmark as it finishes
+    """
+    available = benchmarks()
+    names = list(available) if names is None else list(names)
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}")
+    results = {}
+    for name in names:
+        results[name] = available[name].run(repeat)
+        if report is not None:
+            report(name, results[name])
+    return {"environment": environment(), "results": results}
+
+
+def save(run_result: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(run_result, f, indent=2)
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        run_result = json.load(f)
+    if "results" not in run_result:
+        raise ValueError(f"{path} is not a benchmark run")
+    return run_result
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list:
+    """
+    Compare the best times of two runs, for the benchmarks both of them measured.
+    :param threshold: relative slowdown above which a benchmark counts as a regression, e.g. 0.1 for 10%
+    :return: a list of (name, baseline seconds, current seconds, relative change, regressed)
+    """
+    if threshold < 0:
+        raise ValueError("threshold must not be negative")
+    rows = []
+    for (name, result) in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        (before, after) = (baseline["results"][name]["best"], result["best"])
+        change = after / before - 1 if before > 0 else 0.0
+        rows.append((name, before, after, change, change > threshold))
+    return rows
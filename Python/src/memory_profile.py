@@ -0,0 +1,137 @@
+"""
+Memory profile of a render of the scene in utils.render_with_camera, using tracemalloc.
+
+The render is split into phases that run one after the other over the whole frame: building the scene,
+generating every primary ray, intersecting them, shading the hits into a Canvas, and Canvas.to_ppm.
+Each phase keeps its results (the rays, the hits, the computations and colors, the PPM text) alive,
+so the memory a phase retains, divided by the number of pixels, is what it costs per pixel.
+tracemalloc only sees blocks that are still allocated, so temporaries freed within a phase count towards
+its peak, but not towards its retained blocks or top allocation sites.
+"""
+import gc
+import os
+import tracemalloc
+
+from src.ray_tracer_challenge.canvas import Canvas
+from src.ray_tracer_challenge.plane import Plane
+from src.utils import create_camera, create_world
+
+PHASES = ('scene build', 'ray generation', 'intersection', 'shading', 'Canvas.to_ppm')
+
+
+class PhaseMemory:
+    """
+    Memory used by one phase of a render.
+    """
+
+    def __init__(self, name: str, peak: int, retained: int, blocks: int, top: list):
+        """
+        :param peak: the most bytes allocated at once during the phase, over what was allocated when it started
+        :param retained: bytes still allocated at the end of the phase, over what was allocated when it started
+        :param blocks: number of memory blocks still allocated at the end of the phase, over the start
+        :param top: the allocation sites that retained the most memory, as (location, bytes, blocks)
+        """
+        self.name = name
+        self.peak = peak
+        self.retained = retained
+        self.blocks = blocks
+        self.top = top
+
+    def __repr__(self):
+        return f"PhaseMemory(name:{self.name}, peak:{self.peak}, retained:{self.retained}, blocks:{self.blocks})"
+
+
+def profile_render_memory(resolution, wall_shape=Plane, top=10) -> list:
+    """
+    Render the render_with_camera scene phase by phase, measuring the memory of each phase.
+    :param top: number of allocation sites to report per phase
+    :return: a PhaseMemory per phase, in the order of PHASES
+    """
+    results = []
+    state = {}
+
+    def scene_build():
+        state['world'] = create_world(wall_shape)
+        state['camera'] = create_camera(resolution)
+        # Build the acceleration structure now, rather than on the first intersection.
+        state['world'].closest_hit(state['camera'].ray_for_pixel(0, 0))
+
+    def ray_generation():
+        camera = state['camera']
+        state['rays'] = [camera.ray_for_pixel(x, y) for y in range(camera.vsize) for x in range(camera.hsize)]
+
+    def intersection():
+        world = state['world']
+        state['hits'] = [world.closest_hit(ray) for ray in state['rays']]
+
+    def shading():
+        # The computations and colors are kept until the end of the phase, to measure what they cost per pixel.
+        (world, camera) = (state['world'], state['camera'])
+        state['computations'] = [None if hit is None else hit.prepare_computations(ray)
+                                 for (ray, hit) in zip(state['rays'], state['hits'])]
+        state['colors'] = [None if comps is None else world.shade_hit(comps) for comps in state['computations']]
+        canvas = Canvas(camera.hsize, camera.vsize)
+        for (i, color) in enumerate(state['colors']):
+            if color is not None:
+                canvas.set_pixel(i % camera.hsize, i // camera.hsize, color)
+        state['canvas'] = canvas
+
+    def to_ppm():
+        state['ppm'] = state['canvas'].to_ppm()
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        for (name, phase) in zip(PHASES, (scene_build, ray_generation, intersection, shading, to_ppm)):
+            results.append(_measure(name, phase, top))
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return results
+
+
+def _measure(name, phase, top) -> PhaseMemory:
+    # Snapshots ignore the memory used by tracemalloc itself.
+    filters = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    gc.collect()
+    before = tracemalloc.take_snapshot().filter_traces(filters)
+    tracemalloc.reset_peak()
+    (start, _) = tracemalloc.get_traced_memory()
+    phase()
+    (_, peak) = tracemalloc.get_traced_memory()
+    gc.collect()
+    after = tracemalloc.take_snapshot().filter_traces(filters)
+    differences = after.compare_to(before, 'lineno')
+    sites = sorted((d for d in differences if d.size_diff > 0), key=lambda d: d.size_diff, reverse=True)[:top]
+    return PhaseMemory(name, peak - start,
+                       sum(d.size_diff for d in differences),
+                       sum(d.count_diff for d in differences),
+                       [(_location(d.traceback[0]), d.size_diff, d.count_diff) for d in sites])
+
+
+def _location(frame) -> str:
+    # Paths in this repository are shown relative to the Python directory.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    filename = frame.filename
+    if filename.startswith(root + os.sep):
+        filename = os.path.relpath(filename, root)
+    return f"{filename}:{frame.lineno}"
+
+
+def format_report(phases, pixels: int) -> str:
+    """
+    :param phases: PhaseMemory per phase, as returned by profile_render_memory
+    :param pixels: the number of pixels rendered, to report the cost per pixel
+    """
+    lines = [f"{'phase':16} {'peak MB':>9} {'retained MB':>12} {'bytes/pixel':>12} {'blocks/pixel':>13}"]
+    for phase in phases:
+        lines.append(f"{phase.name:16} {phase.peak / 1e6:9.2f} {phase.retained / 1e6:12.2f} "
+                     f"{phase.retained / pixels:12.1f} {phase.blocks / pixels:13.2f}")
+    lines.append(f"peak of any phase: {max(phase.peak for phase in phases) / 1e6:.2f} MB")
+    for phase in phases:
+        lines.append("")
+        lines.append(f"Top allocation sites, {phase.name}:")
+        for (location, size, count) in phase.top:
+            lines.append(f"  {size / 1e6:9.2f} MB {count:10} blocks  {location}")
+    return "\n".join(lines)
@@ -0,0 +1,130 @@
+import math
+
+from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.tuple import Point
+
+INFINITE = math.inf
+
+
+class BoundingBox:
+    """
+    Axis-aligned bounding box, stored as its minimum and maximum coordinates.
+    An empty box has its minimum at +infinity and its maximum at -infinity.
+    """
+
+    __slots__ = ('min_x', 'min_y', 'min_z', 'max_x', 'max_y', 'max_z')
+
+    def __init__(self, minimum: Point = None, maximum: Point = None):
+        if minimum is None:
+            (self.min_x, self.min_y, self.min_z) = (INFINITE, INFINITE, INFINITE)
+        else:
+            (self.min_x, self.min_y, self.min_z) = (minimum.x, minimum.y, minimum.z)
+        if maximum is None:
+            (self.max_x, self.max_y, self.max_z) = (-INFINITE, -INFINITE, -INFINITE)
+        else:
+            (self.max_x, self.max_y, self.max_z) = (maximum.x, maximum.y, maximum.z)
+
+    def __repr__(self):
+        return f"BoundingBox(minimum:{self.minimum}, maximum:{self.maximum})"
+
+    def __eq__(self, other):
+        return self.minimum == other.minimum and self.maximum == other.maximum
+
+    @classmethod
+    def infinite(cls):
+        return cls(Point(-INFINITE, -INFINITE, -INFINITE), Point(INFINITE, INFINITE, INFINITE))
+
+    @property
+    def minimum(self) -> Point:
+        return Point(self.min_x, self.min_y, self.min_z)
+
+    @property
+    def maximum(self) -> Point:
+        return Point(self.max_x, self.max_y, self.max_z)
+
+    def is_empty(self) -> bool:
+        return self.min_x > self.max_x or self.min_y > self.max_y or self.min_z > self.max_z
+
+    def is_bounded(self) -> bool:
+        """
+        True if the box is finite in every direction.
+        """
+        return all(math.isfinite(value) for value in
+                   (self.min_x, self.min_y, self.min_z, self.max_x, self.max_y, self.max_z))
+
+    def add_point(self, point: Point):
+        self.min_x = min(self.min_x, point.x)
+        self.min_y = min(self.min_y, point.y)
+        self.min_z = min(self.min_z, point.z)
+        self.max_x = max(self.max_x, point.x)
+        self.max_y = max(self.max_y, point.y)
+        self.max_z = max(self.max_z, point.z)
+
+    def merge(self, other: 'BoundingBox') -> 'BoundingBox':
+        """
+        Return the smallest box containing both boxes.
+        """
+        result = BoundingBox()
+        result.min_x = min(self.min_x, other.min_x)
+        result.min_y = min(self.min_y, other.min_y)
+        result.min_z = min(self.min_z, other.min_z)
+        result.max_x = max(self.max_x, other.max_x)
+        result.max_y = max(self.max_y, other.max_y)
+        result.max_z = max(self.max_z, other.max_z)
+        return result
+
+    def centroid(self) -> Point:
+        return Point((self.min_x + self.max_x) / 2, (self.min_y + self.max_y) / 2, (self.min_z + self.max_z) / 2)
+
+    def surface_area(self) -> float:
+        if self.is_empty():
+            return 0
+        (dx, dy, dz) = (self.max_x - self.min_x, self.max_y - self.min_y, self.max_z - self.min_z)
+        return 2 * (dx * dy + dy * dz + dz * dx)
+
+    def transform(self, transformation: Matrix) -> 'BoundingBox':
+        """
+        Return the axis-aligned box containing all eight corners of this box after transformation.
+        Unbounded boxes stay infinite.
+        """
+        if not self.is_bounded():
+            return BoundingBox.infinite()
+        result = BoundingBox()
+        for x in (self.min_x, self.max_x):
+            for y in (self.min_y, self.max_y):
+                for z in (self.min_z, self.max_z):
+                    result.add_point(transformation * Point(x, y, z))
+        return result
+
+    def intersect(self, ray: Ray):
+        """
+        Intersect the line through the ray with the box, using the slab method.
+        :return: (t_enter, t_exit), or None if the line misses the box.
+        """
+        origin = ray.origin
+        direction = ray.direction
+        return _slab_test(origin.x, origin.y, origin.z, direction.x, direction.y, direction.z,
+                          self.min_x, self.min_y, self.min_z, self.max_x, self.max_y, self.max_z)
+
+
+def _slab_test(ox, oy, oz, dx, dy, dz, min_x, min_y, min_z, max_x, max_y, max_z):
+    t_enter = -INFINITE
+    t_exit = INFINITE
+    for (o, d, low, high) in ((ox, dx, min_x, max_x), (oy, dy, min_y, max_y), (oz, dz, min_z, max_z)):
+        if d == 0:
+            # Parallel to this slab: either always inside it or never.
+            if o < low or o > high:
+                return None
+            continue
+        t0 = (low - o) / d
+        t1 = (high - o) / d
+        if t0 > t1:
+            (t0, t1) = (t1, t0)
+        if t0 > t_enter:
+            t_enter = t0
+        if t1 < t_exit:
+            t_exit = t1
+        if t_enter > t_exit:
+            return None
+    return t_enter, t_exit
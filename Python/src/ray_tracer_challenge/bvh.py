@@ -0,0 +1,267 @@
+import numpy as np
+
+from src.ray_tracer_challenge.bounds import BoundingBox, _slab_test
+from src.ray_tracer_challenge.ray import Ray
+
+
+class _Node:
+    __slots__ = ('min_x', 'min_y', 'min_z', 'max_x', 'max_y', 'max_z', 'axis', 'left', 'right', 'items')
+
+    def __init__(self, minimum, maximum):
+        (self.min_x, self.min_y, self.min_z) = minimum.tolist()
+        (self.max_x, self.max_y, self.max_z) = maximum.tolist()
+        self.axis = 0
+        self.left = None
+        self.right = None
+        self.items = None
+
+
+class BVH:
+    """
+    Bounding volume hierarchy over a list of items with axis-aligned bounding boxes.
+    Built top-down with the surface area heuristic (SAH), evaluated over a fixed
+    number of centroid bins per axis.
+    """
+
+    BINS = 12
+    MAX_LEAF_SIZE = 4
+    # Cost of visiting a node, relative to the cost of testing one item.
+    TRAVERSAL_COST = 0.125
+
+    def __init__(self, items, minimums, maximums, leaf_size=1):
+        """
+        :param items: the items to store in the leaves
+        :param minimums: (N, 3) array of the minimum corner of each item's bounding box
+        :param maximums: (N, 3) array of the maximum corner of each item's bounding box
+        :param leaf_size: nodes with at most this many items become leaves without evaluating any split.
+                          Raising it (up to MAX_LEAF_SIZE) builds much faster, and suits items that are cheap to test.
+        """
+        if not 1 <= leaf_size <= self.MAX_LEAF_SIZE:
+            raise ValueError(f"leaf_size must be between 1 and {self.MAX_LEAF_SIZE}")
+        self._leaf_size = leaf_size
+        self._items = list(items)
+        self._root = None
+        if self._items:
+            self._root = self._build(np.asarray(minimums, dtype=np.float64), np.asarray(maximums, dtype=np.float64))
+
+    @classmethod
+    def from_boxes(cls, items, boxes):
+        items = list(items)
+        minimums = [(box.min_x, box.min_y, box.min_z) for box in boxes]
+        maximums = [(box.max_x, box.max_y, box.max_z) for box in boxes]
+        return cls(items, np.reshape(minimums, (-1, 3)), np.reshape(maximums, (-1, 3)))
+
+    @property
+    def bounds(self) -> BoundingBox:
+        result = BoundingBox()
+        if self._root is not None:
+            node = self._root
+            (result.min_x, result.min_y, result.min_z) = (node.min_x, node.min_y, node.min_z)
+            (result.max_x, result.max_y, result.max_z) = (node.max_x, node.max_y, node.max_z)
+        return result
+
+    def depth(self) -> int:
+        def _depth(node):
+            if node.items is not None:
+                return 1
+            return 1 + max(_depth(node.left), _depth(node.right))
+
+        return 0 if self._root is None else _depth(self._root)
+
+    def intersect(self, ray: Ray) -> list:
+        """
+        Find the items in every leaf whose box the line through the ray crosses.
+        Leaves are visited front to back along the ray direction.
+        """
+        result = []
+        if self._root is None:
+            return result
+        (ox, oy, oz) = (ray.origin.x, ray.origin.y, ray.origin.z)
+        (dx, dy, dz) = (ray.direction.x, ray.direction.y, ray.direction.z)
+        negative = (dx < 0, dy < 0, dz < 0)
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if _slab_test(ox, oy, oz, dx, dy, dz,
+                          node.min_x, node.min_y, node.min_z, node.max_x, node.max_y, node.max_z) is None:
+                continue
+            if node.items is not None:
+                result.extend(node.items)
+            elif negative[node.axis]:
+                stack.append(node.left)
+                stack.append(node.right)
+            else:
+                stack.append(node.right)
+                stack.append(node.left)
+        return result
+
+    def closest_hit(self, ray: Ray, t_min: float, t_max: float, hit_fn=None):
+        """
+        Find the nearest hit with t_min <= t < t_max. Leaves are visited front to back,
+        and t_max shrinks with every hit so that boxes behind it are skipped.
+        :param hit_fn: hit_fn(item, ray, t_min, t_max) returns the item's nearest hit in the
+                       range (anything with a t attribute), or None. Defaults to item.nearest_hit.
+        :return: the nearest hit, or None
+        """
+        if self._root is None:
+            return None
+        (ox, oy, oz) = (ray.origin.x, ray.origin.y, ray.origin.z)
+        (dx, dy, dz) = (ray.direction.x, ray.direction.y, ray.direction.z)
+        negative = (dx < 0, dy < 0, dz < 0)
+        best = None
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            span = _slab_test(ox, oy, oz, dx, dy, dz,
+                              node.min_x, node.min_y, node.min_z, node.max_x, node.max_y, node.max_z)
+            if span is None or span[0] >= t_max or span[1] < t_min:
+                continue
+            if node.items is not None:
+                for item in node.items:
+                    hit = item.nearest_hit(ray, t_min, t_max) if hit_fn is None else hit_fn(item, ray, t_min, t_max)
+                    if hit is not None:
+                        best = hit
+                        t_max = hit.t
+            elif negative[node.axis]:
+                stack.append(node.left)
+                stack.append(node.right)
+            else:
+                stack.append(node.right)
+                stack.append(node.left)
+        return best
+
+    def any_hit(self, ray: Ray, t_min: float, t_max: float, hit_fn=None):
+        """
+        Find any item hit with t_min <= t < t_max, stopping at the first one found.
+        :param hit_fn: as for closest_hit
+        :return: the item that was hit, or None
+        """
+        if self._root is None:
+            return None
+        (ox, oy, oz) = (ray.origin.x, ray.origin.y, ray.origin.z)
+        (dx, dy, dz) = (ray.direction.x, ray.direction.y, ray.direction.z)
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            span = _slab_test(ox, oy, oz, dx, dy, dz,
+                              node.min_x, node.min_y, node.min_z, node.max_x, node.max_y, node.max_z)
+            if span is None or span[0] >= t_max or span[1] < t_min:
+                continue
+            if node.items is not None:
+                for item in node.items:
+                    hit = item.nearest_hit(ray, t_min, t_max) if hit_fn is None else hit_fn(item, ray, t_min, t_max)
+                    if hit is not None:
+                        return item
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+        return None
+
+    def items_at(self, x: float, y: float, z: float, tolerance: float = 0) -> list:
+        """
+        Find the items in every leaf whose box, grown by tolerance on every side, contains the point.
+        """
+        result = []
+        if self._root is None:
+            return result
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if (x < node.min_x - tolerance or x > node.max_x + tolerance or
+                    y < node.min_y - tolerance or y > node.max_y + tolerance or
+                    z < node.min_z - tolerance or z > node.max_z + tolerance):
+                continue
+            if node.items is not None:
+                result.extend(node.items)
+            else:
+                stack.append(node.left)
+                stack.append(node.right)
+        return result
+
+    def _build(self, minimums, maximums):
+        centroids = (minimums + maximums) / 2
+        root = None
+        stack = [(None, None, np.arange(len(minimums)))]
+        while stack:
+            (parent, side, indices) = stack.pop()
+            (node_min, node_max) = (minimums[indices].min(axis=0), maximums[indices].max(axis=0))
+            node = _Node(node_min, node_max)
+            if parent is None:
+                root = node
+            else:
+                setattr(parent, side, node)
+
+            split = self._split(indices, minimums, maximums, centroids, node_min, node_max)
+            if split is None:
+                node.items = [self._items[i] for i in indices.tolist()]
+                continue
+            (node.axis, left, right) = split
+            stack.append((node, 'left', left))
+            stack.append((node, 'right', right))
+        return root
+
+    def _split(self, indices, minimums, maximums, centroids, node_min, node_max):
+        """
+        Choose the cheapest SAH split of the given items.
+        :return: (axis, left indices, right indices), or None to make a leaf
+        """
+        count = len(indices)
+        if count <= self._leaf_size:
+            return None
+
+        parent_area = _surface_areas(node_min, node_max)
+
+        item_centroids = centroids[indices]
+        centroid_min = item_centroids.min(axis=0)
+        centroid_extent = item_centroids.max(axis=0) - centroid_min
+        splittable = centroid_extent > 0
+        if not splittable.any():
+            # Every centroid is in the same place, so no split separates them.
+            if count <= self.MAX_LEAF_SIZE:
+                return None
+            half = count // 2
+            return 0, indices[:half], indices[half:]
+
+        # Bin the centroids along all three axes at once: bin b of axis a is key a * BINS + b.
+        # Evaluating the axes together keeps the number of NumPy calls per node low,
+        # which is what limits the build speed for the many small nodes near the leaves.
+        scale = np.where(splittable, self.BINS / np.where(splittable, centroid_extent, 1), 0)
+        bins = ((item_centroids - centroid_min) * scale).astype(np.intp)
+        np.minimum(bins, self.BINS - 1, out=bins)
+        keys = (bins + np.arange(3) * self.BINS).ravel()
+
+        bin_counts = np.bincount(keys, minlength=3 * self.BINS).reshape(3, self.BINS)
+        bin_min = np.full((3 * self.BINS, 3), np.inf)
+        bin_max = np.full((3 * self.BINS, 3), -np.inf)
+        np.minimum.at(bin_min, keys, np.repeat(minimums[indices], 3, axis=0))
+        np.maximum.at(bin_max, keys, np.repeat(maximums[indices], 3, axis=0))
+        bin_min = bin_min.reshape(3, self.BINS, 3)
+        bin_max = bin_max.reshape(3, self.BINS, 3)
+
+        # Split k puts bins 0..k on the left and bins k+1.. on the right.
+        left_counts = np.cumsum(bin_counts, axis=1)[:, :-1]
+        right_counts = count - left_counts
+        left_areas = _surface_areas(np.minimum.accumulate(bin_min, axis=1)[:, :-1],
+                                    np.maximum.accumulate(bin_max, axis=1)[:, :-1])
+        right_areas = _surface_areas(np.minimum.accumulate(bin_min[:, ::-1], axis=1)[:, -2::-1],
+                                     np.maximum.accumulate(bin_max[:, ::-1], axis=1)[:, -2::-1])
+        costs = left_areas * left_counts + right_areas * right_counts
+        costs[(left_counts == 0) | (right_counts == 0) | ~splittable[:, np.newaxis]] = np.inf
+
+        (axis, k) = np.unravel_index(int(np.argmin(costs)), costs.shape)
+        if costs[axis, k] == np.inf:
+            if count <= self.MAX_LEAF_SIZE:
+                return None
+            half = count // 2
+            return 0, indices[:half], indices[half:]
+        cost = costs[axis, k]
+        if count <= self.MAX_LEAF_SIZE and parent_area > 0 and count <= self.TRAVERSAL_COST + cost / parent_area:
+            return None
+        on_left = bins[:, axis] <= k
+        return int(axis), indices[on_left], indices[~on_left]
+
+
+def _surface_areas(minimums, maximums):
+    extents = np.maximum(maximums - minimums, 0)
+    (dx, dy, dz) = (extents[..., 0], extents[..., 1], extents[..., 2])
+    return 2 * (dx * dy + dy * dz + dz * dx)
@@ -1,9 +1,133 @@
 import math
+import sys
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
 
 from src.ray_tracer_challenge.canvas import Canvas
+from src.ray_tracer_challenge.cost_buffer import CostBuffer
+from src.ray_tracer_challenge.gbuffer import GBuffer
 from src.ray_tracer_challenge.matrix import Matrix
 from src.ray_tracer_challenge.ray import Ray
-from src.ray_tracer_challenge.tuple import Point
+from src.ray_tracer_challenge.render_stats import RenderStats
+from src.ray_tracer_challenge.tuple import Point, Vector
+from src.ray_tracer_challenge.world import ShadowCacheStats
+
+# What each Ray built from cached directions costs: its entry in the list, the Ray and its direction.
+# The origin is shared by all of them.
+_RAY_NBYTES = np.dtype(np.intp).itemsize + sys.getsizeof(Ray(Point(0, 0, 0), Vector(0, 0, 0))) + \
+    sys.getsizeof(Vector(0, 0, 0))
+
+
+class RayCache:
+    """
+    The primary rays of camera setups, so that rendering the same view again skips ray generation.
+    Entries are keyed on Camera.cache_key: the canvas size, field of view and transform.
+    An entry holds the ray directions, and the Ray objects built from them if they fit as well: renders in this
+    process use the Ray objects, while render workers read the directions from shared memory.
+    The cache holds at most max_bytes. It never evicts an entry by itself; a setup whose rays
+    do not fit in what is left of the budget is simply not cached. Use evict or clear to make room.
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative")
+        self._max_bytes = max_bytes
+        # Key -> [directions, rays or None, bytes of the entry].
+        self._entries = {}
+        self._nbytes = 0
+
+    def __repr__(self):
+        return f"RayCache(entries:{len(self)}, nbytes:{self.nbytes}, max_bytes:{self.max_bytes})"
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def has_room(self, nbytes: int) -> bool:
+        """
+        :return: whether nbytes more fit in the budget, so that callers can check before building an entry
+        """
+        return self._nbytes + nbytes <= self._max_bytes
+
+    @staticmethod
+    def rays_nbytes(count: int) -> int:
+        """
+        :return: the bytes count Ray objects built from cached directions take up in the cache
+        """
+        return count * _RAY_NBYTES
+
+    def get(self, key):
+        """
+        :return: the cached directions, as a flat array of x, y, z per pixel in row-major order, or None
+        """
+        entry = self._entries.get(key)
+        return None if entry is None else entry[0]
+
+    def get_rays(self, key):
+        """
+        :return: the cached Ray objects, as a list in row-major order, or None
+        """
+        entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def put(self, key, directions) -> bool:
+        """
+        Cache directions, unless they would take the cache over its budget.
+        :return: whether the directions were cached
+        """
+        self.evict(key)
+        size = directions.itemsize * len(directions)
+        if not self.has_room(size):
+            return False
+        self._entries[key] = [directions, None, size]
+        self._nbytes += size
+        return True
+
+    def put_rays(self, key, rays: list) -> bool:
+        """
+        Add the Ray objects built from the directions of a cached entry, unless they would take the cache over
+        its budget. Rays share their origin, so each costs the list slot, the Ray and its direction.
+        :return: whether the rays were cached
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            raise ValueError("Only the rays of cached directions can be cached")
+        size = self.rays_nbytes(len(rays))
+        if entry[1] is not None or not self.has_room(size):
+            return False
+        entry[1] = rays
+        entry[2] += size
+        self._nbytes += size
+        return True
+
+    def evict(self, key) -> bool:
+        """
+        :return: whether there was an entry for the key
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._nbytes -= entry[2]
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self._nbytes = 0
 
 
 class Camera:
@@ -15,7 +139,9 @@ class Camera:
         self._hsize = hsize
         self._vsize = vsize
         self._field_of_view = field_of_view
-        self._transform = Matrix.identity()
+        # A RayCache to reuse the primary rays of renders with the same setup, or None to generate them every time.
+        self.ray_cache = None
+        self.transform = Matrix.identity()
 
         half_view = math.tan(self._field_of_view / 2)
         aspect = hsize / vsize
@@ -46,12 +172,92 @@ class Camera:
 
     @transform.setter
     def transform(self, value):
+        # Every pixel needs the inverse transform and the ray origin derived from it,
+        # so compute them once per transform instead of once (or twice) per pixel.
         self._transform = value
+        self._inverse_transform = value.inverse()
+        self._inverse_array = self._inverse_transform.to_numpy()
+        self._origin = self._inverse_transform * Point(0, 0, 0)
+        self._transform_key = tuple(value.to_numpy().ravel().tolist())
+
+    def __getstate__(self):
+        # Render workers read the directions of the setup being rendered from shared memory,
+        # rather than receiving a copy of the whole cache.
+        state = self.__dict__.copy()
+        state['ray_cache'] = None
+        return state
+
+    @property
+    def inverse_transform(self):
+        return self._inverse_transform
+
+    @property
+    def origin(self) -> Point:
+        """
+        The origin of every primary ray: the position of the camera in world space.
+        """
+        return self._origin
 
     @property
     def pixel_size(self):
         return self._pixel_size
 
+    @property
+    def cache_key(self) -> tuple:
+        """
+        Everything the primary rays depend on: the canvas size, the field of view and the transform.
+        """
+        return self._hsize, self._vsize, self._field_of_view, self._transform_key
+
+    def primary_directions(self):
+        """
+        The direction of the primary ray through every pixel, from the ray cache if it has them.
+        Otherwise they are computed with ray_for_pixel, so that renders are the same with and without the cache,
+        and added to the cache, but only if it has room for them: a frame that does not fit is not built at all.
+        :return: flat array of x, y, z per pixel in row-major order, or None if the camera has no ray cache
+                 or they do not fit in it
+        """
+        if self.ray_cache is None:
+            return None
+        key = self.cache_key
+        directions = self.ray_cache.get(key)
+        if directions is None:
+            if not self.ray_cache.has_room(3 * self._hsize * self._vsize * array('d').itemsize):
+                return None
+            directions = array('d')
+            for y in range(self._vsize):
+                for x in range(self._hsize):
+                    direction = self.ray_for_pixel(x, y).direction
+                    directions.extend((direction.x, direction.y, direction.z))
+            self.ray_cache.put(key, directions)
+        return directions
+
+    def primary_rays(self):
+        """
+        The primary ray through every pixel, built from primary_directions and kept in the ray cache,
+        if it has room for them as well. Rays that do not fit are not built at all.
+        :return: list of Ray in row-major order, or None if the camera has no ray cache or they do not fit in it
+        """
+        if self.ray_cache is None:
+            return None
+        key = self.cache_key
+        rays = self.ray_cache.get_rays(key)
+        if rays is None:
+            directions = self.primary_directions()
+            if directions is None or not self.ray_cache.has_room(self.ray_cache.rays_nbytes(len(directions) // 3)):
+                return None
+            rays = list(_tile_rays(self, (0, 0, self._hsize, self._vsize), directions))
+            self.ray_cache.put_rays(key, rays)
+        return rays
+
+    def _cached_primary(self):
+        """
+        What the ray cache has for this setup, for renders in this process.
+        :return: (directions, rays): the cached rays if they fit, otherwise the cached directions if those fit
+        """
+        rays = self.primary_rays()
+        return (None if rays is not None else self.primary_directions()), rays
+
     def ray_for_pixel(self, x, y):
         # Offset from the edge of the canvas to the pixel's center
         x_offset = (x + 0.5) * self._pixel_size
@@ -66,17 +272,329 @@ class Camera:
         # and then compute the ray's direction vector.
         # The canvas is at z = -1, so the camera matrix transforms points
         # from z = 0 to z = -1.
-        pixel = self._transform.inverse() * Point(world_x, world_y, -1)
-        origin = self._transform.inverse() * Point(0, 0, 0)
+        pixel = self._inverse_transform * Point(world_x, world_y, -1)
+        origin = self._origin
         direction = (pixel - origin).normalize()
 
         return Ray(origin, direction)
 
-    def render(self, world):
-        canvas = Canvas(self._hsize, self._vsize)
-        for y in range(self._vsize):
-            for x in range(self._hsize):
-                ray = self.ray_for_pixel(x, y)
-                color = world.color_at(ray)
-                canvas.set_pixel(x, y, color)
+    def generate_rays(self, x0=0, y0=0, width=None, height=None):
+        """
+        Compute the primary rays for a tile of the canvas in one vectorized pass.
+        By default the tile is the whole canvas.
+        :return: (origins, directions), each an (N, 3) float array with one row per pixel,
+                 in row-major order (x varies fastest), where N = width * height.
+        """
+        width = self._hsize - x0 if width is None else width
+        height = self._vsize - y0 if height is None else height
+
+        # Same arithmetic as ray_for_pixel, for every column and row at once.
+        world_x = self._half_width - (np.arange(x0, x0 + width) + 0.5) * self._pixel_size
+        world_y = self._half_height - (np.arange(y0, y0 + height) + 0.5) * self._pixel_size
+
+        # The canvas points (world_x, world_y, -1), one per pixel.
+        canvas_points = np.empty((height, width, 3))
+        canvas_points[:, :, 0] = world_x[np.newaxis, :]
+        canvas_points[:, :, 1] = world_y[:, np.newaxis]
+        canvas_points[:, :, 2] = -1
+        canvas_points = canvas_points.reshape(-1, 3)
+
+        # The inverse transform maps the origin to its translation column, so the
+        # direction to each transformed pixel only needs the upper-left 3x3 block.
+        inverse = self._inverse_array
+        directions = canvas_points @ inverse[:3, :3].T
+        directions /= np.linalg.norm(directions, axis=1)[:, np.newaxis]
+        origins = np.tile(inverse[:3, 3], (width * height, 1))
+
+        return origins, directions
+
+    def tiles(self, tile_size):
+        """
+        Split the canvas into tiles of at most tile_size x tile_size pixels, in row-major order.
+        :return: list of (x0, y0, width, height)
+        """
+        return [(x0, y0, min(tile_size, self._hsize - x0), min(tile_size, self._vsize - y0))
+                for y0 in range(0, self._vsize, tile_size)
+                for x0 in range(0, self._hsize, tile_size)]
+
+    def render(self, world, workers=None, tile_size=32, stats=False, cost=False):
+        """
+        Render the world to a canvas.
+        :param world: World
+        :param workers: number of worker processes; None or 1 renders in this process
+        :param tile_size: edge length in pixels of the tiles handed to the workers
+        :param stats: also count rays, intersection tests, hits and lighting calls, and time each phase.
+                      This slows the render down, so it is off by default.
+        :param cost: also record the intersection tests and time per pixel, in the stats' cost buffer.
+                     Implies stats.
+        :return: Canvas, or (Canvas, RenderStats) if stats or cost is True
+        """
+        render_stats = RenderStats() if stats or cost else None
+        if cost:
+            render_stats.cost = CostBuffer(self._hsize, self._vsize)
+        start = time.perf_counter()
+        if workers is not None and workers > 1:
+            canvas = self._render_parallel(world, workers, tile_size, render_stats)
+        else:
+            canvas = Canvas(self._hsize, self._vsize)
+            (directions, rays) = self._cached_primary()
+            for tile in self.tiles(tile_size):
+                tile_cost = None if not cost else CostBuffer(tile[2], tile[3])
+                canvas.write_tile(tile[0], tile[1],
+                                  _trace_tile(self, world, tile, render_stats, tile_cost, directions, rays))
+                if cost:
+                    render_stats.cost.write_tile(tile[0], tile[1], tile_cost)
+        if render_stats is None:
+            return canvas
+        render_stats.wall_time = time.perf_counter() - start
+        return canvas, render_stats
+
+    def render_gbuffer(self, world) -> GBuffer:
+        """
+        Trace the primary rays and record each pixel's hit, instead of shading it.
+        Shade the result with world.shade_gbuffer, as many times as needed.
+        """
+        gbuffer = GBuffer(self._hsize, self._vsize, world.objects)
+        rays = _tile_rays(self, (0, 0, self._hsize, self._vsize), *self._cached_primary())
+        for (index, ray) in enumerate(rays):
+            hit = world.closest_hit(ray)
+            if hit is not None:
+                gbuffer.record(index, hit.prepare_computations(ray))
+        return gbuffer
+
+    def render_iter(self, world, order="scanline", tile_size=32, workers=None):
+        """
+        Render the world chunk by chunk, yielding each chunk as soon as it is finished.
+        Chunks are yielded top to bottom, left to right. Stopping the iteration early
+        stops the render.
+        :param world: World
+        :param order: "scanline" yields one row at a time, "tiles" yields tile_size x tile_size tiles
+        :param tile_size: edge length in pixels of the tiles, for order="tiles"
+        :param workers: number of worker processes; None or 1 renders in this process
+        :return: iterator of (x0, y0, pixels), where pixels is a (height, width, 3) array
+        """
+        if order == "scanline":
+            tiles = [(0, y, self._hsize, 1) for y in range(self._vsize)]
+        elif order == "tiles":
+            tiles = self.tiles(tile_size)
+        else:
+            raise ValueError(f"Unknown render order: {order}")
+
+        if workers is None or workers <= 1:
+            (directions, rays) = self._cached_primary()
+            for tile in tiles:
+                yield tile[0], tile[1], _trace_tile(self, world, tile, directions=directions, rays=rays)
+            return
+
+        shared_directions = self._share_directions()
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker,
+                                       initargs=(self, world, None, None, False, False,
+                                                 *_shared_directions_args(shared_directions)))
+        try:
+            # Only a few tiles are in flight at a time, so that finished tiles do not pile up
+            # while the caller is busy with the ones already yielded.
+            results = _map_in_order(executor, _render_tile_pixels, tiles, 2 * workers)
+            for tile, (pixels, shadow_stats) in zip(tiles, results):
+                world.shadow_stats.merge(shadow_stats)
+                yield tile[0], tile[1], pixels
+        finally:
+            executor.shutdown(cancel_futures=True)
+            _release(shared_directions)
+
+    def _render_parallel(self, world, workers, tile_size, stats=None):
+        # The workers write their tiles straight into a shared buffer, so that only
+        # the tile coordinates travel between processes, not the pixel data.
+        shape = (self._vsize, self._hsize, 3)
+        shared_memory = SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(np.float64).itemsize)
+        shared_directions = None
+        collect_cost = stats is not None and stats.cost is not None
+        try:
+            shared_directions = self._share_directions()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker,
+                                     initargs=(self, world, shared_memory.name, shape, stats is not None,
+                                               collect_cost, *_shared_directions_args(shared_directions))) \
+                    as executor:
+                # Consume the results so that exceptions in the workers are raised here.
+                # Each tile's shadow cache counts, and its stats if asked for, come back and are added up.
+                tiles = self.tiles(tile_size)
+                for (tile, (tile_stats, shadow_stats)) in zip(tiles, executor.map(_render_tile, tiles)):
+                    world.shadow_stats.merge(shadow_stats)
+                    if stats is not None:
+                        stats.merge(tile_stats)
+                    if collect_cost:
+                        stats.cost.write_tile(tile[0], tile[1], tile_stats.cost)
+            canvas = Canvas(self._hsize, self._vsize)
+            canvas.write_tile(0, 0, np.ndarray(shape, dtype=np.float64, buffer=shared_memory.buf))
+        finally:
+            _release(shared_memory)
+            _release(shared_directions)
         return canvas
+
+    def _share_directions(self):
+        """
+        Copy the cached primary directions into shared memory, for the render workers to read.
+        :return: (SharedMemory, number of values), or None if the camera has no ray cache
+        """
+        directions = self.primary_directions()
+        if directions is None or not len(directions):
+            return None
+        shared_memory = SharedMemory(create=True, size=directions.itemsize * len(directions))
+        np.ndarray(len(directions), dtype=np.float64, buffer=shared_memory.buf)[:] = directions
+        return shared_memory, len(directions)
+
+
+def _shared_directions_args(shared_directions) -> tuple:
+    # The arguments of _init_render_worker for directions shared by Camera._share_directions.
+    if shared_directions is None:
+        return None, 0
+    (shared_memory, length) = shared_directions
+    return shared_memory.name, length
+
+
+def _release(shared):
+    if isinstance(shared, tuple):
+        shared = shared[0]
+    if shared is not None:
+        shared.close()
+        shared.unlink()
+
+
+def _map_in_order(executor, fn, items, window):
+    """
+    Like executor.map, but with at most window futures pending at a time:
+    the next call is submitted as each result is yielded, rather than all of them up front.
+    """
+    pending = deque()
+    items = iter(items)
+    try:
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) == window:
+                break
+        while pending:
+            result = pending.popleft().result()
+            for item in items:
+                pending.append(executor.submit(fn, item))
+                break
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _trace_tile(camera, world, tile, stats=None, cost=None, directions=None, rays=None):
+    """
+    Trace every pixel of a tile, one ray at a time.
+    :param stats: RenderStats to record the render in, or None
+    :param cost: CostBuffer the size of the tile, to record the cost of each pixel in, or None. Needs stats.
+    :param directions: the camera's primary_directions, or None to generate the rays
+    :param rays: the camera's primary_rays, used instead of directions if given
+    :return: (height, width, 3) array of red, green and blue values
+    """
+    (x0, y0, width, height) = tile
+    pixels = np.empty((height, width, 3))
+    rays = _tile_rays(camera, tile, directions, rays)
+    if stats is None:
+        for y in range(height):
+            for x in range(width):
+                color = world.color_at(next(rays))
+                pixels[y, x] = (color.red, color.green, color.blue)
+        return pixels
+
+    for y in range(height):
+        for x in range(width):
+            if cost is not None:
+                tests = stats.total_intersection_tests
+            start = time.perf_counter()
+            ray = next(rays)
+            stats.add_time('ray_generation', time.perf_counter() - start)
+            stats.primary_rays += 1
+            color = world.color_at(ray, stats)
+            pixels[y, x] = (color.red, color.green, color.blue)
+            if cost is not None:
+                cost.time[y, x] = time.perf_counter() - start
+                cost.tests[y, x] = stats.total_intersection_tests - tests
+    return pixels
+
+
+def _tile_rays(camera, tile, directions=None, rays=None):
+    """
+    The primary rays of a tile in row-major order: the cached rays if there are any, otherwise
+    built from cached directions if there are any.
+    """
+    (x0, y0, width, height) = tile
+    if rays is not None:
+        for y in range(y0, y0 + height):
+            start = y * camera.hsize + x0
+            yield from rays[start:start + width]
+        return
+    if directions is None:
+        for y in range(y0, y0 + height):
+            for x in range(x0, x0 + width):
+                yield camera.ray_for_pixel(x, y)
+        return
+    origin = camera.origin
+    for y in range(y0, y0 + height):
+        start = 3 * (y * camera.hsize + x0)
+        row = directions[start:start + 3 * width]
+        for i in range(0, 3 * width, 3):
+            yield Ray(origin, Vector(row[i], row[i + 1], row[i + 2]))
+
+
+# Per-process state of the render workers, set up once by _init_render_worker.
+_render_worker = {}
+
+
+def _init_render_worker(camera, world, shared_memory_name=None, shape=None, collect_stats=False, collect_cost=False,
+                        directions_name=None, directions_length=0):
+    """
+    :param shared_memory_name: the shared memory to write the pixels to, of the given shape
+    :param directions_name: the shared memory with the camera's primary_directions, of directions_length values
+    """
+    _render_worker["camera"] = camera
+    _render_worker["world"] = world
+    _render_worker["collect_stats"] = collect_stats
+    _render_worker["collect_cost"] = collect_cost
+    if shared_memory_name is not None:
+        shared_memory = SharedMemory(name=shared_memory_name)
+        _render_worker["shared_memory"] = shared_memory
+        _render_worker["pixels"] = np.ndarray(shape, dtype=np.float64, buffer=shared_memory.buf)
+    _render_worker["directions"] = None
+    if directions_name is not None:
+        shared_directions = SharedMemory(name=directions_name)
+        _render_worker["shared_directions"] = shared_directions
+        # A view of the shared memory, so that each worker reads its tiles' rows without copying the rest.
+        _render_worker["directions"] = shared_directions.buf.cast('d')[:directions_length]
+
+
+def _render_tile(tile):
+    """
+    :return: (RenderStats, ShadowCacheStats) of the tile. The RenderStats are None unless the worker collects
+             them, and their cost buffer, if any, covers just the tile.
+    """
+    (x0, y0, width, height) = tile
+    pixels = _render_worker["pixels"]
+    shadow_stats = _tile_shadow_stats()
+    stats = RenderStats() if _render_worker["collect_stats"] else None
+    if _render_worker["collect_cost"]:
+        stats.cost = CostBuffer(width, height)
+    pixels[y0:y0 + height, x0:x0 + width] = _trace_tile(_render_worker["camera"], _render_worker["world"], tile,
+                                                        stats, None if stats is None else stats.cost,
+                                                        _render_worker["directions"])
+    return stats, shadow_stats
+
+
+def _render_tile_pixels(tile):
+    """
+    :return: (pixels, ShadowCacheStats) of the tile
+    """
+    shadow_stats = _tile_shadow_stats()
+    return _trace_tile(_render_worker["camera"], _render_worker["world"], tile,
+                       directions=_render_worker["directions"]), shadow_stats
+
+
+def _tile_shadow_stats():
+    # The worker's world counts the shadow queries of the next tile afresh, to send them back with the tile.
+    shadow_stats = ShadowCacheStats()
+    _render_worker["world"].shadow_stats = shadow_stats
+    return shadow_stats
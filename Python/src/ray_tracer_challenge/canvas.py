@@ -1,12 +1,20 @@
-from src.ray_tracer_challenge.color import Color, Colors
+import io
+
+import numpy as np
+
+from src.ray_tracer_challenge.color import Color
 
 
 class Canvas:
-    def __init__(self, width, height):
-        self._MAX_COLOR_VALUE = 255
+    """
+    A width x height image, stored as a single contiguous height x width x 3 float buffer
+    of red, green and blue values.
+    """
+
+    def __init__(self, width, height, dtype=np.float64):
         self._width = width
         self._height = height
-        self._pixels = [[Colors.BLACK for _ in range(width)] for _ in range(height)]
+        self._pixels = np.zeros((height, width, 3), dtype=dtype)
 
     def __repr__(self):
         return f"Canvas(width:{self.width}, height:{self.height})"
@@ -20,41 +28,93 @@ class Canvas:
         return self._height
 
     @property
-    def pixels(self):
+    def pixels(self) -> np.ndarray:
+        """
+        The underlying height x width x 3 buffer, indexed as pixels[y, x].
+        """
         return self._pixels
 
     def get_pixel(self, x: int, y: int) -> Color:
-        return self._pixels[y][x]
+        (red, green, blue) = self._pixels[y, x].tolist()
+        return Color(red, green, blue)
 
     def set_pixel(self, x: int, y: int, color: Color):
-        self._pixels[y][x] = color
+        self._pixels[y, x] = (color.red, color.green, color.blue)
+
+    def write_tile(self, x0: int, y0: int, tile):
+        """
+        Write a block of pixels with its top left corner at (x0, y0).
+        :param tile: array of shape (tile height, tile width, 3)
+        """
+        tile = np.asarray(tile)
+        (tile_height, tile_width) = tile.shape[:2]
+        self._pixels[y0:y0 + tile_height, x0:x0 + tile_width] = tile
+
+    def write_rows(self, y0: int, rows):
+        """
+        Write whole rows of pixels, starting at row y0.
+        :param rows: array of shape (rows, width, 3), or (rows * width, 3) in row-major order
+        """
+        rows = np.asarray(rows).reshape(-1, self._width, 3)
+        self._pixels[y0:y0 + len(rows)] = rows
+
+    def write_ppm(self, fileobj, binary=True):
+        """
+        Stream the canvas to a binary file object as a PPM image, one row at a time.
+        :param fileobj: a file object opened for writing bytes
+        :param binary: write a P6 (binary) image if True, otherwise a P3 (plain text) image
+        """
+        writer = PPMWriter(fileobj, self._width, self._height, binary)
+        for y in range(self._height):
+            writer.write_rows(self._pixels[y:y + 1])
 
     def to_ppm(self) -> str:
-        ppm = f"P3\n{self.width} {self.height}\n{self._MAX_COLOR_VALUE}\n"
-        for row in self.pixels:
-            line = ""
-            for pixel in row:
-                line += f"{self._color_to_ppm(pixel)} "
-
-            line = line.strip() + "\n"
-            while len(line) > 70:
-                pos = line.find(" ", 65, 70)
-                ppm += line[:pos] + "\n"
-                line = line[pos + 1:]
-
-            ppm += f"{line}"
-
-        return ppm
-
-    def _color_to_ppm(self, color: Color) -> str:
-        def _clamp(value: float) -> int:
-            # If we want half of 255 to be 128 (as in the tests), we need to round up.
-            # return (min(max(
-            #         int(Decimal(value * self._MAX_COLOR_VALUE).quantize(Decimal('1.'), rounding=ROUND_UP)),
-            #         0),
-            #     self._MAX_COLOR_VALUE))
-
-            # However, I decided to round down instead, and to change the test
-            return min(max(int(value * self._MAX_COLOR_VALUE), 0), self._MAX_COLOR_VALUE)
-
-        return f"{_clamp(color.red)} {_clamp(color.green)} {_clamp(color.blue)}"
+        buffer = io.BytesIO()
+        self.write_ppm(buffer, binary=False)
+        return buffer.getvalue().decode("ascii")
+
+
+class PPMWriter:
+    """
+    Writes a PPM image to a binary file object incrementally, a block of rows at a time.
+    The header is written on construction; rows must then be written top to bottom.
+    """
+
+    MAX_COLOR_VALUE = 255
+    MAX_LINE_LENGTH = 70
+
+    def __init__(self, fileobj, width, height, binary=True):
+        self._fileobj = fileobj
+        self._width = width
+        self._binary = binary
+        magic = "P6" if binary else "P3"
+        fileobj.write(f"{magic}\n{width} {height}\n{self.MAX_COLOR_VALUE}\n".encode("ascii"))
+
+    def write_rows(self, rows):
+        """
+        :param rows: array of shape (rows, width, 3), or (rows * width, 3) in row-major order
+        """
+        values = self._quantize(np.asarray(rows).reshape(-1, self._width * 3))
+        if self._binary:
+            self._fileobj.write(values.tobytes())
+        else:
+            self._fileobj.write("".join(self._plain_row(row) for row in values.tolist()).encode("ascii"))
+
+    def _quantize(self, values: np.ndarray) -> np.ndarray:
+        # If we want half of 255 to be 128 (as in the tests), we need to round up.
+        # However, I decided to round down instead, and to change the test:
+        # clamp to [0, 255] and truncate towards zero.
+        return np.clip(values * self.MAX_COLOR_VALUE, 0, self.MAX_COLOR_VALUE).astype(np.uint8)
+
+    def _plain_row(self, row) -> str:
+        # Lines in a plain PPM should not be longer than 70 characters, so split at the
+        # first space between positions 65 and 70 of whatever is left of the row.
+        line = " ".join(map(str, row)) + "\n"
+        start = 0
+        parts = []
+        while len(line) - start > self.MAX_LINE_LENGTH:
+            pos = line.find(" ", start + 65, start + self.MAX_LINE_LENGTH)
+            parts.append(line[start:pos] + "\n")
+            start = pos + 1
+        parts.append(line[start:])
+        return "".join(parts)
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+
+from src.ray_tracer_challenge.canvas import Canvas
+
+# Colors of the heatmap from no cost to the highest cost: black, blue, magenta, orange, yellow, white.
+_HEATMAP_STOPS = np.array([0, 0.2, 0.4, 0.6, 0.8, 1])
+_HEATMAP_COLORS = np.array([(0, 0, 0), (0.1, 0.1, 0.6), (0.7, 0.1, 0.6), (1, 0.45, 0), (1, 0.9, 0.1), (1, 1, 1)])
+
+
+class CostBuffer:
+    """
+    What each pixel of a render cost: the number of ray-object intersection tests, and the time spent on it.
+    Both are (height, width) arrays, indexed [y, x] like Canvas.pixels.
+    """
+
+    METRICS = ('tests', 'time')
+
+    def __init__(self, width, height):
+        self._width = width
+        self._height = height
+        self.tests = np.zeros((height, width), dtype=np.int64)
+        self.time = np.zeros((height, width))
+
+    def __repr__(self):
+        return f"CostBuffer(width:{self.width}, height:{self.height}, tests:{self.tests.sum()})"
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    def write_tile(self, x0: int, y0: int, tile: 'CostBuffer'):
+        """
+        Copy the costs of a tile rendered separately, with its top left corner at (x0, y0).
+        """
+        self.tests[y0:y0 + tile.height, x0:x0 + tile.width] = tile.tests
+        self.time[y0:y0 + tile.height, x0:x0 + tile.width] = tile.time
+
+    def heatmap(self, metric='tests', maximum=None) -> Canvas:
+        """
+        Map a metric to false colors, from black for no cost through blue, magenta, orange and yellow to white.
+        :param metric: 'tests' or 'time'
+        :param maximum: the cost shown as white, and above. Defaults to the 99th percentile of the costs, so that
+                        a few outliers, such as pixels interrupted by garbage collection, do not darken the rest.
+                        Pass the same value for several renders to compare their heatmaps.
+        """
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown cost metric: {metric}")
+        values = getattr(self, metric).astype(np.float64)
+        if maximum is None:
+            maximum = np.percentile(values, 99) if values.size else 0
+        scaled = np.minimum(values / maximum, 1) if maximum > 0 else np.zeros_like(values)
+        canvas = Canvas(self._width, self._height)
+        for channel in range(3):
+            canvas.pixels[:, :, channel] = np.interp(scaled, _HEATMAP_STOPS, _HEATMAP_COLORS[:, channel])
+        return canvas
+
+    def write_heatmap(self, path: str, metric='tests', maximum=None):
+        """
+        Write the heatmap of a metric to an image file: a PPM if the path ends in .ppm,
+        otherwise any format Pillow can write, such as PNG.
+        """
+        canvas = self.heatmap(metric, maximum)
+        if os.path.splitext(path)[1].lower() == '.ppm':
+            with open(path, 'wb') as f:
+                canvas.write_ppm(f)
+            return
+        from PIL import Image
+        # Quantized the same way as PPM output.
+        Image.fromarray(np.clip(canvas.pixels * 255, 0, 255).astype(np.uint8)).save(path)
@@ -0,0 +1,398 @@
+from array import array
+from typing import Optional
+
+import numpy as np
+
+from src.ray_tracer_challenge.bvh import BVH
+from src.ray_tracer_challenge.color import Color
+from src.ray_tracer_challenge.constants import EPSILON
+from src.ray_tracer_challenge.intersection import Intersection
+from src.ray_tracer_challenge.plane import Plane
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.render_stats import RenderStats
+from src.ray_tracer_challenge.sphere import Sphere
+from src.ray_tracer_challenge.tuple import Light, Point, Vector
+
+# Object types in FrozenWorld.kinds.
+SPHERE = 0  # a sphere that only translates and scales uniformly, stored as center and radius
+TRANSFORMED_SPHERE = 1  # any other sphere, stored as its inverse transform
+PLANE = 2  # a plane, stored as the row of its inverse transform that gives object space y, and its normal
+SHAPE = 3  # anything else, which is asked through its own methods
+
+# Columns of FrozenWorld.materials.
+(RED, GREEN, BLUE, AMBIENT, DIFFUSE, SPECULAR, SHININESS) = range(7)
+
+
+class FrozenWorld:
+    """
+    The objects of a World compiled into a structure of arrays, made by World.freeze().
+    Spheres and planes are intersected straight from these arrays, without going through the objects:
+    in batches with NumPy, and ray by ray with flat arrays of Python floats, which index much faster.
+    Other shapes are still asked through their own methods.
+    """
+
+    # The number of ray and object pairs intersected at once by the batch methods.
+    BLOCK_SIZE = 16384
+
+    def __init__(self, objects):
+        self.objects = tuple(objects)
+        count = len(self.objects)
+
+        self.kinds = np.full(count, SHAPE, dtype=np.int8)
+        self.inverses = np.zeros((count, 4, 4))
+        self.centers = np.zeros((count, 3))
+        self.radii = np.zeros(count)
+        self.plane_normals = np.zeros((count, 3))
+        self.material_ids = np.zeros(count, dtype=np.int32)
+        materials = {}
+        for (i, obj) in enumerate(self.objects):
+            self.inverses[i] = obj.inverse_transform.to_numpy()
+            if isinstance(obj, Sphere):
+                if obj.radius is not None:
+                    self.kinds[i] = SPHERE
+                    (center, self.radii[i]) = (obj.center, obj.radius)
+                    self.centers[i] = (center.x, center.y, center.z)
+                else:
+                    self.kinds[i] = TRANSFORMED_SPHERE
+            elif isinstance(obj, Plane):
+                self.kinds[i] = PLANE
+                normal = obj.normal_at(Point(0, 0, 0))
+                self.plane_normals[i] = (normal.x, normal.y, normal.z)
+            self.material_ids[i] = materials.setdefault(id(obj.material), (len(materials), obj.material))[0]
+
+        # One row per distinct material, in the order of the columns above.
+        self.materials = np.array([(m.color.red, m.color.green, m.color.blue,
+                                    m.ambient, m.diffuse, m.specular, m.shininess)
+                                   for (_, m) in materials.values()], dtype=np.float64).reshape(-1, 7)
+
+        # Flat copies for the ray by ray path: four floats per object for spheres (center and radius squared)
+        # and planes (row 1 of the inverse), and sixteen for the inverses.
+        self._kinds = self.kinds.tolist()
+        self._material_ids = self.material_ids.tolist()
+        self._material_rows = [tuple(row) for row in self.materials.tolist()]
+        spheres = np.hstack((self.centers, (self.radii ** 2)[:, np.newaxis]))
+        self._spheres = array('d', spheres.ravel().tolist())
+        self._planes = array('d', self.inverses[:, 1].ravel().tolist())
+        self._inverses = array('d', self.inverses.ravel().tolist())
+        self._indices = {id(obj): i for (i, obj) in enumerate(self.objects)}
+        self._type_names = [type(obj).__name__ for obj in self.objects]
+
+        # Per group terms for the batch methods; see _intersect_groups.
+        self._sphere_indices = np.flatnonzero(self.kinds == SPHERE)
+        centers = self.centers[self._sphere_indices]
+        self._sphere_terms = (centers.T.copy(),
+                              np.einsum('ij,ij->i', centers, centers) - self.radii[self._sphere_indices] ** 2)
+        self._transformed_indices = np.flatnonzero(self.kinds == TRANSFORMED_SPHERE)
+        blocks = self.inverses[self._transformed_indices, :3, :3]
+        translations = self.inverses[self._transformed_indices, :3, 3]
+        self._transformed_terms = (np.einsum('ski,skj->sij', blocks, blocks).reshape(-1, 9).T.copy(),
+                                   np.einsum('ski,sk->si', blocks, translations).T.copy(),
+                                   np.einsum('ij,ij->i', translations, translations) - 1)
+        self._plane_indices = np.flatnonzero(self.kinds == PLANE)
+        self._plane_rows = self.inverses[self._plane_indices, 1].T.copy()
+        self._shape_indices = np.flatnonzero(self.kinds == SHAPE)
+
+        bounded = []
+        (minimums, maximums) = ([], [])
+        self._unbounded = []
+        for (i, obj) in enumerate(self.objects):
+            box = obj.bounds()
+            if box.is_bounded():
+                bounded.append(i)
+                minimums.append((box.min_x, box.min_y, box.min_z))
+                maximums.append((box.max_x, box.max_y, box.max_z))
+            else:
+                self._unbounded.append(i)
+        self._bvh = BVH(bounded, np.reshape(minimums, (-1, 3)), np.reshape(maximums, (-1, 3)))
+
+    def __len__(self):
+        return len(self.objects)
+
+    def index(self, obj) -> int:
+        return self._indices[id(obj)]
+
+    def nearest_hit(self, index: int, ray: Ray, t_min: float, t_max: float) -> Optional[Intersection]:
+        """
+        The nearest intersection of one object with t_min <= t < t_max, or None.
+        """
+        kind = self._kinds[index]
+        if kind == SHAPE:
+            return self.objects[index].nearest_hit(ray, t_min, t_max)
+
+        (origin, direction) = (ray.origin, ray.direction)
+        (ox, oy, oz, dx, dy, dz) = (origin.x, origin.y, origin.z, direction.x, direction.y, direction.z)
+        if kind == PLANE:
+            (m0, m1, m2, m3) = self._planes[4 * index:4 * index + 4]
+            direction_y = m0 * dx + m1 * dy + m2 * dz
+            if abs(direction_y) < EPSILON:
+                return None
+            t = -(m0 * ox + m1 * oy + m2 * oz + m3) / direction_y
+            return Intersection(t, self.objects[index]) if t_min <= t < t_max else None
+
+        if kind == SPHERE:
+            (cx, cy, cz, radius_squared) = self._spheres[4 * index:4 * index + 4]
+            (ox, oy, oz) = (ox - cx, oy - cy, oz - cz)
+        else:
+            (m00, m01, m02, m03, m10, m11, m12, m13, m20, m21, m22, m23) = self._inverses[16 * index:16 * index + 12]
+            (ox, oy, oz) = (m00 * ox + m01 * oy + m02 * oz + m03,
+                            m10 * ox + m11 * oy + m12 * oz + m13,
+                            m20 * ox + m21 * oy + m22 * oz + m23)
+            (dx, dy, dz) = (m00 * dx + m01 * dy + m02 * dz,
+                            m10 * dx + m11 * dy + m12 * dz,
+                            m20 * dx + m21 * dy + m22 * dz)
+            radius_squared = 1
+        a = dx * dx + dy * dy + dz * dz
+        b = 2 * (dx * ox + dy * oy + dz * oz)
+        c = (ox * ox + oy * oy + oz * oz) - radius_squared
+        discriminant = b ** 2 - 4 * a * c
+        if discriminant < 0:
+            return None
+        root = discriminant ** 0.5
+        t = (-b - root) / (2 * a)
+        if t_min <= t < t_max:
+            return Intersection(t, self.objects[index])
+        t = (-b + root) / (2 * a)
+        if t_min <= t < t_max:
+            return Intersection(t, self.objects[index])
+        return None
+
+    def closest_hit(self, ray: Ray, t_min: float, t_max: float,
+                    stats: RenderStats = None) -> Optional[Intersection]:
+        """
+        :param stats: if given, every object tested is counted in it
+        """
+        hit_fn = self.nearest_hit if stats is None else stats.counted(self.nearest_hit, self.type_name)
+        hit = None
+        for index in self._unbounded:
+            candidate = hit_fn(index, ray, t_min, t_max)
+            if candidate is not None:
+                hit = candidate
+                t_max = hit.t
+        candidate = self._bvh.closest_hit(ray, t_min, t_max, hit_fn)
+        return hit if candidate is None else candidate
+
+    def any_hit(self, ray: Ray, t_min: float, t_max: float, stats: RenderStats = None) -> Optional[int]:
+        """
+        :param stats: if given, every object tested is counted in it
+        :return: the index of any object hit with t_min <= t < t_max, or None
+        """
+        hit_fn = self.nearest_hit if stats is None else stats.counted(self.nearest_hit, self.type_name)
+        for index in self._unbounded:
+            if hit_fn(index, ray, t_min, t_max) is not None:
+                return index
+        return self._bvh.any_hit(ray, t_min, t_max, hit_fn)
+
+    def type_name(self, index: int) -> str:
+        return self._type_names[index]
+
+    def lighting(self, light: Light, index: int, position: Point, eye_vector: Vector, normal_vector: Vector,
+                 in_shadow=False) -> Color:
+        """
+        Material.lighting for a point on the object with the given index, reading its material from the table
+        and working on plain floats rather than Colors.
+        """
+        (red, green, blue, ambient, diffuse, specular, shininess) = self._material_rows[self._material_ids[index]]
+        intensity = light.intensity
+        (ir, ig, ib) = (intensity.red, intensity.green, intensity.blue)
+        (er, eg, eb) = (red * ir, green * ig, blue * ib)
+        if in_shadow:
+            return Color(er * ambient, eg * ambient, eb * ambient)
+
+        (lx, ly, lz) = (light.position.x - position.x, light.position.y - position.y, light.position.z - position.z)
+        length = (lx * lx + ly * ly + lz * lz) ** 0.5
+        (lx, ly, lz) = (lx / length, ly / length, lz / length)
+        (nx, ny, nz) = (normal_vector.x, normal_vector.y, normal_vector.z)
+        light_dot_normal = nx * lx + ny * ly + nz * lz
+        if light_dot_normal < 0:
+            return Color(er * ambient, eg * ambient, eb * ambient)
+
+        scale = ambient + diffuse * light_dot_normal
+        (r, g, b) = (er * scale, eg * scale, eb * scale)
+        # The reflection of the light vector is 2 (l.n) n - l.
+        reflect_dot_eye = ((2 * light_dot_normal * nx - lx) * eye_vector.x +
+                           (2 * light_dot_normal * ny - ly) * eye_vector.y +
+                           (2 * light_dot_normal * nz - lz) * eye_vector.z)
+        if reflect_dot_eye > 0:
+            factor = specular * reflect_dot_eye ** shininess
+            (r, g, b) = (r + ir * factor, g + ig * factor, b + ib * factor)
+        return Color(r, g, b)
+
+    def intersect_many(self, origins: np.ndarray, directions: np.ndarray):
+        """
+        Find the nearest hit with t >= 0 for a batch of rays, over every object.
+        :return: (hit_t, hit_index): the t of each hit, inf for misses, and the index of the object hit, -1 for misses
+        """
+        hit_t = np.full(len(origins), np.inf)
+        hit_index = np.full(len(origins), -1)
+        for rays in self._blocks(len(origins)):
+            (block_t, block_index) = (hit_t[rays], hit_index[rays])
+            for (indices, t_near, t_far) in self._intersect_groups(origins[rays], directions[rays]):
+                t = np.where(t_near >= 0, t_near, np.where(t_far >= 0, t_far, np.inf))
+                column = np.argmin(t, axis=1)
+                t = t[np.arange(len(t)), column]
+                closer = t < block_t
+                block_t[closer] = t[closer]
+                block_index[closer] = indices[column[closer]]
+        return hit_t, hit_index
+
+    def occluded_many(self, origins: np.ndarray, directions: np.ndarray, distances: np.ndarray) -> np.ndarray:
+        """
+        :return: (N,) boolean array, True where any object is hit with 0 <= t < distance
+        """
+        occluded = np.zeros(len(origins), dtype=bool)
+        for rays in self._blocks(len(origins)):
+            limit = distances[rays, np.newaxis]
+            for (_, t_near, t_far) in self._intersect_groups(origins[rays], directions[rays]):
+                hit = ((t_near >= 0) & (t_near < limit)) | ((t_far >= 0) & (t_far < limit))
+                occluded[rays] |= hit.any(axis=1)
+        return occluded
+
+    def _blocks(self, count: int):
+        """
+        Split a batch of rays into slices small enough that the (rays, objects) arrays stay in cache.
+        Working on the whole batch at once is slower, as it is limited by memory bandwidth.
+        """
+        size = max(1, self.BLOCK_SIZE // max(1, len(self.objects)))
+        return [slice(start, start + size) for start in range(0, count, size)]
+
+    def normal_at_many(self, points: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        """
+        :param points: (N, 3) array of points in world space
+        :param indices: (N,) array of the index of the object each point is on
+        :return: (N, 3) array of normalized world space normals
+        """
+        normals = np.zeros((len(points), 3))
+        kinds = self.kinds[indices]
+
+        rows = kinds == SPHERE
+        normals[rows] = points[rows] - self.centers[indices[rows]]
+
+        rows = kinds == TRANSFORMED_SPHERE
+        inverses = self.inverses[indices[rows]]
+        obj_points = np.einsum('rij,rj->ri', inverses[:, :3, :3], points[rows]) + inverses[:, :3, 3]
+        # The inverse-transpose applied to a vector is the transposed upper-left block of the inverse.
+        normals[rows] = np.einsum('rji,rj->ri', inverses[:, :3, :3], obj_points)
+
+        rows = kinds == PLANE
+        normals[rows] = self.plane_normals[indices[rows]]
+
+        for index in np.unique(indices[kinds == SHAPE]):
+            rows = indices == index
+            normals[rows] = self.objects[index].normal_at_many(points[rows])
+
+        return normals / np.linalg.norm(normals, axis=1)[:, np.newaxis]
+
+    def lighting_many(self, light: Light, positions: np.ndarray, eye_vectors: np.ndarray,
+                      normal_vectors: np.ndarray, indices: np.ndarray, in_shadow: np.ndarray = None) -> np.ndarray:
+        """
+        Material.lighting_many for points on any mix of objects, reading each point's material from the table.
+        :param indices: (N,) array of the index of the object each point is on
+        :return: (N, 3) array of red, green and blue values
+        """
+        table = self.materials[self.material_ids[indices]]
+        intensity = np.array([light.intensity.red, light.intensity.green, light.intensity.blue])
+        effective_color = table[:, RED:BLUE + 1] * intensity
+
+        light_vectors = np.array([light.position.x, light.position.y, light.position.z]) - positions
+        light_vectors /= np.linalg.norm(light_vectors, axis=1)[:, np.newaxis]
+        ambient = effective_color * table[:, AMBIENT, np.newaxis]
+
+        light_dot_normal = np.einsum('ij,ij->i', normal_vectors, light_vectors)
+        lit = light_dot_normal >= 0
+        if in_shadow is not None:
+            lit &= ~in_shadow
+
+        diffuse = (np.where(lit, light_dot_normal, 0) * table[:, DIFFUSE])[:, np.newaxis] * effective_color
+
+        reflect_vectors = normal_vectors * (2 * light_dot_normal)[:, np.newaxis] - light_vectors
+        reflect_dot_eye = np.einsum('ij,ij->i', reflect_vectors, eye_vectors)
+        reflecting = lit & (reflect_dot_eye > 0)
+        factor = np.where(reflecting, np.maximum(reflect_dot_eye, 0) ** table[:, SHININESS], 0)
+        specular = (factor * table[:, SPECULAR])[:, np.newaxis] * intensity
+
+        return ambient + diffuse + specular
+
+    def color_at_many(self, light: Light, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        """
+        World.color_at_many over the arrays: one intersection pass, one normal pass, one shadow pass
+        and one lighting pass for all rays, whatever objects and materials they hit.
+        """
+        colors = np.zeros((len(origins), 3))
+        (hit_t, hit_index) = self.intersect_many(origins, directions)
+        rays = np.flatnonzero(hit_index >= 0)
+        if len(rays) == 0:
+            return colors
+        indices = hit_index[rays]
+        points = origins[rays] + directions[rays] * hit_t[rays][:, np.newaxis]
+        eye_vectors = -directions[rays]
+        normal_vectors = self.normal_at_many(points, indices)
+        inside = np.einsum('ij,ij->i', normal_vectors, eye_vectors) < 0
+        normal_vectors[inside] = -normal_vectors[inside]
+
+        in_shadow = self.is_shadowed_many(light, points + normal_vectors * EPSILON)
+        colors[rays] = self.lighting_many(light, points, eye_vectors, normal_vectors, indices, in_shadow)
+        return colors
+
+    def is_shadowed_many(self, light: Light, points: np.ndarray) -> np.ndarray:
+        vectors = np.array([light.position.x, light.position.y, light.position.z]) - points
+        distances = np.linalg.norm(vectors, axis=1)
+        return self.occluded_many(points, vectors / distances[:, np.newaxis], distances)
+
+    def _intersect_groups(self, origins: np.ndarray, directions: np.ndarray):
+        """
+        Intersect a batch of rays with each group of objects of the same kind at once.
+        Each coefficient of the sphere quadratics is a product of a per-ray matrix and a per-sphere one,
+        so no (rays, objects, 3) arrays are needed.
+        :return: generator of (indices, t_near, t_far), where t_near and t_far are (rays, objects in group)
+                 arrays, inf for misses
+        """
+        count = len(origins)
+        if len(self._sphere_indices) or len(self._transformed_indices):
+            direction_squares = np.einsum('ij,ij->i', directions, directions)[:, np.newaxis]
+
+        if len(self._sphere_indices):
+            # (o - c).(o - c) - r^2 and d.(o - c), expanded.
+            (centers, constants) = self._sphere_terms
+            b = 2 * (np.einsum('ij,ij->i', directions, origins)[:, np.newaxis] - directions @ centers)
+            c = np.einsum('ij,ij->i', origins, origins)[:, np.newaxis] - 2 * (origins @ centers) + constants
+            yield (self._sphere_indices,) + _solve(direction_squares, b, c)
+
+        if len(self._transformed_indices):
+            # With M and t the inverse's upper-left block and translation, the object space ray is
+            # (M o + t, M d), so a = d'Qd, b = 2 (d'Qo + d'p) and c = o'Qo + 2 o'p + t.t - 1,
+            # where Q = M'M and p = M't are computed once per sphere.
+            (quadratic, linear, constants) = self._transformed_terms
+            outer_dd = (directions[:, :, np.newaxis] * directions[:, np.newaxis, :]).reshape(count, 9)
+            outer_do = (directions[:, :, np.newaxis] * origins[:, np.newaxis, :]).reshape(count, 9)
+            outer_oo = (origins[:, :, np.newaxis] * origins[:, np.newaxis, :]).reshape(count, 9)
+            yield (self._transformed_indices,) + _solve(outer_dd @ quadratic,
+                                                        2 * (outer_do @ quadratic + directions @ linear),
+                                                        outer_oo @ quadratic + 2 * (origins @ linear) + constants)
+
+        if len(self._plane_indices):
+            rows = self._plane_rows
+            origins_y = origins @ rows[:3] + rows[3]
+            directions_y = directions @ rows[:3]
+            parallel = np.abs(directions_y) < EPSILON
+            t = -origins_y / np.where(parallel, 1, directions_y)
+            t[parallel] = np.inf
+            yield self._plane_indices, t, t
+
+        if len(self._shape_indices):
+            results = [self.objects[index].intersect_many(origins, directions) for index in self._shape_indices]
+            yield (self._shape_indices,
+                   np.column_stack([t_near for (t_near, _, _) in results]),
+                   np.column_stack([t_far for (_, t_far, _) in results]))
+
+
+def _solve(a, b, c):
+    """
+    Solve the quadratics a t^2 + b t + c = 0 elementwise.
+    :return: (t_near, t_far), inf where there is no real root
+    """
+    discriminant = b ** 2 - 4 * a * c
+    hit = discriminant >= 0
+    root = np.sqrt(np.where(hit, discriminant, 0))
+    t_near = np.where(hit, (-b - root) / (2 * a), np.inf)
+    t_far = np.where(hit, (-b + root) / (2 * a), np.inf)
+    return t_near, t_far
@@ -0,0 +1,92 @@
+import numpy as np
+
+from src.ray_tracer_challenge.intersection import Computations
+
+
+class GBuffer:
+    """
+    The result of tracing the primary rays of a render, kept per pixel as arrays: what
+    Intersection.prepare_computations produces for each pixel's hit. World.shade_gbuffer shades it
+    with the current materials and light, so that these can be changed without tracing the primary rays again.
+    Pixels are in row-major order, so pixel (x, y) is at index y * width + x.
+    """
+
+    def __init__(self, width, height, objects):
+        """
+        :param objects: the objects of the world being rendered; object_ids index into these
+        """
+        self._width = width
+        self._height = height
+        self._objects = tuple(objects)
+        self._indices = {id(obj): i for (i, obj) in enumerate(self._objects)}
+        count = width * height
+        # -1 where the pixel's ray hits nothing.
+        self.object_ids = np.full(count, -1, dtype=np.int64)
+        self.t = np.full(count, np.inf)
+        self.points = np.zeros((count, 3))
+        self.eye_vectors = np.zeros((count, 3))
+        self.normal_vectors = np.zeros((count, 3))
+        self._rows_by_object = None
+        self._shadows = None
+
+    def __repr__(self):
+        return f"GBuffer(width:{self.width}, height:{self.height}, hits:{int((self.object_ids >= 0).sum())})"
+
+    def __len__(self):
+        return self._width * self._height
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def objects(self) -> tuple:
+        return self._objects
+
+    def record(self, index: int, computations: Computations):
+        """
+        Store the computations for a pixel's hit.
+        :param index: the pixel's index, y * width + x
+        """
+        (point, eye, normal) = (computations.point, computations.eye_vector, computations.normal_vector)
+        self.object_ids[index] = self._indices[id(computations.object)]
+        self.t[index] = computations.t
+        self.points[index] = (point.x, point.y, point.z)
+        self.eye_vectors[index] = (eye.x, eye.y, eye.z)
+        self.normal_vectors[index] = (normal.x, normal.y, normal.z)
+        self._rows_by_object = None
+        self._shadows = None
+
+    def rows_by_object(self) -> dict:
+        """
+        The pixels that hit each object, sorted once and then reused by every shading pass.
+        :return: dict from object id to an array of pixel indices
+        """
+        if self._rows_by_object is None:
+            order = np.argsort(self.object_ids, kind='stable')
+            ids = self.object_ids[order]
+            (unique, starts) = np.unique(ids, return_index=True)
+            ends = np.append(starts[1:], len(ids))
+            self._rows_by_object = {int(i): order[start:end]
+                                    for (i, start, end) in zip(unique.tolist(), starts, ends) if i >= 0}
+        return self._rows_by_object
+
+    def shadows(self, light_position: tuple):
+        """
+        :return: the in-shadow mask stored for the light position by store_shadows, or None
+        """
+        if self._shadows is None or self._shadows[0] != light_position:
+            return None
+        return self._shadows[1]
+
+    def store_shadows(self, light_position: tuple, in_shadow: np.ndarray):
+        """
+        Keep the in-shadow mask of the pixels for a light position, so that shading again with the light in the
+        same place, e.g. after changing a material, does not need to trace the shadow rays again.
+        Only the last light position is kept.
+        """
+        self._shadows = (light_position, in_shadow)
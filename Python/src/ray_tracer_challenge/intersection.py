@@ -1,5 +1,6 @@
 from typing import Optional
 
+from src.ray_tracer_challenge.constants import EPSILON
 from src.ray_tracer_challenge.ray import Ray
 
 
@@ -11,6 +12,9 @@ class Computations:
         self._eye_vector = eye_vector
         self._normal_vector = normal_vector
         self._inside = inside
+        # Nudged slightly off the surface, so that rays leaving the point (such as shadow
+        # rays) don't hit the surface they start on.
+        self._over_point = point + normal_vector * EPSILON
 
     @property
     def t(self):
@@ -36,11 +40,23 @@ class Computations:
     def inside(self):
         return self._inside
 
+    @property
+    def over_point(self):
+        return self._over_point
+
 
 class Intersection:
-    def __init__(self, t, object):
+    def __init__(self, t, object, u=None, v=None, face=None):
+        """
+        :param u: barycentric coordinate of the hit on a triangle, used to interpolate normals
+        :param v: barycentric coordinate of the hit on a triangle
+        :param face: index of the triangle hit within a mesh
+        """
         self._t = t
         self._object = object
+        self._u = u
+        self._v = v
+        self._face = face
 
     @property
     def t(self):
@@ -50,10 +66,22 @@ class Intersection:
     def object(self):
         return self._object
 
+    @property
+    def u(self):
+        return self._u
+
+    @property
+    def v(self):
+        return self._v
+
+    @property
+    def face(self):
+        return self._face
+
     def prepare_computations(self, r: Ray) -> Computations:
         point = r.position(self.t)
         eye_vector = -r.direction
-        normal_vector = self.object.normal_at(point)
+        normal_vector = self.object.normal_at(point, self)
         inside = False
         if normal_vector.dot(eye_vector) < 0:
             inside = True
@@ -1,4 +1,7 @@
 import math
+import weakref
+
+import numpy as np
 
 from src.ray_tracer_challenge.color import Color, Colors
 from src.ray_tracer_challenge.constants import EPSILON
@@ -7,12 +10,39 @@ from src.ray_tracer_challenge.tuple import Light, Point, Vector
 
 class Material:
     def __init__(self):
+        # The shapes using this material, told about every change to it. Weak, like Shape's worlds.
+        self._shapes = weakref.WeakSet()
         self.color = Color(1, 1, 1)
         self.ambient = 0.1
         self.diffuse = 0.9
         self.specular = 0.9
         self.shininess = 200.0
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith('_'):
+            for shape in list(self._shapes):
+                shape.material_changed()
+
+    def __getstate__(self):
+        # Shapes register themselves again when they are unpickled.
+        state = self.__dict__.copy()
+        del state['_shapes']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shapes = weakref.WeakSet()
+
+    def add_shape(self, shape):
+        """
+        Tell the shape about later changes to this material, by calling shape.material_changed().
+        """
+        self._shapes.add(shape)
+
+    def remove_shape(self, shape):
+        self._shapes.discard(shape)
+
     def __eq__(self, other):
         return self.color == other.color and \
             math.isclose(self.ambient, other.ambient, abs_tol=EPSILON) and \
@@ -20,13 +50,18 @@ class Material:
             math.isclose(self.specular, other.specular, abs_tol=EPSILON) and \
             math.isclose(self.shininess, other.shininess, abs_tol=EPSILON)
 
-    def lighting(self, light: Light, position: Point, eye_vector: Vector, normal_vector: Vector) -> Color:
+    def lighting(self, light: Light, position: Point, eye_vector: Vector, normal_vector: Vector,
+                 in_shadow=False) -> Color:
         # Combine the surface color with the light's color/intensity.
         effective_color = self.color * light.intensity
+        ambient = effective_color * self.ambient
+
+        # A point in shadow only receives the ambient contribution.
+        if in_shadow:
+            return ambient
 
         # Compute the diffuse contribution.
         light_vector = (light.position - position).normalize()
-        ambient = effective_color * self.ambient
 
         light_dot_normal = normal_vector.dot(light_vector)
 
@@ -49,3 +84,41 @@ class Material:
                 specular = light.intensity * self.specular * factor
 
         return ambient + diffuse + specular
+
+    def lighting_many(self, light: Light, positions: np.ndarray, eye_vectors: np.ndarray,
+                      normal_vectors: np.ndarray, in_shadow: np.ndarray = None) -> np.ndarray:
+        """
+        Vectorized version of lighting for a batch of points on this material.
+        :param light: Light
+        :param positions: (N, 3) array of points being lit
+        :param eye_vectors: (N, 3) array of eye vectors
+        :param normal_vectors: (N, 3) array of normal vectors
+        :param in_shadow: optional (N,) boolean array of the points that are in shadow
+        :return: (N, 3) array of red, green and blue values
+        """
+        intensity = np.array([light.intensity.red, light.intensity.green, light.intensity.blue])
+        color = np.array([self.color.red, self.color.green, self.color.blue])
+        effective_color = color * intensity
+
+        light_vectors = np.array([light.position.x, light.position.y, light.position.z]) - positions
+        light_vectors /= np.linalg.norm(light_vectors, axis=1)[:, np.newaxis]
+        ambient = effective_color * self.ambient
+
+        light_dot_normal = np.einsum('ij,ij->i', normal_vectors, light_vectors)
+        lit = light_dot_normal >= 0
+        if in_shadow is not None:
+            lit &= ~in_shadow
+
+        # The diffuse and specular contributions only apply where the light is in front of
+        # the surface and not blocked; elsewhere they are black.
+        diffuse = np.where(lit, light_dot_normal, 0)[:, np.newaxis] * (effective_color * self.diffuse)
+
+        # reflect_dot_eye is the cosine of the angle between the reflection vector and the
+        # eye vector. A negative number means the light reflects away from the eye.
+        reflect_vectors = normal_vectors * (2 * light_dot_normal)[:, np.newaxis] - light_vectors
+        reflect_dot_eye = np.einsum('ij,ij->i', reflect_vectors, eye_vectors)
+        reflecting = lit & (reflect_dot_eye > 0)
+        factor = np.where(reflecting, np.maximum(reflect_dot_eye, 0) ** self.shininess, 0)
+        specular = factor[:, np.newaxis] * (intensity * self.specular)
+
+        return ambient + diffuse + specular
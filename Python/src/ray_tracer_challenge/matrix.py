@@ -1,43 +1,76 @@
 import math
+
+import numpy as np
+
 from src.ray_tracer_challenge.constants import EPSILON as EPSILON
 from src.ray_tracer_challenge.tuple import Tuple
 
 
 class Matrix:
+    """
+    A rows x columns matrix, stored as a flat row-major list.
+    """
+
+    __slots__ = ('_rows', '_columns', '_data')
+
     def __init__(self, *args):
         if len(args) == 1 and type(args[0]) is list:
             # Validate that all rows have the same number of columns
             if max(len(row) for row in args[0]) != min(len(row) for row in args[0]):
                 raise ValueError("All rows must have the same number of columns")
-            self._matrix = args[0]
+            self._rows = len(args[0])
+            self._columns = len(args[0][0])
+            self._data = [value for row in args[0] for value in row]
         elif len(args) == 2 and type(args[0]) is int and type(args[1]) is int:
-            self._matrix = [[0 for _ in range(args[1])] for _ in range(args[0])]
+            self._rows = args[0]
+            self._columns = args[1]
+            self._data = [0] * (args[0] * args[1])
+        else:
+            raise TypeError("Matrix takes a list of rows, or a number of rows and columns")
+
+    @classmethod
+    def _from_flat(cls, rows, columns, data):
+        """
+        Wrap an existing row-major list without copying or validating it.
+        """
+        result = cls.__new__(cls)
+        result._rows = rows
+        result._columns = columns
+        result._data = data
+        return result
 
     @property
     def rows(self):
-        return len(self._matrix)
+        return self._rows
 
     @property
     def columns(self):
-        return len(self._matrix[0])
+        return self._columns
 
     def __getitem__(self, key):
-        row = self._matrix[key[0]]
-        return row[key[1]]
+        return self._data[key[0] * self._columns + key[1]]
 
     def __setitem__(self, key, value):
-        row = self._matrix[key[0]]
-        row[key[1]] = value
+        self._data[key[0] * self._columns + key[1]] = value
 
     def __eq__(self, other):
         if self.rows != other.rows or self.columns != other.columns:
             return False
-        for row in range(self.rows):
-            for column in range(self.columns):
-                if not math.isclose(self[row, column], other[row, column], abs_tol=EPSILON):
-                    return False
+        for value, other_value in zip(self._data, other._data):
+            if not math.isclose(value, other_value, abs_tol=EPSILON):
+                return False
         return True
 
+    def __repr__(self):
+        rows = [self._data[row * self._columns:(row + 1) * self._columns] for row in range(self._rows)]
+        return f"Matrix({rows})"
+
+    def to_numpy(self) -> np.ndarray:
+        """
+        Return a copy of this matrix as a rows x columns float array, for the vectorized paths.
+        """
+        return np.array(self._data, dtype=np.float64).reshape(self._rows, self._columns)
+
     def __mul__(self, other):
         if type(other) is Matrix:
             return self._multiply_matrix(other)
@@ -49,35 +82,79 @@ class Matrix:
     def _multiply_matrix(self, other):
         if self.columns != other.rows:
             raise ValueError("Matrices must have the same number of rows and columns")
-        result = Matrix(self.rows, other.columns)
-        for row in range(self.rows):
-            for column in range(other.columns):
-                for i in range(self.columns):
-                    result[row, column] += self[row, i] * other[i, column]
-        return result
+        if self._rows == 4 and self._columns == 4 and other._columns == 4:
+            return self._multiply_matrix_4x4(other)
+        a = self._data
+        b = other._data
+        (n, m, p) = (self._rows, self._columns, other._columns)
+        data = [0] * (n * p)
+        for row in range(n):
+            for column in range(p):
+                value = 0
+                for i in range(m):
+                    value += a[row * m + i] * b[i * p + column]
+                data[row * p + column] = value
+        return Matrix._from_flat(n, p, data)
+
+    def _multiply_matrix_4x4(self, other):
+        (a00, a01, a02, a03,
+         a10, a11, a12, a13,
+         a20, a21, a22, a23,
+         a30, a31, a32, a33) = self._data
+        (b00, b01, b02, b03,
+         b10, b11, b12, b13,
+         b20, b21, b22, b23,
+         b30, b31, b32, b33) = other._data
+        return Matrix._from_flat(4, 4, [
+            a00 * b00 + a01 * b10 + a02 * b20 + a03 * b30,
+            a00 * b01 + a01 * b11 + a02 * b21 + a03 * b31,
+            a00 * b02 + a01 * b12 + a02 * b22 + a03 * b32,
+            a00 * b03 + a01 * b13 + a02 * b23 + a03 * b33,
+            a10 * b00 + a11 * b10 + a12 * b20 + a13 * b30,
+            a10 * b01 + a11 * b11 + a12 * b21 + a13 * b31,
+            a10 * b02 + a11 * b12 + a12 * b22 + a13 * b32,
+            a10 * b03 + a11 * b13 + a12 * b23 + a13 * b33,
+            a20 * b00 + a21 * b10 + a22 * b20 + a23 * b30,
+            a20 * b01 + a21 * b11 + a22 * b21 + a23 * b31,
+            a20 * b02 + a21 * b12 + a22 * b22 + a23 * b32,
+            a20 * b03 + a21 * b13 + a22 * b23 + a23 * b33,
+            a30 * b00 + a31 * b10 + a32 * b20 + a33 * b30,
+            a30 * b01 + a31 * b11 + a32 * b21 + a33 * b31,
+            a30 * b02 + a31 * b12 + a32 * b22 + a33 * b32,
+            a30 * b03 + a31 * b13 + a32 * b23 + a33 * b33])
 
     def _multiply_tuple(self, tuple_multiplier):
-        if self.columns != 4:
-            raise ValueError("Matrix must have 4 columns")
-        result = Tuple(0, 0, 0, 0)
-        for row in range(self.rows):
-            for column in range(self.columns):
-                result[row] += self[row, column] * tuple_multiplier[column]
+        if self._columns != 4 or self._rows != 4:
+            raise ValueError("Matrix must have 4 rows and 4 columns")
+        (a00, a01, a02, a03,
+         a10, a11, a12, a13,
+         a20, a21, a22, a23,
+         a30, a31, a32, a33) = self._data
+        (x, y, z, w) = (tuple_multiplier.x, tuple_multiplier.y, tuple_multiplier.z, tuple_multiplier.w)
+        result_x = a00 * x + a01 * y + a02 * z + a03 * w
+        result_y = a10 * x + a11 * y + a12 * z + a13 * w
+        result_z = a20 * x + a21 * y + a22 * z + a23 * w
+        result_w = a30 * x + a31 * y + a32 * z + a33 * w
+        if result_w == 0 or result_w == 1:
+            return Tuple(result_x, result_y, result_z, result_w)
+
+        # Only affine transforms keep w at 0 or 1. Others (such as the inverse-transpose
+        # applied to normals, whose w is discarded) still need their w carried through.
+        result = Tuple(result_x, result_y, result_z, 0)
+        result[3] = result_w
         return result
 
     def transpose(self):
-        result = Matrix(self.columns, self.rows)
-        for row in range(self.rows):
-            for column in range(self.columns):
-                result[column, row] = self[row, column]
-        return result
+        data = self._data
+        (rows, columns) = (self._rows, self._columns)
+        return Matrix._from_flat(columns, rows,
+                                 [data[row * columns + column] for column in range(columns) for row in range(rows)])
 
     @classmethod
     def identity(cls, size=4):
-        result = Matrix(size, size)
-        for i in range(size):
-            result[i, i] = 1
-        return result
+        data = [0] * (size * size)
+        data[::size + 1] = [1] * size
+        return Matrix._from_flat(size, size, data)
 
     @classmethod
     def translation(cls, x, y, z):
@@ -134,21 +211,16 @@ class Matrix:
         return result
 
     def submatrix(self, skip_row, skip_column):
-        result = Matrix(self.rows - 1, self.columns - 1)
-        target_row = 0
-        for row in range(self.rows):
-            if row == skip_row:
-                continue
-            target_column = 0
-            for column in range(self.columns):
-                if column == skip_column:
-                    continue
-                result[target_row, target_column] = self[row, column]
-                target_column += 1
-            target_row += 1
-        return result
+        data = self._data
+        columns = self._columns
+        return Matrix._from_flat(self._rows - 1, columns - 1,
+                                 [data[row * columns + column]
+                                  for row in range(self._rows) if row != skip_row
+                                  for column in range(columns) if column != skip_column])
 
     def determinant(self):
+        if self.rows == 4 and self.columns == 4:
+            return self._determinant_4x4()
         if self.rows > 2:
             determinant = 0
             for column in range(self.columns):
@@ -173,10 +245,13 @@ class Matrix:
         return self.determinant() != 0
 
     def inverse(self):
-        inverse = Matrix(self.rows, self.columns)
+        if self.rows == 4 and self.columns == 4:
+            return self._inverse_4x4()
+
         determinant = self.determinant()
-        # if determinant != 0:
-        #     raise ValueError("Matrix is not invertible")
+        if determinant == 0:
+            raise ValueError("Matrix is not invertible")
+        inverse = Matrix(self.rows, self.columns)
         for row in range(self.rows):
             for column in range(self.columns):
                 cofactor = self.cofactor(row, column)
@@ -184,6 +259,68 @@ class Matrix:
 
         return inverse
 
+    def _sub_determinants_4x4(self):
+        """
+        The twelve 2x2 sub-determinants of a 4x4 matrix that the closed-form
+        determinant and inverse are built from: six from the top two rows (s)
+        and six from the bottom two rows (c).
+        """
+        (a00, a01, a02, a03,
+         a10, a11, a12, a13,
+         a20, a21, a22, a23,
+         a30, a31, a32, a33) = self._data
+
+        s = (a00 * a11 - a10 * a01,
+             a00 * a12 - a10 * a02,
+             a00 * a13 - a10 * a03,
+             a01 * a12 - a11 * a02,
+             a01 * a13 - a11 * a03,
+             a02 * a13 - a12 * a03)
+        c = (a20 * a31 - a30 * a21,
+             a20 * a32 - a30 * a22,
+             a20 * a33 - a30 * a23,
+             a21 * a32 - a31 * a22,
+             a21 * a33 - a31 * a23,
+             a22 * a33 - a32 * a23)
+        return s, c
+
+    def _determinant_4x4(self):
+        (s0, s1, s2, s3, s4, s5), (c0, c1, c2, c3, c4, c5) = self._sub_determinants_4x4()
+        return s0 * c5 - s1 * c4 + s2 * c3 + s3 * c2 - s4 * c1 + s5 * c0
+
+    def _inverse_4x4(self):
+        (a00, a01, a02, a03,
+         a10, a11, a12, a13,
+         a20, a21, a22, a23,
+         a30, a31, a32, a33) = self._data
+        (s0, s1, s2, s3, s4, s5), (c0, c1, c2, c3, c4, c5) = self._sub_determinants_4x4()
+
+        determinant = s0 * c5 - s1 * c4 + s2 * c3 + s3 * c2 - s4 * c1 + s5 * c0
+        if determinant == 0:
+            raise ValueError("Matrix is not invertible")
+
+        # Each entry is a cofactor (already transposed) divided by the determinant.
+        # Dividing, rather than multiplying by 1 / determinant, keeps the results
+        # identical to the general cofactor method.
+        d = determinant
+        return Matrix._from_flat(4, 4, [
+            (a11 * c5 - a12 * c4 + a13 * c3) / d,
+            (-a01 * c5 + a02 * c4 - a03 * c3) / d,
+            (a31 * s5 - a32 * s4 + a33 * s3) / d,
+            (-a21 * s5 + a22 * s4 - a23 * s3) / d,
+            (-a10 * c5 + a12 * c2 - a13 * c1) / d,
+            (a00 * c5 - a02 * c2 + a03 * c1) / d,
+            (-a30 * s5 + a32 * s2 - a33 * s1) / d,
+            (a20 * s5 - a22 * s2 + a23 * s1) / d,
+            (a10 * c4 - a11 * c2 + a13 * c0) / d,
+            (-a00 * c4 + a01 * c2 - a03 * c0) / d,
+            (a30 * s4 - a31 * s2 + a33 * s0) / d,
+            (-a20 * s4 + a21 * s2 - a23 * s0) / d,
+            (-a10 * c3 + a11 * c1 - a12 * c0) / d,
+            (a00 * c3 - a01 * c1 + a02 * c0) / d,
+            (-a30 * s3 + a31 * s1 - a32 * s0) / d,
+            (a20 * s3 - a21 * s1 + a22 * s0) / d])
+
     @classmethod
     def view_transform(cls, from_point, to_point, up_vector):
         forward = (to_point - from_point).normalize()
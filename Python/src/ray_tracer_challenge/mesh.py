@@ -0,0 +1,146 @@
+from array import array
+from typing import Optional
+
+import numpy as np
+
+from src.ray_tracer_challenge.bounds import BoundingBox
+from src.ray_tracer_challenge.bvh import BVH
+from src.ray_tracer_challenge.constants import EPSILON
+from src.ray_tracer_challenge.intersection import Intersection, Intersections
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.shape import Shape
+from src.ray_tracer_challenge.triangle import barycentric, moller_trumbore
+from src.ray_tracer_challenge.tuple import Point
+from src.ray_tracer_challenge.tuple import Vector
+
+
+class Mesh(Shape):
+    """
+    A triangle mesh, stored as vertex and index arrays rather than one Triangle object per face.
+    The mesh builds its own BVH over its faces, so a World sees it as a single bounded shape.
+    Intersections with a mesh record the index of the face that was hit.
+    """
+
+    def __init__(self, vertices, faces, normals=None, face_normals=None):
+        """
+        :param vertices: (V, 3) array of vertex positions, or a flat sequence of x, y, z values
+        :param faces: (F, 3) array of vertex indices per triangle, or a flat sequence of them
+        :param normals: optional (N, 3) array of vertex normals, or a flat sequence of x, y, z values
+        :param face_normals: optional (F, 3) array of indices into normals per triangle, -1 where a face has none.
+                             Faces with a normal at each vertex are smooth shaded; the others are flat.
+        """
+        super().__init__()
+        self._vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        self._faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        if len(self._faces) and (self._faces.min() < 0 or self._faces.max() >= len(self._vertices)):
+            raise ValueError("Face refers to a vertex that does not exist")
+
+        corners = self._vertices[self._faces]
+        (p1, e1, e2) = (corners[:, 0], corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        face_normals_flat = np.cross(e2, e1)
+        lengths = np.linalg.norm(face_normals_flat, axis=1)
+        face_normals_flat /= np.where(lengths > 0, lengths, 1)[:, np.newaxis]
+
+        # Per face data as flat arrays of Python floats: p1, e1 and e2, and the flat normal.
+        # Slicing these is much cheaper than indexing NumPy arrays one element at a time.
+        self._triangles = array('d', np.hstack((p1, e1, e2)).ravel().tolist())
+        self._flat_normals = array('d', face_normals_flat.ravel().tolist())
+
+        self._smooth = None
+        if normals is not None and face_normals is not None:
+            normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+            face_normals = np.asarray(face_normals, dtype=np.int64).reshape(-1, 3)
+            if face_normals.max(initial=-1) >= len(normals):
+                raise ValueError("Face refers to a normal that does not exist")
+            smooth = (face_normals >= 0).all(axis=1)
+            if smooth.any():
+                vertex_normals = np.where(smooth[:, np.newaxis, np.newaxis], normals[face_normals], 0)
+                self._smooth = array('b', smooth.tolist())
+                self._smooth_normals = array('d', vertex_normals.ravel().tolist())
+
+        # Triangles are cheap to test, so larger leaves pay off, and they make building the BVH much faster.
+        self._bvh = BVH(range(len(self._faces)), corners.min(axis=1), corners.max(axis=1), BVH.MAX_LEAF_SIZE)
+
+    def __repr__(self):
+        return f"Mesh(faces:{self.face_count}, transform:{self.transform})"
+
+    @property
+    def vertices(self) -> np.ndarray:
+        return self._vertices
+
+    @property
+    def faces(self) -> np.ndarray:
+        return self._faces
+
+    @property
+    def face_count(self) -> int:
+        return len(self._faces)
+
+    def local_bounds(self) -> BoundingBox:
+        if self.face_count == 0:
+            return BoundingBox()
+        return self._bvh.bounds
+
+    def local_intersect(self, ray: Ray) -> Intersections:
+        result = Intersections()
+        for face in self._bvh.intersect(ray):
+            hit = self._face_hit(face, ray, -float('inf'), float('inf'))
+            if hit is not None:
+                result.intersections.append(hit)
+        result.sort(key=lambda x: x.t)
+        return result
+
+    def local_nearest_hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[Intersection]:
+        return self._bvh.closest_hit(ray, t_min, t_max, self._face_hit)
+
+    def local_intersect_many(self, origins: np.ndarray, directions: np.ndarray):
+        """
+        A mesh need not be closed, so instead of entry and exit points this returns the nearest
+        hit with t >= 0 as both t_near and t_far, which is what World's batch methods look for.
+        """
+        t = np.full(len(origins), np.inf)
+        for (i, (origin, direction)) in enumerate(zip(origins.tolist(), directions.tolist())):
+            hit = self.local_nearest_hit(Ray(Point(*origin), Vector(*direction)), 0, np.inf)
+            if hit is not None:
+                t[i] = hit.t
+        return t, t, np.isfinite(t)
+
+    def local_normal_at(self, p: Point, hit: Intersection = None) -> Vector:
+        if hit is not None and hit.face is not None:
+            (face, u, v) = (hit.face, hit.u, hit.v)
+        else:
+            (face, u, v) = self._face_at(p)
+        if self._smooth is not None and self._smooth[face]:
+            (n1x, n1y, n1z, n2x, n2y, n2z, n3x, n3y, n3z) = self._smooth_normals[9 * face:9 * face + 9]
+            w = 1 - u - v
+            return Vector(n2x * u + n3x * v + n1x * w, n2y * u + n3y * v + n1y * w, n2z * u + n3z * v + n1z * w)
+        (nx, ny, nz) = self._flat_normals[3 * face:3 * face + 3]
+        return Vector(nx, ny, nz)
+
+    def _face_hit(self, face: int, ray: Ray, t_min: float, t_max: float) -> Optional[Intersection]:
+        (origin, direction) = (ray.origin, ray.direction)
+        hit = moller_trumbore(origin.x, origin.y, origin.z, direction.x, direction.y, direction.z,
+                              *self._triangles[9 * face:9 * face + 9])
+        if hit is None or not t_min <= hit[0] < t_max:
+            return None
+        return Intersection(hit[0], self, hit[1], hit[2], face)
+
+    def _face_at(self, p: Point):
+        """
+        Find the face a point lies on, for callers that only have the point and not the intersection.
+        :return: (face, u, v)
+        """
+        best = None
+        for face in self._bvh.items_at(p.x, p.y, p.z, EPSILON):
+            (p1x, p1y, p1z, e1x, e1y, e1z, e2x, e2y, e2z) = self._triangles[9 * face:9 * face + 9]
+            (nx, ny, nz) = self._flat_normals[3 * face:3 * face + 3]
+            distance = abs((p.x - p1x) * nx + (p.y - p1y) * ny + (p.z - p1z) * nz)
+            (u, v) = barycentric(p.x, p.y, p.z, p1x, p1y, p1z, e1x, e1y, e1z, e2x, e2y, e2z)
+            # How far outside the triangle the point is, in barycentric terms.
+            outside = max(0.0, -u, -v, u + v - 1)
+            key = (outside > EPSILON, distance + outside)
+            if best is None or key < best[0]:
+                best = (key, face, u, v)
+        if best is None:
+            raise ValueError(f"Point {p} is not on the mesh")
+        return best[1:]
@@ -0,0 +1,95 @@
+from array import array
+from typing import Iterable
+
+from src.ray_tracer_challenge.mesh import Mesh
+
+
+class ObjFile:
+    """
+    Geometry read from a Wavefront OBJ file, in compact flat arrays rather than Point objects.
+    Polygons are split into triangles, fanning out from their first vertex.
+    """
+
+    def __init__(self):
+        # x, y, z of each vertex and each normal, one after the other.
+        self.vertices = array('d')
+        self.normals = array('d')
+        # Three 0-based vertex indices per triangle, and the matching normal indices (-1 where there is none).
+        self.faces = array('l')
+        self.face_normals = array('l')
+        self.ignored_lines = 0
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices) // 3
+
+    @property
+    def normal_count(self) -> int:
+        return len(self.normals) // 3
+
+    @property
+    def face_count(self) -> int:
+        return len(self.faces) // 3
+
+    def to_mesh(self) -> Mesh:
+        if len(self.normals) and max(self.face_normals, default=-1) >= 0:
+            return Mesh(self.vertices, self.faces, self.normals, self.face_normals)
+        return Mesh(self.vertices, self.faces)
+
+
+def parse_obj(lines: Iterable[str]) -> ObjFile:
+    """
+    Parse OBJ data one line at a time, so that a file object can be passed in without reading it all.
+    Supports vertices (v), vertex normals (vn) and faces (f), with 1-based or negative (relative) indices.
+    Other statements, such as texture coordinates, groups and materials, are counted in ignored_lines.
+    """
+    result = ObjFile()
+    (vertices, normals, faces, face_normals) = (result.vertices, result.normals, result.faces, result.face_normals)
+    for (number, line) in enumerate(lines, start=1):
+        tokens = line.split()
+        if not tokens or tokens[0].startswith('#'):
+            continue
+        keyword = tokens[0]
+        try:
+            if keyword == 'v':
+                vertices.extend((float(tokens[1]), float(tokens[2]), float(tokens[3])))
+            elif keyword == 'vn':
+                normals.extend((float(tokens[1]), float(tokens[2]), float(tokens[3])))
+            elif keyword == 'f':
+                if len(tokens) < 4:
+                    raise ValueError("a face needs at least three vertices")
+                corners = [_parse_corner(token, len(vertices) // 3, len(normals) // 3) for token in tokens[1:]]
+                for i in range(1, len(corners) - 1):
+                    faces.extend((corners[0][0], corners[i][0], corners[i + 1][0]))
+                    face_normals.extend((corners[0][1], corners[i][1], corners[i + 1][1]))
+            else:
+                result.ignored_lines += 1
+        except (ValueError, IndexError) as e:
+            raise ValueError(f"Invalid OBJ data on line {number}: {line.strip()!r} ({e})") from None
+    return result
+
+
+def load_obj(path: str) -> ObjFile:
+    with open(path) as f:
+        return parse_obj(f)
+
+
+def _parse_corner(token: str, vertex_count: int, normal_count: int):
+    """
+    Parse one corner of a face, written as v, v/vt, v//vn or v/vt/vn.
+    :return: (vertex index, normal index or -1), both 0-based
+    """
+    parts = token.split('/')
+    vertex = _resolve_index(int(parts[0]), vertex_count)
+    normal = -1
+    if len(parts) > 2 and parts[2]:
+        normal = _resolve_index(int(parts[2]), normal_count)
+    return vertex, normal
+
+
+def _resolve_index(index: int, count: int) -> int:
+    # Negative indices count back from the most recent element.
+    resolved = index - 1 if index > 0 else count + index
+    if index == 0 or not 0 <= resolved < count:
+        raise ValueError(f"index {index} out of range")
+    return resolved
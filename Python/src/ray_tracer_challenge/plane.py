@@ -0,0 +1,82 @@
+from typing import Optional
+
+import numpy as np
+
+from src.ray_tracer_challenge.bounds import BoundingBox
+from src.ray_tracer_challenge.constants import EPSILON
+from src.ray_tracer_challenge.intersection import Intersection, Intersections
+from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.shape import Shape
+from src.ray_tracer_challenge.tuple import Point
+from src.ray_tracer_challenge.tuple import Vector
+
+
+class Plane(Shape):
+    """
+    An infinite plane. In object space it is the xz plane, with its normal pointing along +y.
+    """
+
+    @Shape.transform.setter
+    def transform(self, value: Matrix):
+        # The normal is the same everywhere on a plane, so it is computed once per transform too,
+        # along with the row of the inverse that gives object space y.
+        Shape.transform.fset(self, value)
+        self._inverse_row_y = tuple(self._inverse_array[1].tolist())
+        world_normal = self._inverse_transpose * Vector(0, 1, 0)
+        self._normal = Vector(world_normal.x, world_normal.y, world_normal.z).normalize()
+
+    def local_bounds(self) -> BoundingBox:
+        return BoundingBox.infinite()
+
+    def local_intersect(self, ray: Ray) -> Intersections:
+        hit = self.local_nearest_hit(ray, -np.inf, np.inf)
+        return Intersections() if hit is None else Intersections(hit)
+
+    def nearest_hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[Intersection]:
+        # Only object space y matters, so skip transforming the whole ray.
+        (m0, m1, m2, m3) = self._inverse_row_y
+        (origin, direction) = (ray.origin, ray.direction)
+        direction_y = m0 * direction.x + m1 * direction.y + m2 * direction.z
+        if abs(direction_y) < EPSILON:
+            return None
+        t = -(m0 * origin.x + m1 * origin.y + m2 * origin.z + m3) / direction_y
+        if not t_min <= t < t_max:
+            return None
+        return Intersection(t, self)
+
+    def local_nearest_hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[Intersection]:
+        direction_y = ray.direction.y
+        # A ray parallel to the plane (or within it) never crosses it.
+        if abs(direction_y) < EPSILON:
+            return None
+        t = -ray.origin.y / direction_y
+        if not t_min <= t < t_max:
+            return None
+        return Intersection(t, self)
+
+    def intersect_many(self, origins: np.ndarray, directions: np.ndarray):
+        row = self._inverse_array[1]
+        return self._intersect_y(origins @ row[:3] + row[3], directions @ row[:3])
+
+    def local_intersect_many(self, origins: np.ndarray, directions: np.ndarray):
+        return self._intersect_y(origins[:, 1], directions[:, 1])
+
+    def _intersect_y(self, origins_y: np.ndarray, directions_y: np.ndarray):
+        # A plane has a single intersection, so t_near and t_far are the same.
+        hit_mask = np.abs(directions_y) >= EPSILON
+        t = np.full(len(origins_y), np.inf)
+        t[hit_mask] = -origins_y[hit_mask] / directions_y[hit_mask]
+        return t, t, hit_mask
+
+    def normal_at(self, p: Point, hit: Intersection = None) -> Vector:
+        return self._normal
+
+    def normal_at_many(self, points: np.ndarray) -> np.ndarray:
+        return np.tile([self._normal.x, self._normal.y, self._normal.z], (len(points), 1))
+
+    def local_normal_at(self, p: Point, hit: Intersection = None) -> Vector:
+        return Vector(0, 1, 0)
+
+    def local_normal_at_many(self, points: np.ndarray) -> np.ndarray:
+        return np.tile([0.0, 1.0, 0.0], (len(points), 1))
@@ -3,6 +3,8 @@ from src.ray_tracer_challenge.tuple import Point, Vector
 
 
 class Ray:
+    __slots__ = ('_origin', '_direction')
+
     def __init__(self, origin: Point, direction: Vector):
         self._origin = origin
         self._direction = direction
@@ -0,0 +1,77 @@
+class RenderStats:
+    """
+    Counters and per phase timers for a render, collected only when asked for, e.g. with
+    Camera.render(world, stats=True). Stats collected by separate workers are combined with merge.
+    Phase times are summed over all workers, so with several workers they can add up to more than wall_time.
+    """
+
+    PHASES = ('ray_generation', 'intersection', 'shadows', 'shading')
+
+    def __init__(self):
+        self.primary_rays = 0
+        self.shadow_rays = 0
+        self.hits = 0
+        self.lighting_calls = 0
+        # Type name of the object tested -> number of ray-object intersection tests.
+        self.intersection_tests = {}
+        self.phase_times = dict.fromkeys(self.PHASES, 0.0)
+        self.wall_time = 0.0
+        # Per pixel costs, a CostBuffer, if the render was asked for them.
+        self.cost = None
+
+    def __repr__(self):
+        return (f"RenderStats(primary_rays:{self.primary_rays}, shadow_rays:{self.shadow_rays}, hits:{self.hits}, "
+                f"lighting_calls:{self.lighting_calls}, intersection_tests:{self.intersection_tests}, "
+                f"wall_time:{self.wall_time:.3f})")
+
+    def __eq__(self, other):
+        if not isinstance(other, RenderStats):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    @property
+    def total_intersection_tests(self) -> int:
+        return sum(self.intersection_tests.values())
+
+    def count_tests(self, type_name: str, count: int = 1):
+        self.intersection_tests[type_name] = self.intersection_tests.get(type_name, 0) + count
+
+    def add_time(self, phase: str, seconds: float):
+        self.phase_times[phase] += seconds
+
+    def counted(self, hit_fn, type_name):
+        """
+        Wrap a hit function, as passed to BVH.closest_hit, so that every call counts as an intersection test.
+        :param hit_fn: hit_fn(item, ray, t_min, t_max)
+        :param type_name: type_name(item) is the name the test is counted under
+        """
+        tests = self.intersection_tests
+
+        def counted_hit_fn(item, ray, t_min, t_max):
+            name = type_name(item)
+            tests[name] = tests.get(name, 0) + 1
+            return hit_fn(item, ray, t_min, t_max)
+
+        return counted_hit_fn
+
+    def merge(self, other: 'RenderStats') -> 'RenderStats':
+        """
+        Add another set of stats to this one, e.g. those of a worker, keeping the longer wall time.
+        Per pixel costs are not merged, since they need the position of the other stats' pixels.
+        :return: self
+        """
+        self.primary_rays += other.primary_rays
+        self.shadow_rays += other.shadow_rays
+        self.hits += other.hits
+        self.lighting_calls += other.lighting_calls
+        for (name, count) in other.intersection_tests.items():
+            self.count_tests(name, count)
+        for (phase, seconds) in other.phase_times.items():
+            self.phase_times[phase] = self.phase_times.get(phase, 0.0) + seconds
+        self.wall_time = max(self.wall_time, other.wall_time)
+        return self
+
+    def as_dict(self) -> dict:
+        return {"primary_rays": self.primary_rays, "shadow_rays": self.shadow_rays, "hits": self.hits,
+                "lighting_calls": self.lighting_calls, "intersection_tests": dict(self.intersection_tests),
+                "phase_times": dict(self.phase_times), "wall_time": self.wall_time}
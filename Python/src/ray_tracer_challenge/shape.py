@@ -0,0 +1,187 @@
+import weakref
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+
+from src.ray_tracer_challenge.bounds import BoundingBox
+from src.ray_tracer_challenge.intersection import Intersection, Intersections
+from src.ray_tracer_challenge.material import Material
+from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.tuple import Point
+from src.ray_tracer_challenge.tuple import Vector
+
+
+class Shape(ABC):
+    """
+    Base class of all primitives. A shape owns its transform and material, and converts rays and points
+    between world space and object space. Subclasses only implement the object space (local_*) methods.
+    """
+
+    def __init__(self):
+        # The worlds this shape is in, told about every change of transform or material so that they can
+        # rebuild whatever they derived from them. Weak, so that a shape does not keep a world alive.
+        self._worlds = weakref.WeakSet()
+        self.transform = Matrix.identity()
+        self.material = Material()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(transform:{self.transform})"
+
+    def __getstate__(self):
+        # Worlds register themselves again when they are unpickled.
+        state = self.__dict__.copy()
+        del state['_worlds']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._worlds = weakref.WeakSet()
+        self._material.add_shape(self)
+
+    def add_world(self, world):
+        """
+        Tell the world about later changes to this shape, by calling world.object_changed(shape).
+        """
+        self._worlds.add(world)
+
+    def remove_world(self, world):
+        self._worlds.discard(world)
+
+    def material_changed(self):
+        """
+        Called by the material when one of its attributes changes.
+        """
+        self._changed(transform=False)
+
+    def _changed(self, transform=True):
+        for world in list(self._worlds):
+            world.object_changed(self, transform)
+
+    @property
+    def material(self) -> Material:
+        return self._material
+
+    @material.setter
+    def material(self, value: Material):
+        previous = getattr(self, '_material', None)
+        if previous is not None:
+            previous.remove_shape(self)
+        self._material = value
+        value.add_shape(self)
+        self._changed(transform=False)
+
+    @property
+    def transform(self) -> Matrix:
+        return self._transform
+
+    @transform.setter
+    def transform(self, value: Matrix):
+        # The inverse and its transpose are needed for every ray and every normal,
+        # so compute them once here rather than on each call.
+        # Note: mutating the matrix in place bypasses this; assign a new one instead.
+        self._transform = value
+        self._inverse_transform = value.inverse()
+        self._inverse_transpose = self._inverse_transform.transpose()
+        self._inverse_array = self._inverse_transform.to_numpy()
+        self._changed()
+
+    @property
+    def inverse_transform(self) -> Matrix:
+        return self._inverse_transform
+
+    @property
+    def inverse_transpose(self) -> Matrix:
+        return self._inverse_transpose
+
+    def bounds(self) -> BoundingBox:
+        """
+        The axis-aligned bounding box of the shape in world space.
+        """
+        return self.local_bounds().transform(self._transform)
+
+    def intersect(self, ray: Ray) -> Intersections:
+        return self.local_intersect(ray.transform(self._inverse_transform))
+
+    def nearest_hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[Intersection]:
+        """
+        Find the nearest intersection with t_min <= t < t_max, without building Intersections.
+        The object space ray is not normalized, so t is the same in both spaces.
+        :return: Intersection, or None if there is none in the range
+        """
+        return self.local_nearest_hit(ray.transform(self._inverse_transform), t_min, t_max)
+
+    def intersect_many(self, origins: np.ndarray, directions: np.ndarray):
+        """
+        Intersect a batch of rays with the shape.
+        :param origins: (N, 3) array of ray origins in world space
+        :param directions: (N, 3) array of ray directions in world space
+        :return: (t_near, t_far, hit_mask): the near and far t values of each ray,
+                 and a boolean mask of the rays that hit. Misses have t = inf.
+        """
+        # Transform origins and directions into object space with one matrix product.
+        inverse = self._inverse_array
+        obj_origins, obj_directions = np.stack((origins, directions)) @ inverse[:3, :3].T
+        obj_origins += inverse[:3, 3]
+        return self.local_intersect_many(obj_origins, obj_directions)
+
+    def normal_at(self, p: Point, hit: Intersection = None) -> Vector:
+        """
+        :param hit: the intersection the point came from, for shapes whose normal depends on more than the point
+        """
+        obj_normal = self.local_normal_at(self._inverse_transform * p, hit)
+        world_normal = self._inverse_transpose * obj_normal
+        return Vector.normalize(Vector(world_normal.x, world_normal.y, world_normal.z))
+
+    def normal_at_many(self, points: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of normal_at.
+        :param points: (N, 3) array of points on the shape in world space
+        :return: (N, 3) array of normalized world space normals
+        """
+        inverse = self._inverse_array
+        obj_normals = self.local_normal_at_many(points @ inverse[:3, :3].T + inverse[:3, 3])
+        # Multiplying by the inverse-transpose's upper-left block is multiplying by
+        # the transpose of that block, which is the inverse's own block.
+        world_normals = obj_normals @ inverse[:3, :3]
+        return world_normals / np.linalg.norm(world_normals, axis=1)[:, np.newaxis]
+
+    @abstractmethod
+    def local_bounds(self) -> BoundingBox:
+        pass
+
+    @abstractmethod
+    def local_intersect(self, ray: Ray) -> Intersections:
+        pass
+
+    def local_nearest_hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[Intersection]:
+        """
+        Subclasses can override this to avoid building Intersections.
+        """
+        in_range = [i for i in self.local_intersect(ray).intersections if t_min <= i.t < t_max]
+        return min(in_range, key=lambda x: x.t, default=None)
+
+    def local_intersect_many(self, origins: np.ndarray, directions: np.ndarray):
+        """
+        Intersect a batch of object space rays. Subclasses can override this with a vectorized version.
+        """
+        t_near = np.full(len(origins), np.inf)
+        t_far = np.full(len(origins), np.inf)
+        for (i, (origin, direction)) in enumerate(zip(origins.tolist(), directions.tolist())):
+            xs = self.local_intersect(Ray(Point(*origin), Vector(*direction)))
+            if xs.count:
+                t_near[i] = min(x.t for x in xs.intersections)
+                t_far[i] = max(x.t for x in xs.intersections)
+        return t_near, t_far, np.isfinite(t_near)
+
+    @abstractmethod
+    def local_normal_at(self, p: Point, hit: Intersection = None) -> Vector:
+        pass
+
+    def local_normal_at_many(self, points: np.ndarray) -> np.ndarray:
+        """
+        Object space normals of a batch of object space points. Subclasses can override this with a vectorized version.
+        """
+        normals = [self.local_normal_at(Point(*point)) for point in points.tolist()]
+        return np.array([(n.x, n.y, n.z) for n in normals], dtype=np.float64).reshape(-1, 3)
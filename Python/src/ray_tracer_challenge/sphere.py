@@ -1,24 +1,134 @@
+from typing import Optional
+
+import numpy as np
+
+from src.ray_tracer_challenge.bounds import BoundingBox
 from src.ray_tracer_challenge.intersection import Intersection, Intersections
-from src.ray_tracer_challenge.material import Material
 from src.ray_tracer_challenge.matrix import Matrix
 from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.shape import Shape
 from src.ray_tracer_challenge.tuple import Point
 from src.ray_tracer_challenge.tuple import Vector
 
 
-class Sphere:
-    def __init__(self):
-        self.transform = Matrix.identity()
-        self.material = Material()
+class Sphere(Shape):
+    """
+    A unit sphere, centered on the origin in object space.
+    When the transform only translates and scales uniformly, which is the common case, the sphere is
+    intersected in world space against its center and radius, without transforming rays or normals.
+    """
+
+    def __init__(self, center: Point = None, radius: float = None):
+        """
+        :param center: optional world space center, instead of a translation in the transform
+        :param radius: optional radius, instead of a uniform scaling in the transform
+        """
+        super().__init__()
+        if center is not None or radius is not None:
+            center = Point(0, 0, 0) if center is None else center
+            radius = 1 if radius is None else radius
+            if radius <= 0:
+                raise ValueError("Radius must be positive")
+            self.transform = Matrix.translation(center.x, center.y, center.z) * Matrix.scaling(radius, radius, radius)
+
+    @Shape.transform.setter
+    def transform(self, value: Matrix):
+        Shape.transform.fset(self, value)
+        # Detect translation and uniform scaling: a multiple of the identity in the upper left,
+        # and nothing in the bottom row but the 1. Anything else takes the general path.
+        (m00, m01, m02, m03, m10, m11, m12, m13, m20, m21, m22, m23, m30, m31, m32, m33) = (
+            value[i, j] for i in range(4) for j in range(4))
+        if (m01 == m02 == m10 == m12 == m20 == m21 == m30 == m31 == m32 == 0 and m33 == 1 and
+                m00 == m11 == m22 != 0):
+            self._center = (m03, m13, m23)
+            self._radius = abs(m00)
+        else:
+            self._center = None
+            self._radius = None
 
-    def __repr__(self):
-        return f"Sphere(transform:{self.transform})"
+    @property
+    def center(self) -> Optional[Point]:
+        """
+        The world space center, or None if the transform is more than a translation and uniform scaling.
+        """
+        return None if self._center is None else Point(*self._center)
+
+    @property
+    def radius(self) -> Optional[float]:
+        """
+        The world space radius, or None if the transform is more than a translation and uniform scaling.
+        """
+        return self._radius
+
+    def bounds(self) -> BoundingBox:
+        if self._radius is None:
+            return super().bounds()
+        ((cx, cy, cz), r) = (self._center, self._radius)
+        return BoundingBox(Point(cx - r, cy - r, cz - r), Point(cx + r, cy + r, cz + r))
 
     def intersect(self, ray: Ray) -> Intersections:
-        obj_coord_ray = ray.transform(self.transform.inverse())
-        sphere_to_ray = obj_coord_ray.origin - Point(0, 0, 0)
-        a = obj_coord_ray.direction.dot(obj_coord_ray.direction)
-        b = 2 * obj_coord_ray.direction.dot(sphere_to_ray)
+        if self._radius is None:
+            return super().intersect(ray)
+        roots = self._roots(ray)
+        if roots is None:
+            return Intersections()
+        return Intersections(Intersection(roots[0], self), Intersection(roots[1], self))
+
+    def nearest_hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[Intersection]:
+        if self._radius is None:
+            return super().nearest_hit(ray, t_min, t_max)
+        roots = self._roots(ray)
+        if roots is None:
+            return None
+        if t_min <= roots[0] < t_max:
+            return Intersection(roots[0], self)
+        if t_min <= roots[1] < t_max:
+            return Intersection(roots[1], self)
+        return None
+
+    def intersect_many(self, origins: np.ndarray, directions: np.ndarray):
+        if self._radius is None:
+            return super().intersect_many(origins, directions)
+        # The world space quadratic is the object space one multiplied by radius squared, so it has the same roots.
+        return self._intersect_many(origins - self._center, directions, self._radius * self._radius)
+
+    def normal_at(self, p: Point, hit: Intersection = None) -> Vector:
+        if self._radius is None:
+            return super().normal_at(p, hit)
+        (cx, cy, cz) = self._center
+        return Vector(p.x - cx, p.y - cy, p.z - cz).normalize()
+
+    def normal_at_many(self, points: np.ndarray) -> np.ndarray:
+        if self._radius is None:
+            return super().normal_at_many(points)
+        normals = points - self._center
+        return normals / np.linalg.norm(normals, axis=1)[:, np.newaxis]
+
+    def _roots(self, ray: Ray):
+        """
+        Solve for the world space t values where the ray crosses the sphere, given its center and radius.
+        :return: (t1, t2) with t1 <= t2, or None if the ray misses
+        """
+        ((cx, cy, cz), r) = (self._center, self._radius)
+        (ox, oy, oz) = (ray.origin.x - cx, ray.origin.y - cy, ray.origin.z - cz)
+        (dx, dy, dz) = (ray.direction.x, ray.direction.y, ray.direction.z)
+        a = dx * dx + dy * dy + dz * dz
+        b = 2 * (dx * ox + dy * oy + dz * oz)
+        c = (ox * ox + oy * oy + oz * oz) - r * r
+
+        discriminant = b ** 2 - 4 * a * c
+        if discriminant < 0:
+            return None
+        root = discriminant ** 0.5
+        return (-b - root) / (2 * a), (-b + root) / (2 * a)
+
+    def local_bounds(self) -> BoundingBox:
+        return BoundingBox(Point(-1, -1, -1), Point(1, 1, 1))
+
+    def local_intersect(self, ray: Ray) -> Intersections:
+        sphere_to_ray = ray.origin - Point(0, 0, 0)
+        a = ray.direction.dot(ray.direction)
+        b = 2 * ray.direction.dot(sphere_to_ray)
         c = sphere_to_ray.dot(sphere_to_ray) - 1
 
         discriminant = b ** 2 - 4 * a * c
@@ -30,8 +140,47 @@ class Sphere:
 
         return Intersections(Intersection(t1, self), Intersection(t2, self))
 
-    def normal_at(self, p: Point) -> Vector:
-        obj_point = self.transform.inverse() * p
-        obj_normal = Vector.normalize(obj_point - Point(0, 0, 0))
-        world_normal = self.transform.inverse().transpose() * obj_normal
-        return Vector.normalize(Vector(world_normal.x, world_normal.y, world_normal.z))
+    def local_nearest_hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[Intersection]:
+        (ox, oy, oz) = (ray.origin.x, ray.origin.y, ray.origin.z)
+        (dx, dy, dz) = (ray.direction.x, ray.direction.y, ray.direction.z)
+        a = dx * dx + dy * dy + dz * dz
+        b = 2 * (dx * ox + dy * oy + dz * oz)
+        c = (ox * ox + oy * oy + oz * oz) - 1
+
+        discriminant = b ** 2 - 4 * a * c
+        if discriminant < 0:
+            return None
+
+        t1 = (-b - discriminant ** 0.5) / (2 * a)
+        if t_min <= t1 < t_max:
+            return Intersection(t1, self)
+        t2 = (-b + discriminant ** 0.5) / (2 * a)
+        if t_min <= t2 < t_max:
+            return Intersection(t2, self)
+        return None
+
+    def local_intersect_many(self, origins: np.ndarray, directions: np.ndarray):
+        return self._intersect_many(origins, directions, 1)
+
+    @staticmethod
+    def _intersect_many(origins: np.ndarray, directions: np.ndarray, radius_squared: float):
+        """
+        Intersect rays with a sphere of the given radius, centered on the origin.
+        """
+        a = np.einsum('ij,ij->i', directions, directions)
+        b = 2 * np.einsum('ij,ij->i', directions, origins)
+        c = np.einsum('ij,ij->i', origins, origins) - radius_squared
+
+        discriminant = b ** 2 - 4 * a * c
+        hit_mask = discriminant >= 0
+        root = np.sqrt(np.where(hit_mask, discriminant, 0))
+
+        t_near = np.where(hit_mask, (-b - root) / (2 * a), np.inf)
+        t_far = np.where(hit_mask, (-b + root) / (2 * a), np.inf)
+        return t_near, t_far, hit_mask
+
+    def local_normal_at(self, p: Point, hit: Intersection = None) -> Vector:
+        return p - Point(0, 0, 0)
+
+    def local_normal_at_many(self, points: np.ndarray) -> np.ndarray:
+        return points
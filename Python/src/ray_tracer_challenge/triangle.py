@@ -0,0 +1,153 @@
+from typing import Optional
+
+from src.ray_tracer_challenge.bounds import BoundingBox
+from src.ray_tracer_challenge.intersection import Intersection, Intersections
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.shape import Shape
+from src.ray_tracer_challenge.tuple import Point
+from src.ray_tracer_challenge.tuple import Vector
+
+# Determinants below this mean the ray is parallel to the triangle. It is much smaller than EPSILON,
+# because the determinant scales with the triangle's area, and scanned meshes have tiny triangles.
+PARALLEL_EPSILON = 1E-12
+
+
+class Triangle(Shape):
+    """
+    A flat triangle. The edges and the normal are computed once, on construction.
+    """
+
+    def __init__(self, p1: Point, p2: Point, p3: Point):
+        super().__init__()
+        self._p1 = p1
+        self._p2 = p2
+        self._p3 = p3
+        self._e1 = p2 - p1
+        self._e2 = p3 - p1
+        self._normal = self._e2.cross(self._e1).normalize()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(p1:{self._p1}, p2:{self._p2}, p3:{self._p3}, transform:{self.transform})"
+
+    @property
+    def p1(self) -> Point:
+        return self._p1
+
+    @property
+    def p2(self) -> Point:
+        return self._p2
+
+    @property
+    def p3(self) -> Point:
+        return self._p3
+
+    @property
+    def e1(self) -> Vector:
+        return self._e1
+
+    @property
+    def e2(self) -> Vector:
+        return self._e2
+
+    @property
+    def normal(self) -> Vector:
+        return self._normal
+
+    def local_bounds(self) -> BoundingBox:
+        box = BoundingBox()
+        for p in (self._p1, self._p2, self._p3):
+            box.add_point(p)
+        return box
+
+    def local_intersect(self, ray: Ray) -> Intersections:
+        hit = self.local_nearest_hit(ray, -float('inf'), float('inf'))
+        return Intersections() if hit is None else Intersections(hit)
+
+    def local_nearest_hit(self, ray: Ray, t_min: float, t_max: float) -> Optional[Intersection]:
+        (p1, e1, e2) = (self._p1, self._e1, self._e2)
+        hit = moller_trumbore(ray.origin.x, ray.origin.y, ray.origin.z,
+                              ray.direction.x, ray.direction.y, ray.direction.z,
+                              p1.x, p1.y, p1.z, e1.x, e1.y, e1.z, e2.x, e2.y, e2.z)
+        if hit is None or not t_min <= hit[0] < t_max:
+            return None
+        return Intersection(hit[0], self, hit[1], hit[2])
+
+    def local_normal_at(self, p: Point, hit: Intersection = None) -> Vector:
+        return self._normal
+
+
+class SmoothTriangle(Triangle):
+    """
+    A triangle with a normal at each vertex. The normal at a point is interpolated
+    from them with the barycentric coordinates of the hit.
+    """
+
+    def __init__(self, p1: Point, p2: Point, p3: Point, n1: Vector, n2: Vector, n3: Vector):
+        super().__init__(p1, p2, p3)
+        self._n1 = n1
+        self._n2 = n2
+        self._n3 = n3
+
+    @property
+    def n1(self) -> Vector:
+        return self._n1
+
+    @property
+    def n2(self) -> Vector:
+        return self._n2
+
+    @property
+    def n3(self) -> Vector:
+        return self._n3
+
+    def local_normal_at(self, p: Point, hit: Intersection = None) -> Vector:
+        if hit is not None and hit.u is not None:
+            (u, v) = (hit.u, hit.v)
+        else:
+            (u, v) = barycentric(p.x, p.y, p.z, self._p1.x, self._p1.y, self._p1.z,
+                                 self._e1.x, self._e1.y, self._e1.z, self._e2.x, self._e2.y, self._e2.z)
+        return self._n2 * u + self._n3 * v + self._n1 * (1 - u - v)
+
+
+def moller_trumbore(ox, oy, oz, dx, dy, dz, p1x, p1y, p1z, e1x, e1y, e1z, e2x, e2y, e2z):
+    """
+    Intersect a ray with the triangle p1, p1 + e1, p1 + e2, using the Möller–Trumbore algorithm.
+    Takes plain floats, so that meshes can call it without building Points and Vectors.
+    :return: (t, u, v), or None if the ray misses
+    """
+    # dir_cross_e2 = direction x e2
+    (cx, cy, cz) = (dy * e2z - dz * e2y, dz * e2x - dx * e2z, dx * e2y - dy * e2x)
+    determinant = e1x * cx + e1y * cy + e1z * cz
+    if abs(determinant) < PARALLEL_EPSILON:
+        return None
+
+    f = 1.0 / determinant
+    (sx, sy, sz) = (ox - p1x, oy - p1y, oz - p1z)
+    u = f * (sx * cx + sy * cy + sz * cz)
+    if u < 0 or u > 1:
+        return None
+
+    # origin_cross_e1 = (origin - p1) x e1
+    (qx, qy, qz) = (sy * e1z - sz * e1y, sz * e1x - sx * e1z, sx * e1y - sy * e1x)
+    v = f * (dx * qx + dy * qy + dz * qz)
+    if v < 0 or u + v > 1:
+        return None
+
+    return f * (e2x * qx + e2y * qy + e2z * qz), u, v
+
+
+def barycentric(px, py, pz, p1x, p1y, p1z, e1x, e1y, e1z, e2x, e2y, e2z):
+    """
+    The barycentric coordinates (u, v) of a point in the plane of the triangle p1, p1 + e1, p1 + e2,
+    such that the point is p1 + u * e1 + v * e2.
+    """
+    (sx, sy, sz) = (px - p1x, py - p1y, pz - p1z)
+    d11 = e1x * e1x + e1y * e1y + e1z * e1z
+    d12 = e1x * e2x + e1y * e2y + e1z * e2z
+    d22 = e2x * e2x + e2y * e2y + e2z * e2z
+    ds1 = sx * e1x + sy * e1y + sz * e1z
+    ds2 = sx * e2x + sy * e2y + sz * e2z
+    denominator = d11 * d22 - d12 * d12
+    if denominator == 0:
+        return 0.0, 0.0
+    return (d22 * ds1 - d12 * ds2) / denominator, (d11 * ds2 - d12 * ds1) / denominator
@@ -6,43 +6,37 @@ from src.ray_tracer_challenge.constants import EPSILON as EPSILON
 import math
 
 
+def _new(cls, x, y, z, w):
+    """
+    Create a tuple of the given class directly, skipping the w dispatch in Tuple.__new__.
+    Used on the hot paths where the resulting class is already known.
+    """
+    result = object.__new__(cls)
+    result.x = x
+    result.y = y
+    result.z = z
+    result.w = w
+    return result
+
+
 class Tuple:
     """
     Tuple class with x, y, z, and w coordinates.
+    Constructing a Tuple returns a Vector when w is 0 and a Point when w is 1.
     """
 
-    def __init__(self, x, y, z, w):
-        (self._x, self._y, self._z, self._w) = (x, y, z, w)
+    __slots__ = ('x', 'y', 'z', 'w')
+
+    def __new__(cls, x, y, z, w):
         if w == 0:
-            self.__class__ = Vector
+            return _new(Vector, x, y, z, w)
         elif w == 1:
-            self.__class__ = Point
+            return _new(Point, x, y, z, w)
         else:
             raise TypeError("w must be 0 or 1")
 
-    @property
-    def x(self):
-        """
-        Get the x coordinate.
-        :return:
-        """
-        return self._x
-
-    @property
-    def y(self):
-        """
-        Get the y coordinate.
-        :return:
-        """
-        return self._y
-
-    @property
-    def z(self):
-        return self._z
-
-    @property
-    def w(self):
-        return self._w
+    def __reduce__(self):
+        return Tuple, (self.x, self.y, self.z, self.w)
 
     def __getitem__(self, item):
         if item == 0:
@@ -58,13 +52,13 @@ class Tuple:
 
     def __setitem__(self, key, value):
         if key == 0:
-            self._x = value
+            self.x = value
         elif key == 1:
-            self._y = value
+            self.y = value
         elif key == 2:
-            self._z = value
+            self.z = value
         elif key == 3:
-            self._w = value
+            self.w = value
         else:
             raise IndexError("Tuple index out of range")
 
@@ -75,34 +69,35 @@ class Tuple:
                 math.isclose(self.w, other.w, abs_tol=EPSILON))
 
     def __add__(self, other):
-        if self.w and other.w:
+        w = self.w + other.w
+        if w == 0:
+            cls = Vector
+        elif w == 1:
+            cls = Point
+        else:
             raise TypeError("Can't add two points")
 
-        return Tuple(self.x + other.x,
-                     self.y + other.y,
-                     self.z + other.z,
-                     self.w + other.w)
+        return _new(cls, self.x + other.x, self.y + other.y, self.z + other.z, w)
 
     def __sub__(self, other):
-        return Tuple(self.x - other.x,
-                     self.y - other.y,
-                     self.z - other.z,
-                     self.w - other.w)
+        w = self.w - other.w
+        if w == 0:
+            cls = Vector
+        elif w == 1:
+            cls = Point
+        else:
+            raise TypeError("w must be 0 or 1")
+
+        return _new(cls, self.x - other.x, self.y - other.y, self.z - other.z, w)
 
     def __neg__(self):
-        return Tuple(-self.x, -self.y, -self.z, self.w)
+        return _new(self.__class__, -self.x, -self.y, -self.z, self.w)
 
     def __mul__(self, scalar):
-        return Tuple(self.x * scalar,
-                     self.y * scalar,
-                     self.z * scalar,
-                     self.w)
+        return _new(self.__class__, self.x * scalar, self.y * scalar, self.z * scalar, self.w)
 
     def __truediv__(self, scalar):
-        return Tuple(self.x / scalar,
-                     self.y / scalar,
-                     self.z / scalar,
-                     self.w)
+        return _new(self.__class__, self.x / scalar, self.y / scalar, self.z / scalar, self.w)
 
     def __repr__(self):
         return f"{self.__class__.__name__}(x:{self.x}, y:{self.y}, z:{self.z}, w:{self.w})"
@@ -113,8 +108,10 @@ class Point(Tuple):
     Convenience class for a point in 3D space.
     """
 
-    def __init__(self, x, y, z):
-        super().__init__(x, y, z, 1.0)
+    __slots__ = ()
+
+    def __new__(cls, x, y, z):
+        return _new(Point, x, y, z, 1.0)
 
 
 class Vector(Tuple):
@@ -122,22 +119,26 @@ class Vector(Tuple):
     Convenience class for a vector in 3D space.
     """
 
-    def __init__(self, x, y, z):
-        super().__init__(x, y, z, 0.0)
+    __slots__ = ()
+
+    def __new__(cls, x, y, z):
+        return _new(Vector, x, y, z, 0.0)
 
     def magnitude(self) -> float:
         """
         Return the magnitude of the vector.
         :return: float
         """
-        return math.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
 
     def normalize(self):
         """
         Return a normalized vector.
         :return: Vector
         """
-        return self / self.magnitude()
+        (x, y, z) = (self.x, self.y, self.z)
+        magnitude = math.sqrt(x * x + y * y + z * z)
+        return _new(Vector, x / magnitude, y / magnitude, z / magnitude, self.w)
 
     def dot(self, other: 'Vector') -> float:
         """
@@ -153,12 +154,24 @@ class Vector(Tuple):
         :param other: Vector
         :return: Vector
         """
-        return Vector((self.y * other.z) - (self.z * other.y),
-                      (self.z * other.x) - (self.x * other.z),
-                      (self.x * other.y) - (self.y * other.x))
+        return _new(Vector,
+                    (self.y * other.z) - (self.z * other.y),
+                    (self.z * other.x) - (self.x * other.z),
+                    (self.x * other.y) - (self.y * other.x),
+                    0.0)
 
     def reflect(self, normal: 'Vector') -> 'Vector':
-        return self - normal * 2 * self.dot(normal)
+        """
+        Return this vector reflected around the normal.
+        :param normal: Vector
+        :return: Vector
+        """
+        scale = 2 * ((self.x * normal.x) + (self.y * normal.y) + (self.z * normal.z))
+        return _new(Vector,
+                    self.x - normal.x * scale,
+                    self.y - normal.y * scale,
+                    self.z - normal.z * scale,
+                    self.w - normal.w)
 
 
 class Light:
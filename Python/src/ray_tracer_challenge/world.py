@@ -1,30 +1,458 @@
+import time
+from typing import Optional
+
+import numpy as np
+
+from src.ray_tracer_challenge.bvh import BVH
+from src.ray_tracer_challenge.canvas import Canvas
 from src.ray_tracer_challenge.color import Color
+from src.ray_tracer_challenge.constants import EPSILON, INFINITY
+from src.ray_tracer_challenge.frozen_world import FrozenWorld
+from src.ray_tracer_challenge.gbuffer import GBuffer
 from src.ray_tracer_challenge.intersection import Computations, Intersection, Intersections
 from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.render_stats import RenderStats
+from src.ray_tracer_challenge.tuple import Point
+
+
+class ShadowCacheStats:
+    """
+    Counts how often the last occluder cache answered a shadow query.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.cache_hits = 0
+
+    def __repr__(self):
+        return f"ShadowCacheStats(queries:{self.queries}, cache_hits:{self.cache_hits})"
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cache_hits / self.queries if self.queries else 0.0
+
+    def reset(self):
+        self.queries = 0
+        self.cache_hits = 0
+
+    def merge(self, other: 'ShadowCacheStats') -> 'ShadowCacheStats':
+        """
+        Add another set of counts to this one, e.g. those of a render worker.
+        :return: self
+        """
+        self.queries += other.queries
+        self.cache_hits += other.cache_hits
+        return self
+
+
+class _ObjectList(list):
+    """
+    The list of objects in a World. Any change to the list marks the world's
+    acceleration structure as out of date, and the world follows changes to
+    the objects in it.
+    """
+
+    def __init__(self, iterable, world):
+        super().__init__(iterable)
+        self._world = world
+        for obj in self:
+            obj.add_world(world)
+
+    def append(self, obj):
+        super().append(obj)
+        obj.add_world(self._world)
+        self._world.invalidate()
+
+    def extend(self, objects):
+        objects = list(objects)
+        super().extend(objects)
+        for obj in objects:
+            obj.add_world(self._world)
+        self._world.invalidate()
+
+    def insert(self, index, obj):
+        super().insert(index, obj)
+        obj.add_world(self._world)
+        self._world.invalidate()
+
+    def remove(self, obj):
+        super().remove(obj)
+        self._forget([obj])
+        self._world.invalidate()
+
+    def pop(self, index=-1):
+        obj = super().pop(index)
+        self._forget([obj])
+        self._world.invalidate()
+        return obj
+
+    def clear(self):
+        objects = list(self)
+        super().clear()
+        self._forget(objects)
+        self._world.invalidate()
+
+    def __setitem__(self, key, value):
+        removed = self[key] if isinstance(key, slice) else [self[key]]
+        added = list(value) if isinstance(key, slice) else [value]
+        super().__setitem__(key, added if isinstance(key, slice) else value)
+        self._forget(removed)
+        for obj in added:
+            obj.add_world(self._world)
+        self._world.invalidate()
+
+    def __delitem__(self, key):
+        removed = self[key] if isinstance(key, slice) else [self[key]]
+        super().__delitem__(key)
+        self._forget(removed)
+        self._world.invalidate()
+
+    def __iadd__(self, objects):
+        self.extend(objects)
+        return self
+
+    def _forget(self, removed):
+        # An object can be in the list more than once; only stop following it once it is gone.
+        remaining = {id(obj) for obj in self}
+        for obj in removed:
+            if id(obj) not in remaining:
+                obj.remove_world(self._world)
 
 
 class World:
     def __init__(self):
         self.objects = []
         self.light = None
+        self._last_occluder = None
+        self.shadow_stats = ShadowCacheStats()
+
+    @property
+    def objects(self) -> list:
+        return self._objects
+
+    @objects.setter
+    def objects(self, value):
+        previous = getattr(self, '_objects', None)
+        self._objects = _ObjectList(value, self)
+        if previous is not None:
+            current = {id(obj) for obj in self._objects}
+            for obj in previous:
+                if id(obj) not in current:
+                    obj.remove_world(self)
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Discard the acceleration structure, so it is rebuilt on the next intersection, and unfreeze the world.
+        Adding, removing or replacing objects, and changing the transform or material of an object in the world,
+        do this automatically.
+        """
+        self._bvh = None
+        self._unbounded = None
+        self._frozen = None
+        self._last_occluder = None
+
+    def object_changed(self, obj, transform=True):
+        """
+        Called by the objects in the world when they change.
+        :param transform: whether the object's transform changed, rather than only its material
+        """
+        if transform:
+            self.invalidate()
+        else:
+            # The BVH only depends on the transforms, but the frozen world has a copy of the materials.
+            # While frozen, the last occluder is an index into the frozen world, so it goes too.
+            self._frozen = None
+            self._last_occluder = None
+
+    def freeze(self) -> FrozenWorld:
+        """
+        Compile the objects into a FrozenWorld, which closest_hit, is_shadowed and the batch methods then use
+        instead of the objects themselves. Changing the objects unfreezes the world again.
+        """
+        self._frozen = FrozenWorld(self._objects)
+        self._last_occluder = None
+        return self._frozen
+
+    @property
+    def frozen(self) -> Optional[FrozenWorld]:
+        return self._frozen
+
+    def __getstate__(self):
+        # The acceleration structure is cheaper to rebuild than to pickle.
+        state = self.__dict__.copy()
+        state['_objects'] = list(self._objects)
+        del state['_bvh']
+        del state['_unbounded']
+        # So is the frozen world; only whether it was frozen is kept.
+        state['_frozen'] = self._frozen is not None
+        # The occluder cache and its statistics belong to the process doing the rendering.
+        state['_last_occluder'] = None
+        state['shadow_stats'] = ShadowCacheStats()
+        return state
+
+    def __setstate__(self, state):
+        frozen = state.pop('_frozen')
+        self.__dict__.update(state)
+        self.objects = state['_objects']
+        if frozen:
+            self.freeze()
+
+    def _acceleration(self):
+        """
+        Build the BVH over the objects with finite bounds on first use. Objects with
+        infinite bounds are kept aside and tested against every ray.
+        """
+        if self._bvh is None:
+            bounded = []
+            boxes = []
+            unbounded = []
+            for obj in self._objects:
+                box = obj.bounds()
+                if box.is_bounded():
+                    bounded.append(obj)
+                    boxes.append(box)
+                else:
+                    unbounded.append(obj)
+            self._bvh = BVH.from_boxes(bounded, boxes)
+            self._unbounded = unbounded
+        return self._bvh, self._unbounded
 
     def intersect(self, ray: Ray) -> []:
+        (bvh, unbounded) = self._acceleration()
         intersections = Intersections()
-        for obj in self.objects:
+        for obj in bvh.intersect(ray):
+            intersections.extend(obj.intersect(ray))
+        for obj in unbounded:
             intersections.extend(obj.intersect(ray))
         intersections.sort(key=lambda x: x.t)
         return intersections
 
-    def shade_hit(self, computations: Computations) -> Color:
+    def closest_hit(self, ray: Ray, t_min=0, t_max=INFINITY, stats: RenderStats = None) -> Optional[Intersection]:
+        """
+        Find the nearest intersection with t_min <= t < t_max. Unlike intersect().hit(),
+        this keeps only the best hit so far and never builds or sorts a list of intersections.
+        :param stats: if given, every object tested is counted in it
+        :return: Intersection, or None if the ray hits nothing in the range
+        """
+        if self._frozen is not None:
+            return self._frozen.closest_hit(ray, t_min, t_max, stats)
+        (bvh, unbounded) = self._acceleration()
+        hit_fn = None if stats is None else stats.counted(_nearest_hit, _type_name)
+        hit = None
+        # Test the unbounded objects first, so their hits can prune the BVH traversal.
+        for obj in unbounded:
+            if stats is not None:
+                stats.count_tests(type(obj).__name__)
+            candidate = obj.nearest_hit(ray, t_min, t_max)
+            if candidate is not None:
+                hit = candidate
+                t_max = hit.t
+        candidate = bvh.closest_hit(ray, t_min, t_max, hit_fn)
+        return hit if candidate is None else candidate
+
+    def is_shadowed(self, point: Point, stats: RenderStats = None) -> bool:
+        """
+        Whether anything lies between the point and the light. Stops at the first blocker.
+        The object that blocked the previous query is tested first, since neighbouring
+        pixels are usually shadowed by the same object.
+        :param stats: if given, the shadow ray and every object tested are counted in it
+        """
+        vector = self.light.position - point
+        distance = vector.magnitude()
+        ray = Ray(point, vector / distance)
+        self.shadow_stats.queries += 1
+        if stats is not None:
+            stats.shadow_rays += 1
+
+        occluder = self._last_occluder
+        frozen = self._frozen
+        if frozen is not None:
+            if occluder is not None:
+                if stats is not None:
+                    stats.count_tests(frozen.type_name(occluder))
+                if frozen.nearest_hit(occluder, ray, 0, distance) is not None:
+                    self.shadow_stats.cache_hits += 1
+                    return True
+            # While frozen, the last occluder is remembered by its index.
+            occluder = frozen.any_hit(ray, 0, distance, stats)
+            if occluder is not None:
+                self._last_occluder = occluder
+                return True
+            return False
+
+        if occluder is not None:
+            if stats is not None:
+                stats.count_tests(type(occluder).__name__)
+            if occluder.nearest_hit(ray, 0, distance) is not None:
+                self.shadow_stats.cache_hits += 1
+                return True
+
+        (bvh, unbounded) = self._acceleration()
+        for obj in unbounded:
+            if obj is occluder:
+                continue
+            if stats is not None:
+                stats.count_tests(type(obj).__name__)
+            if obj.nearest_hit(ray, 0, distance) is not None:
+                self._last_occluder = obj
+                return True
+        occluder = bvh.any_hit(ray, 0, distance, None if stats is None else stats.counted(_nearest_hit, _type_name))
+        if occluder is not None:
+            self._last_occluder = occluder
+            return True
+        return False
+
+    def shade_hit(self, computations: Computations, stats: RenderStats = None) -> Color:
+        """
+        :param stats: if given, the time spent on the shadow ray and on lighting, and the lighting call,
+                      are recorded in it
+        """
+        if stats is not None:
+            start = time.perf_counter()
+            shadowed = self.is_shadowed(computations.over_point, stats)
+            stats.add_time('shadows', time.perf_counter() - start)
+            stats.lighting_calls += 1
+        else:
+            shadowed = self.is_shadowed(computations.over_point)
+        if self._frozen is not None:
+            return self._frozen.lighting(self.light, self._frozen.index(computations.object), computations.point,
+                                         computations.eye_vector, computations.normal_vector, shadowed)
         return computations.object.material.lighting(self.light,
                                                      computations.point,
                                                      computations.eye_vector,
-                                                     computations.normal_vector)
+                                                     computations.normal_vector,
+                                                     shadowed)
 
-    def color_at(self, ray: Ray) -> Color:
-        intersections = self.intersect(ray)
-        hit = intersections.hit()
+    def color_at(self, ray: Ray, stats: RenderStats = None) -> Color:
+        """
+        :param stats: if given, the hit, the objects tested and the time spent on each phase are recorded in it
+        """
+        if stats is None:
+            hit = self.closest_hit(ray)
+            if hit is None:
+                return Color(0, 0, 0)
+            comps = hit.prepare_computations(ray)
+            return self.shade_hit(comps)
+
+        start = time.perf_counter()
+        hit = self.closest_hit(ray, stats=stats)
+        intersected = time.perf_counter()
+        stats.add_time('intersection', intersected - start)
         if hit is None:
             return Color(0, 0, 0)
+        stats.hits += 1
         comps = hit.prepare_computations(ray)
-        return self.shade_hit(comps)
+        shadows = stats.phase_times['shadows']
+        color = self.shade_hit(comps, stats)
+        # Shading is everything after the intersection, apart from the shadow ray, which has its own phase.
+        stats.add_time('shading', time.perf_counter() - intersected - (stats.phase_times['shadows'] - shadows))
+        return color
+
+    def color_at_many(self, origins: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of color_at for a batch of rays.
+        :param origins: (N, 3) array of ray origins
+        :param directions: (N, 3) array of ray directions
+        :return: (N, 3) array of red, green and blue values; black where a ray hits nothing
+        """
+        count = len(origins)
+        colors = np.zeros((count, 3))
+        if count == 0 or not self.objects:
+            return colors
+        if self._frozen is not None:
+            return self._frozen.color_at_many(self.light, origins, directions)
+
+        # The hit is the lowest non-negative t over all objects, as in Intersections.hit.
+        hit_t = np.full(count, np.inf)
+        hit_object = np.full(count, -1)
+        for index, obj in enumerate(self.objects):
+            t_near, t_far, _ = obj.intersect_many(origins, directions)
+            t = np.where(t_near >= 0, t_near, np.where(t_far >= 0, t_far, np.inf))
+            closer = t < hit_t
+            hit_t[closer] = t[closer]
+            hit_object[closer] = index
+
+        # Prepare the computations per object, then shade all pixels that share a material at once.
+        points = origins + directions * np.where(hit_object >= 0, hit_t, 0)[:, np.newaxis]
+        eye_vectors = -directions
+        normal_vectors = np.zeros((count, 3))
+        by_material = {}
+        for index in np.unique(hit_object[hit_object >= 0]):
+            obj = self.objects[index]
+            rays = np.flatnonzero(hit_object == index)
+            normal_vectors[rays] = obj.normal_at_many(points[rays])
+            by_material.setdefault(id(obj.material), (obj.material, []))[1].append(rays)
+        inside = np.einsum('ij,ij->i', normal_vectors, eye_vectors) < 0
+        normal_vectors[inside] = -normal_vectors[inside]
+
+        hits = np.flatnonzero(hit_object >= 0)
+        in_shadow = np.zeros(count, dtype=bool)
+        in_shadow[hits] = self.is_shadowed_many(points[hits] + normal_vectors[hits] * EPSILON)
+
+        for material, groups in by_material.values():
+            rays = np.concatenate(groups)
+            colors[rays] = material.lighting_many(self.light, points[rays], eye_vectors[rays],
+                                                  normal_vectors[rays], in_shadow[rays])
+
+        return colors
+
+    def shade_gbuffer(self, gbuffer: GBuffer) -> Canvas:
+        """
+        Shade a G-buffer from Camera.render_gbuffer with the current light and the objects' current materials,
+        without tracing the primary rays again. The shadow rays are traced again, all at once with is_shadowed_many,
+        when the light has moved since the G-buffer was last shaded.
+        The G-buffer is only valid for the geometry it was recorded with; after moving, adding or removing objects,
+        record a new one.
+        """
+        colors = np.zeros((len(gbuffer), 3))
+        rows_by_object = gbuffer.rows_by_object()
+        if rows_by_object:
+            light_position = (self.light.position.x, self.light.position.y, self.light.position.z)
+            in_shadow = gbuffer.shadows(light_position)
+            if in_shadow is None:
+                hits = np.flatnonzero(gbuffer.object_ids >= 0)
+                in_shadow = np.zeros(len(gbuffer), dtype=bool)
+                in_shadow[hits] = self.is_shadowed_many(gbuffer.points[hits] +
+                                                        gbuffer.normal_vectors[hits] * EPSILON)
+                gbuffer.store_shadows(light_position, in_shadow)
+
+            # Shade all pixels that share a material at once.
+            by_material = {}
+            for (index, rows) in rows_by_object.items():
+                material = gbuffer.objects[index].material
+                by_material.setdefault(id(material), (material, []))[1].append(rows)
+            for (material, groups) in by_material.values():
+                rows = np.concatenate(groups)
+                colors[rows] = material.lighting_many(self.light, gbuffer.points[rows], gbuffer.eye_vectors[rows],
+                                                      gbuffer.normal_vectors[rows], in_shadow[rows])
+
+        canvas = Canvas(gbuffer.width, gbuffer.height)
+        canvas.write_rows(0, colors)
+        return canvas
+
+    def is_shadowed_many(self, points: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of is_shadowed.
+        :param points: (N, 3) array of points, already nudged off their surfaces
+        :return: (N,) boolean array, True where something lies between the point and the light
+        """
+        if self._frozen is not None:
+            return self._frozen.is_shadowed_many(self.light, points)
+        light_position = np.array([self.light.position.x, self.light.position.y, self.light.position.z])
+        vectors = light_position - points
+        distances = np.linalg.norm(vectors, axis=1)
+        directions = vectors / distances[:, np.newaxis]
+        shadowed = np.zeros(len(points), dtype=bool)
+        for obj in self.objects:
+            t_near, t_far, _ = obj.intersect_many(points, directions)
+            shadowed |= ((t_near >= 0) & (t_near < distances)) | ((t_far >= 0) & (t_far < distances))
+        return shadowed
+
+
+def _nearest_hit(obj, ray: Ray, t_min: float, t_max: float) -> Optional[Intersection]:
+    return obj.nearest_hit(ray, t_min, t_max)
+
+
+def _type_name(obj) -> str:
+    return type(obj).__name__
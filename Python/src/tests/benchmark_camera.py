@@ -0,0 +1,40 @@
+"""
+Benchmark for the per-pixel cost of Camera.ray_for_pixel.
+
+Compares the cached inverse transform against inverting the camera transform
+twice per pixel, as ray_for_pixel used to do.
+Run from the Python directory with: python -m src.tests.benchmark_camera
+"""
+import math
+import timeit
+
+from src.ray_tracer_challenge.camera import Camera
+from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.tuple import Point, Vector
+
+
+def _uncached_ray_for_pixel(camera: Camera, x, y):
+    x_offset = (x + 0.5) * camera.pixel_size
+    y_offset = (y + 0.5) * camera.pixel_size
+    world_x = camera._half_width - x_offset
+    world_y = camera._half_height - y_offset
+    pixel = camera.transform.inverse() * Point(world_x, world_y, -1)
+    origin = camera.transform.inverse() * Point(0, 0, 0)
+    return Ray(origin, (pixel - origin).normalize())
+
+
+def main(number=2000):
+    camera = Camera(1280, 720, math.pi / 3)
+    camera.transform = Matrix.view_transform(Point(0, 1.5, -5), Point(0, 1, 0), Vector(0, 1, 0))
+
+    cached = min(timeit.repeat(lambda: camera.ray_for_pixel(640, 360), number=number, repeat=3)) / number
+    uncached = min(timeit.repeat(lambda: _uncached_ray_for_pixel(camera, 640, 360), number=number, repeat=3)) / number
+
+    print(f"ray_for_pixel, inverse per pixel: {uncached * 1e6:10.2f} us/pixel")
+    print(f"ray_for_pixel, cached inverse:    {cached * 1e6:10.2f} us/pixel")
+    print(f"saving per 720p frame:            {(uncached - cached) * camera.hsize * camera.vsize:10.2f} s")
+
+
+if __name__ == "__main__":
+    main()
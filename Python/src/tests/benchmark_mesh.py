@@ -0,0 +1,53 @@
+"""
+Benchmark for loading and intersecting a large triangle mesh.
+
+Writes a UV sphere with the given number of triangles as OBJ text, then times
+parsing it, building the mesh and its BVH, and the nearest hit per ray.
+Run from the Python directory with: python -m src.tests.benchmark_mesh
+"""
+import io
+import math
+import random
+import time
+
+from src.ray_tracer_challenge.obj_file import parse_obj
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.tuple import Point, Vector
+
+
+def uv_sphere_obj(rings, segments):
+    lines = []
+    for i in range(rings + 1):
+        theta = math.pi * i / rings
+        for j in range(segments):
+            phi = 2 * math.pi * j / segments
+            lines.append(f"v {math.sin(theta) * math.cos(phi):.6f} {math.cos(theta):.6f} "
+                         f"{math.sin(theta) * math.sin(phi):.6f}")
+    for i in range(rings):
+        for j in range(segments):
+            a = i * segments + j + 1
+            b = i * segments + (j + 1) % segments + 1
+            lines.append(f"f {a} {b} {b + segments} {a + segments}")
+    return "\n".join(lines)
+
+
+def main(sizes=((50, 100), (150, 300), (300, 500)), ray_count=500):
+    rng = random.Random(7)
+    rays = [Ray(Point(rng.uniform(-1, 1), rng.uniform(-1, 1), -5), Vector(0, 0, 1)) for _ in range(ray_count)]
+    print(f"{'triangles':>10} {'parse (s)':>10} {'build (s)':>10} {'array MB':>9} {'us/ray':>8}")
+    for (rings, segments) in sizes:
+        text = uv_sphere_obj(rings, segments)
+        start = time.perf_counter()
+        obj = parse_obj(io.StringIO(text))
+        parsed = time.perf_counter()
+        mesh = obj.to_mesh()
+        built = time.perf_counter()
+        for ray in rays:
+            mesh.nearest_hit(ray, 0, math.inf)
+        per_ray = (time.perf_counter() - built) / ray_count
+        size = (obj.vertices.itemsize * len(obj.vertices) + obj.faces.itemsize * len(obj.faces)) / 1e6
+        print(f"{obj.face_count:10} {parsed - start:10.2f} {built - parsed:10.2f} {size:9.1f} {per_ray * 1e6:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Benchmark for the frame time of the scene in utils.render_with_camera.
+
+Compares the floor and walls modelled as planes with the squashed spheres used
+before planes existed. Planes are cheaper to intersect and leave no gaps at the
+edges of the scene, but are unbounded, so they are tested for every ray rather
+than through the BVH.
+Run from the Python directory with: python -m src.tests.benchmark_scene
+"""
+import time
+
+from src.utils import Resolution, create_camera, create_world, squashed_sphere
+from src.ray_tracer_challenge.plane import Plane
+
+
+def frame_time(world, camera, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        camera.render(world)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(resolution=Resolution(160, 90)):
+    camera = create_camera(resolution)
+    print(f"{'walls':>16} {'frame (s)':>10}")
+    for (name, wall_shape) in (("squashed sphere", squashed_sphere), ("plane", Plane)):
+        print(f"{name:>16} {frame_time(create_world(wall_shape), camera):10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Microbenchmarks for the Vector operations on the rendering hot path.
+
+Reports the time per operation in nanoseconds.
+Run from the Python directory with: python -m src.tests.benchmark_tuple
+"""
+import timeit
+
+from src.ray_tracer_challenge.tuple import Point, Vector
+
+
+def measure(statement, number=200_000, repeat=5):
+    """
+    Return the best time per call of statement, in nanoseconds.
+    """
+    return min(timeit.repeat(statement, number=number, repeat=repeat)) / number * 1e9
+
+
+def main():
+    v1 = Vector(1, 2, 3)
+    v2 = Vector(2, 3, 4)
+    normal = Vector(2 ** 0.5 / 2, 2 ** 0.5 / 2, 0)
+    p1 = Point(1, 2, 3)
+    p2 = Point(5, 6, 7)
+
+    benchmarks = {
+        "dot": lambda: v1.dot(v2),
+        "normalize": lambda: v1.normalize(),
+        "reflect": lambda: v1.reflect(normal),
+        "cross": lambda: v1.cross(v2),
+        "point - point": lambda: p1 - p2,
+        "vector * scalar": lambda: v1 * 3.5,
+    }
+    for name, statement in benchmarks.items():
+        print(f"{name:16} {measure(statement):8.1f} ns/op")
+
+
+if __name__ == "__main__":
+    main()
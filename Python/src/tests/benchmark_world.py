@@ -0,0 +1,65 @@
+"""
+Benchmark for World.intersect as the number of objects grows.
+
+Compares the BVH traversal with testing every object, for random scenes of
+small spheres. The BVH time per ray should grow roughly with log(N).
+Run from the Python directory with: python -m src.tests.benchmark_world
+"""
+import random
+import time
+
+from src.ray_tracer_challenge.intersection import Intersections
+from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.sphere import Sphere
+from src.ray_tracer_challenge.tuple import Point, Vector
+from src.ray_tracer_challenge.world import World
+
+
+def random_world(count, rng):
+    world = World()
+    for _ in range(count):
+        s = Sphere()
+        s.transform = (Matrix.translation(rng.uniform(-50, 50), rng.uniform(-50, 50), rng.uniform(-50, 50)) *
+                       Matrix.scaling(0.5, 0.5, 0.5))
+        world.objects.append(s)
+    return world
+
+
+def random_rays(count, rng):
+    return [Ray(Point(0, 0, -100),
+                Vector(rng.uniform(-0.5, 0.5), rng.uniform(-0.5, 0.5), 1).normalize())
+            for _ in range(count)]
+
+
+def linear_intersect(world, ray):
+    intersections = Intersections()
+    for obj in world.objects:
+        intersections.extend(obj.intersect(ray))
+    intersections.sort(key=lambda x: x.t)
+    return intersections
+
+
+def per_ray(function, world, rays):
+    start = time.perf_counter()
+    for ray in rays:
+        function(world, ray)
+    return (time.perf_counter() - start) / len(rays)
+
+
+def main(counts=(10, 100, 1000, 4000), ray_count=200):
+    rng = random.Random(42)
+    rays = random_rays(ray_count, rng)
+    print(f"{'objects':>8} {'build (ms)':>11} {'bvh (us/ray)':>13} {'linear (us/ray)':>16}")
+    for count in counts:
+        world = random_world(count, rng)
+        start = time.perf_counter()
+        world.intersect(rays[0])
+        build = time.perf_counter() - start
+        bvh = per_ray(World.intersect, world, rays)
+        linear = per_ray(linear_intersect, world, rays[:max(1, ray_count * 10 // count)])
+        print(f"{count:8} {build * 1e3:11.1f} {bvh * 1e6:13.1f} {linear * 1e6:16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from src.benchmarks.__main__ import main
+from src.benchmarks.suite import Benchmark, benchmark, benchmarks, compare, environment, load, run, save
+
+
+def _result(best):
+    return {"best": best, "mean": best, "worst": best, "number": 1, "repeat": 1}
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_the_suite_covers_the_hot_paths(self):
+        names = benchmarks()
+        for name in ("micro.matrix_inverse", "micro.matrix_times_tuple", "micro.sphere_intersect",
+                     "micro.material_lighting", "micro.camera_ray_for_pixel", "micro.canvas_to_ppm",
+                     "render.160x120", "render.480p", "render.720p"):
+            self.assertIn(name, names)
+
+    def test_running_a_benchmark(self):
+        calls = []
+        result = Benchmark("test", lambda: lambda: calls.append(1), number=10, repeat=3).run()
+        self.assertEqual(30, len(calls))
+        self.assertEqual(10, result["number"])
+        self.assertEqual(3, result["repeat"])
+        self.assertLessEqual(result["best"], result["mean"])
+        self.assertLessEqual(result["mean"], result["worst"])
+
+    def test_registering_a_name_twice(self):
+        benchmarks()
+        with self.assertRaises(ValueError):
+            benchmark("micro.matrix_inverse")(lambda: None)
+
+    def test_run_records_the_environment(self):
+        result = run(["micro.matrix_times_tuple"], repeat=1)
+        self.assertEqual(["micro.matrix_times_tuple"], list(result["results"]))
+        for key in ("timestamp", "python", "numpy", "platform", "cpu_count", "commit"):
+            self.assertIn(key, result["environment"])
+        with self.assertRaises(ValueError):
+            run(["no.such.benchmark"])
+
+    def test_saving_and_loading_a_run(self):
+        result = {"environment": environment(), "results": {"a": _result(1.0)}}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.json")
+            save(result, path)
+            self.assertEqual(result, load(path))
+            with open(path, "w") as f:
+                json.dump({}, f)
+            with self.assertRaises(ValueError):
+                load(path)
+
+    def test_compare_flags_slowdowns_beyond_the_threshold(self):
+        baseline = {"results": {"a": _result(1.0), "b": _result(1.0), "c": _result(1.0), "old": _result(1.0)}}
+        current = {"results": {"a": _result(1.05), "b": _result(1.2), "c": _result(0.5), "new": _result(1.0)}}
+        rows = {row[0]: row for row in compare(baseline, current, threshold=0.1)}
+        self.assertEqual({"a", "b", "c"}, set(rows))
+        self.assertFalse(rows["a"][4])
+        self.assertTrue(rows["b"][4])
+        self.assertAlmostEqual(0.2, rows["b"][3])
+        self.assertFalse(rows["c"][4])
+        with self.assertRaises(ValueError):
+            compare(baseline, current, threshold=-1)
+
+    def test_compare_command_exit_status(self):
+        with tempfile.TemporaryDirectory() as directory:
+            (before, after) = (os.path.join(directory, "before.json"), os.path.join(directory, "after.json"))
+            save({"environment": {}, "results": {"a": _result(1.0)}}, before)
+            save({"environment": {}, "results": {"a": _result(1.5)}}, after)
+            with open(os.devnull, "w") as devnull:
+                with redirect_stdout(devnull):
+                    self.assertEqual(1, main(["compare", before, after]))
+                    self.assertEqual(0, main(["compare", before, after, "--threshold", "0.6"]))
+                    self.assertEqual(0, main(["compare", after, before]))
@@ -0,0 +1,110 @@
+import math
+import unittest
+
+from src.ray_tracer_challenge.bounds import BoundingBox
+from src.ray_tracer_challenge.bvh import BVH
+from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.sphere import Sphere
+from src.ray_tracer_challenge.tuple import Point, Vector
+
+
+class TestBoundingBox(unittest.TestCase):
+    def test_empty_bounding_box(self):
+        box = BoundingBox()
+        self.assertTrue(box.is_empty())
+        self.assertEqual(0, box.surface_area())
+
+    def test_adding_points_to_a_bounding_box(self):
+        box = BoundingBox()
+        box.add_point(Point(-5, 2, 0))
+        box.add_point(Point(7, 0, -3))
+        self.assertEqual(Point(-5, 0, -3), box.minimum)
+        self.assertEqual(Point(7, 2, 0), box.maximum)
+
+    def test_merging_bounding_boxes(self):
+        box = BoundingBox(Point(-5, -2, 0), Point(7, 4, 4)).merge(BoundingBox(Point(8, -7, -2), Point(14, 2, 8)))
+        self.assertEqual(Point(-5, -7, -2), box.minimum)
+        self.assertEqual(Point(14, 4, 8), box.maximum)
+
+    def test_transforming_a_bounding_box(self):
+        box = BoundingBox(Point(-1, -1, -1), Point(1, 1, 1))
+        transformed = box.transform(Matrix.translation(1, 2, 3) * Matrix.scaling(2, 2, 2))
+        self.assertEqual(BoundingBox(Point(-1, 0, 1), Point(3, 4, 5)), transformed)
+
+    def test_infinite_bounding_box_is_not_bounded(self):
+        self.assertFalse(BoundingBox.infinite().is_bounded())
+        self.assertFalse(BoundingBox.infinite().transform(Matrix.translation(1, 2, 3)).is_bounded())
+        self.assertTrue(BoundingBox(Point(0, 0, 0), Point(1, 1, 1)).is_bounded())
+
+    def test_intersecting_a_ray_with_a_bounding_box(self):
+        box = BoundingBox(Point(5, -2, 0), Point(11, 4, 7))
+        cases = [(Point(15, 1, 2), Vector(-1, 0, 0), (4, 10)),
+                 (Point(-5, -1, 4), Vector(1, 0, 0), (10, 16)),
+                 (Point(7, 6, 5), Vector(0, -1, 0), (2, 8)),
+                 (Point(9, 0, 3), Vector(0, 0, 1), (-3, 4)),
+                 (Point(8, 2, 12), Vector(0, 0, -1), (5, 12)),
+                 (Point(15, 0, 2), Vector(0, 0, 1), None),
+                 (Point(13, -5, 9), Vector(0, 1, 0), None)]
+        for (origin, direction, expected) in cases:
+            self.assertEqual(expected, box.intersect(Ray(origin, direction)))
+
+    def test_sphere_bounds(self):
+        s = Sphere()
+        s.transform = Matrix.translation(1, 0, 0) * Matrix.scaling(1, 2, 3)
+        self.assertEqual(BoundingBox(Point(0, -2, -3), Point(2, 2, 3)), s.bounds())
+
+
+class TestBVH(unittest.TestCase):
+    def setup_spheres(self, count):
+        spheres = []
+        for i in range(count):
+            s = Sphere()
+            s.transform = Matrix.translation(3 * i, 0, 0)
+            spheres.append(s)
+        return spheres
+
+    def test_empty_bvh(self):
+        bvh = BVH.from_boxes([], [])
+        self.assertEqual([], bvh.intersect(Ray(Point(0, 0, -5), Vector(0, 0, 1))))
+        self.assertTrue(bvh.bounds.is_empty())
+
+    def test_bvh_bounds_contain_all_items(self):
+        spheres = self.setup_spheres(10)
+        bvh = BVH.from_boxes(spheres, [s.bounds() for s in spheres])
+        self.assertEqual(BoundingBox(Point(-1, -1, -1), Point(28, 1, 1)), bvh.bounds)
+
+    def test_bvh_is_split_for_many_items(self):
+        spheres = self.setup_spheres(64)
+        bvh = BVH.from_boxes(spheres, [s.bounds() for s in spheres])
+        self.assertGreater(bvh.depth(), 4)
+        self.assertLess(bvh.depth(), 16)
+
+    def test_bvh_returns_only_items_along_the_ray(self):
+        spheres = self.setup_spheres(64)
+        bvh = BVH.from_boxes(spheres, [s.bounds() for s in spheres])
+        candidates = bvh.intersect(Ray(Point(30, 0, -5), Vector(0, 0, 1)))
+        self.assertIn(spheres[10], candidates)
+        self.assertLessEqual(len(candidates), BVH.MAX_LEAF_SIZE)
+
+    def test_larger_leaves(self):
+        spheres = self.setup_spheres(64)
+        bvh = BVH.from_boxes(spheres, [s.bounds() for s in spheres])
+        shallow = BVH(spheres, [(s.bounds().min_x, -1, -1) for s in spheres],
+                      [(s.bounds().max_x, 1, 1) for s in spheres], BVH.MAX_LEAF_SIZE)
+        self.assertLess(shallow.depth(), bvh.depth())
+        ray = Ray(Point(-5, 0, 0), Vector(1, 0, 0))
+        self.assertIs(spheres[0], shallow.closest_hit(ray, 0, math.inf).object)
+        self.assertEqual(64, len(shallow.intersect(ray)))
+        with self.assertRaises(ValueError):
+            BVH(spheres, [], [], 0)
+
+    def test_bvh_returns_items_front_to_back(self):
+        spheres = self.setup_spheres(64)
+        bvh = BVH.from_boxes(spheres, [s.bounds() for s in spheres])
+        candidates = bvh.intersect(Ray(Point(-5, 0, 0), Vector(1, 0, 0)))
+        self.assertEqual(64, len(candidates))
+        self.assertIs(spheres[0], candidates[0])
+        self.assertIs(spheres[-1], candidates[-1])
+        candidates = bvh.intersect(Ray(Point(200, 0, 0), Vector(-1, 0, 0)))
+        self.assertIs(spheres[-1], candidates[0])
@@ -1,9 +1,16 @@
 import math
+import pickle
+import tracemalloc
 import unittest
+from array import array
+from concurrent.futures import Future
 
-from src.ray_tracer_challenge.camera import Camera
+import numpy as np
+
+from src.ray_tracer_challenge.camera import Camera, RayCache, _map_in_order
 from src.ray_tracer_challenge.color import Color
 from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.plane import Plane
 from src.ray_tracer_challenge.tuple import Point, Vector
 from src.tests.test_world import TestWorld
 
@@ -46,6 +53,13 @@ class TeastCamera(unittest.TestCase):
         self.assertEqual(Point(0, 2, -5), r.origin)
         self.assertEqual(Vector(math.sqrt(2) / 2, 0, -math.sqrt(2) / 2), r.direction)
 
+    def test_inverse_transform_follows_transform(self):
+        c = Camera(201, 101, math.pi / 2)
+        self.assertEqual(Matrix.identity(), c.inverse_transform)
+        c.transform = Matrix.translation(0, -2, 5)
+        self.assertEqual(Matrix.translation(0, 2, -5), c.inverse_transform)
+        self.assertEqual(Point(0, 2, -5), c.ray_for_pixel(0, 0).origin)
+
     def test_render_world_with_camera(self):
         test_world = TestWorld()
         w = test_world.setup_world()
@@ -56,3 +70,311 @@ class TeastCamera(unittest.TestCase):
         c.transform = Matrix.view_transform(origin, to, up)
         image = c.render(w)
         self.assertEqual(Color(0.38066, 0.47583, 0.2855), image.get_pixel(5, 5))
+
+    def test_generate_rays_matches_ray_for_pixel(self):
+        c = Camera(21, 11, math.pi / 2)
+        c.transform = Matrix.rotation_y(math.pi / 4) * Matrix.translation(0, -2, 5)
+        origins, directions = c.generate_rays()
+        self.assertEqual((21 * 11, 3), origins.shape)
+        self.assertEqual((21 * 11, 3), directions.shape)
+        for y in range(c.vsize):
+            for x in range(c.hsize):
+                r = c.ray_for_pixel(x, y)
+                i = y * c.hsize + x
+                self.assertEqual(r.origin, Point(*origins[i]))
+                self.assertEqual(r.direction, Vector(*directions[i]))
+
+    def test_generate_rays_for_a_tile(self):
+        c = Camera(201, 101, math.pi / 2)
+        origins, directions = c.generate_rays(100, 50, 3, 2)
+        self.assertEqual((6, 3), directions.shape)
+        self.assertEqual(Vector(0, 0, -1), Vector(*directions[0]))
+        self.assertEqual(c.ray_for_pixel(102, 51).direction, Vector(*directions[5]))
+        self.assertEqual(Point(0, 0, 0), Point(*origins[5]))
+
+    def test_tiles_cover_the_canvas(self):
+        c = Camera(10, 7, math.pi / 2)
+        tiles = c.tiles(4)
+        self.assertEqual((0, 0, 4, 4), tiles[0])
+        self.assertEqual((8, 4, 2, 3), tiles[-1])
+        self.assertEqual(10 * 7, sum(width * height for (_, _, width, height) in tiles))
+
+    def test_parallel_render_matches_serial_render(self):
+        test_world = TestWorld()
+        w = test_world.setup_world()
+        c = Camera(11, 9, math.pi / 2)
+        c.transform = Matrix.view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        serial = c.render(w)
+        parallel = c.render(w, workers=2, tile_size=4)
+        self.assertTrue((serial.pixels == parallel.pixels).all())
+
+    def test_render_with_stats(self):
+        test_world = TestWorld()
+        w = test_world.setup_world()
+        floor = Plane()
+        floor.transform = Matrix.translation(0, -1, 0)
+        w.objects.append(floor)
+        c = Camera(11, 9, math.pi / 2)
+        c.transform = Matrix.view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        for frozen in (False, True):
+            if frozen:
+                w.freeze()
+            image = c.render(w)
+            (canvas, stats) = c.render(w, stats=True)
+            self.assertTrue((image.pixels == canvas.pixels).all())
+            self.assertEqual(99, stats.primary_rays)
+            self.assertLess(0, stats.hits)
+            self.assertLessEqual(stats.hits, stats.primary_rays)
+            self.assertEqual(stats.hits, stats.lighting_calls)
+            self.assertEqual(stats.hits, stats.shadow_rays)
+            self.assertEqual({"Sphere", "Plane"}, set(stats.intersection_tests))
+            # Every primary ray is tested against the unbounded plane.
+            self.assertLessEqual(stats.primary_rays, stats.intersection_tests["Plane"])
+            self.assertLess(0, stats.wall_time)
+            self.assertLessEqual(sum(stats.phase_times.values()), stats.wall_time)
+
+    def test_parallel_render_stats_add_up(self):
+        test_world = TestWorld()
+        w = test_world.setup_world()
+        c = Camera(11, 9, math.pi / 2)
+        c.transform = Matrix.view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        (serial_canvas, serial) = c.render(w, stats=True)
+        (parallel_canvas, parallel) = c.render(w, workers=2, tile_size=4, stats=True)
+        self.assertTrue((serial_canvas.pixels == parallel_canvas.pixels).all())
+        self.assertEqual(99, parallel.primary_rays)
+        self.assertEqual(serial.hits, parallel.hits)
+        self.assertEqual(serial.lighting_calls, parallel.lighting_calls)
+        self.assertEqual(serial.shadow_rays, parallel.shadow_rays)
+        self.assertLess(0, parallel.total_intersection_tests)
+
+    def test_render_with_cost(self):
+        test_world = TestWorld()
+        w = test_world.setup_world()
+        c = Camera(11, 9, math.pi / 2)
+        c.transform = Matrix.view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        image = c.render(w)
+        for workers in (None, 2):
+            (canvas, stats) = c.render(w, workers=workers, tile_size=4, cost=True)
+            self.assertTrue((image.pixels == canvas.pixels).all())
+            self.assertEqual((9, 11), stats.cost.tests.shape)
+            self.assertEqual(stats.total_intersection_tests, stats.cost.tests.sum())
+            self.assertTrue((stats.cost.time > 0).all())
+            # The corners miss both spheres and need fewer tests than the center, which hits them.
+            self.assertLess(stats.cost.tests[0, 0], stats.cost.tests[4, 5])
+        (_, stats) = c.render(w, stats=True)
+        self.assertIsNone(stats.cost)
+
+    def test_ray_cache_budget_and_eviction(self):
+        cache = RayCache(max_bytes=100)
+        self.assertTrue(cache.put('a', array('d', [0] * 8)))
+        self.assertEqual(64, cache.nbytes)
+        # Too big for what is left, and nothing is evicted to make room.
+        self.assertFalse(cache.put('b', array('d', [0] * 8)))
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertTrue(cache.evict('a'))
+        self.assertFalse(cache.evict('a'))
+        self.assertEqual(0, cache.nbytes)
+        self.assertTrue(cache.put('b', array('d', [0] * 8)))
+        cache.clear()
+        self.assertEqual((0, 0), (len(cache), cache.nbytes))
+        with self.assertRaises(ValueError):
+            RayCache(-1)
+
+    def test_render_with_ray_cache(self):
+        test_world = TestWorld()
+        w = test_world.setup_world()
+        c = Camera(11, 9, math.pi / 2)
+        c.transform = Matrix.view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        image = c.render(w)
+        c.ray_cache = RayCache()
+        self.assertTrue((image.pixels == c.render(w).pixels).all())
+        self.assertEqual(1, len(c.ray_cache))
+        # The directions, and the rays built from them.
+        self.assertLess(11 * 9 * 3 * 8, c.ray_cache.nbytes)
+        directions = c.primary_directions()
+        self.assertIs(directions, c.primary_directions())
+        rays = c.primary_rays()
+        self.assertIs(rays, c.primary_rays())
+        self.assertEqual(11 * 9, len(rays))
+        self.assertEqual(c.origin, rays[0].origin)
+        self.assertEqual(c.ray_for_pixel(3, 2).direction, rays[2 * 11 + 3].direction)
+        self.assertTrue((image.pixels == c.render(w).pixels).all())
+        rows = [pixels for (_, _, pixels) in c.render_iter(w)]
+        self.assertTrue((image.pixels == np.concatenate(rows)).all())
+
+        # A new transform is a new setup, with its own rays.
+        c.transform = Matrix.view_transform(Point(0, 0, -4), Point(0, 0, 0), Vector(0, 1, 0))
+        self.assertIsNot(directions, c.primary_directions())
+        self.assertEqual(2, len(c.ray_cache))
+        moved = c.render(w)
+        c.ray_cache = None
+        self.assertTrue((moved.pixels == c.render(w).pixels).all())
+
+    def test_ray_cache_keeps_the_directions_when_the_rays_do_not_fit(self):
+        w = TestWorld().setup_world()
+        c = Camera(11, 9, math.pi / 2)
+        c.transform = Matrix.view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        image = c.render(w)
+        c.ray_cache = RayCache(11 * 9 * 3 * 8)
+        self.assertTrue((image.pixels == c.render(w).pixels).all())
+        self.assertIsNotNone(c.ray_cache.get(c.cache_key))
+        self.assertIsNone(c.ray_cache.get_rays(c.cache_key))
+        self.assertEqual(11 * 9 * 3 * 8, c.ray_cache.nbytes)
+        self.assertIsNone(c.primary_rays())
+        self.assertIs(c.ray_cache.get(c.cache_key), c.primary_directions())
+        c.ray_cache.clear()
+        self.assertEqual(0, c.ray_cache.nbytes)
+        with self.assertRaises(ValueError):
+            c.ray_cache.put_rays(c.cache_key, [])
+
+    def test_over_budget_ray_cache_does_not_build_the_frame(self):
+        class CountingCamera(Camera):
+            generated = 0
+
+            def ray_for_pixel(self, x, y):
+                CountingCamera.generated += 1
+                return super().ray_for_pixel(x, y)
+
+        w = TestWorld().setup_world()
+        c = CountingCamera(40, 30, math.pi / 2)
+        c.transform = Matrix.view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        image = c.render(w)
+        c.ray_cache = RayCache(1000)
+        CountingCamera.generated = 0
+        for _ in range(2):
+            self.assertTrue((image.pixels == c.render(w).pixels).all())
+        # Each render generates its rays one tile at a time, and nothing for the cache.
+        self.assertEqual(2 * 40 * 30, CountingCamera.generated)
+        self.assertIsNone(c.primary_directions())
+        self.assertIsNone(c.primary_rays())
+        self.assertEqual((0, 0), (len(c.ray_cache), c.ray_cache.nbytes))
+
+    def test_rays_that_do_not_fit_are_not_built(self):
+        w = TestWorld().setup_world()
+        c = Camera(100, 100, math.pi / 2)
+        c.transform = Matrix.view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        c.ray_cache = RayCache(100 * 100 * 3 * 8)
+        c.primary_directions()
+        tracemalloc.start()
+        try:
+            c.render(w)
+            (_, peak) = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertIsNone(c.ray_cache.get_rays(c.cache_key))
+        # The canvas and the tiles, but not a list of the whole frame's rays.
+        self.assertLess(peak, RayCache.rays_nbytes(100 * 100) / 2)
+
+    def test_render_workers_read_the_cached_rays(self):
+        w = TestWorld().setup_world()
+        c = Camera(11, 9, math.pi / 2)
+        c.transform = Matrix.view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        image = c.render(w)
+        c.ray_cache = RayCache()
+        self.assertTrue((image.pixels == c.render(w, workers=2, tile_size=4).pixels).all())
+        self.assertEqual(1, len(c.ray_cache))
+        (canvas, stats) = c.render(w, workers=2, tile_size=4, stats=True)
+        self.assertTrue((image.pixels == canvas.pixels).all())
+        self.assertEqual(11 * 9, stats.primary_rays)
+        for (x0, y0, pixels) in c.render_iter(w, order="tiles", tile_size=4, workers=2):
+            (height, width) = pixels.shape[:2]
+            self.assertTrue((image.pixels[y0:y0 + height, x0:x0 + width] == pixels).all())
+
+    def test_ray_cache_is_shared_by_cameras_with_the_same_setup(self):
+        cache = RayCache()
+        cameras = [Camera(11, 9, math.pi / 2) for _ in range(2)]
+        for c in cameras:
+            c.transform = Matrix.view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+            c.ray_cache = cache
+        self.assertEqual(cameras[0].cache_key, cameras[1].cache_key)
+        self.assertIs(cameras[0].primary_directions(), cameras[1].primary_directions())
+        self.assertNotEqual(cameras[0].cache_key, Camera(11, 9, math.pi / 3).cache_key)
+
+    def test_ray_cache_is_not_pickled(self):
+        c = Camera(11, 9, math.pi / 2)
+        c.ray_cache = RayCache()
+        c.primary_directions()
+        self.assertIsNone(pickle.loads(pickle.dumps(c)).ray_cache)
+        self.assertEqual(1, len(c.ray_cache))
+
+    def test_render_iter_yields_scanlines(self):
+        test_world = TestWorld()
+        w = test_world.setup_world()
+        c = Camera(11, 9, math.pi / 2)
+        c.transform = Matrix.view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        image = c.render(w)
+        rows = list(c.render_iter(w, order="scanline"))
+        self.assertEqual(9, len(rows))
+        for y, (x0, y0, pixels) in enumerate(rows):
+            self.assertEqual((0, y), (x0, y0))
+            self.assertTrue((image.pixels[y:y + 1] == pixels).all())
+
+    def test_render_iter_yields_tiles(self):
+        test_world = TestWorld()
+        w = test_world.setup_world()
+        c = Camera(11, 9, math.pi / 2)
+        c.transform = Matrix.view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        image = c.render(w)
+        for workers in (None, 2):
+            chunks = c.render_iter(w, order="tiles", tile_size=4, workers=workers)
+            self.assertEqual([(0, 0), (4, 0), (8, 0), (0, 4)], [(x0, y0) for (x0, y0, _) in list(chunks)[:4]])
+            for (x0, y0, pixels) in c.render_iter(w, order="tiles", tile_size=4, workers=workers):
+                (height, width) = pixels.shape[:2]
+                self.assertTrue((image.pixels[y0:y0 + height, x0:x0 + width] == pixels).all())
+
+    def test_render_iter_can_stop_early(self):
+        test_world = TestWorld()
+        w = test_world.setup_world()
+        c = Camera(11, 9, math.pi / 2)
+        chunks = c.render_iter(w, order="scanline", workers=2)
+        (x0, y0, pixels) = next(chunks)
+        self.assertEqual((0, 0, (1, 11, 3)), (x0, y0, pixels.shape))
+        chunks.close()
+
+    def test_map_in_order_bounds_the_submitted_calls(self):
+        class Executor:
+            def __init__(self):
+                self.submitted = 0
+
+            def submit(self, fn, item):
+                self.submitted += 1
+                future = Future()
+                future.set_result(fn(item))
+                return future
+
+        executor = Executor()
+        results = _map_in_order(executor, lambda x: x * x, range(20), 4)
+        for (yielded, result) in enumerate(results, 1):
+            # The futures still pending, not counting the one whose result is being yielded.
+            self.assertLessEqual(executor.submitted - yielded, 4)
+            self.assertEqual((yielded - 1) ** 2, result)
+        self.assertEqual(20, executor.submitted)
+
+        executor = Executor()
+        results = _map_in_order(executor, lambda x: x, range(20), 4)
+        next(results)
+        results.close()
+        self.assertEqual(5, executor.submitted)
+
+    def test_parallel_renders_report_the_shadow_cache_counts(self):
+        w = TestWorld().setup_world()
+        floor = Plane()
+        floor.transform = Matrix.translation(0, -1, 0)
+        w.objects.append(floor)
+        c = Camera(21, 15, math.pi / 2)
+        c.transform = Matrix.view_transform(Point(0, 1.5, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        c.render(w)
+        queries = w.shadow_stats.queries
+        self.assertGreater(queries, 0)
+
+        w.shadow_stats.reset()
+        c.render(w, workers=2, tile_size=4)
+        self.assertEqual(queries, w.shadow_stats.queries)
+        self.assertGreater(w.shadow_stats.hit_rate, 0)
+
+        w.shadow_stats.reset()
+        for _ in c.render_iter(w, order="tiles", tile_size=4, workers=2):
+            pass
+        self.assertEqual(queries, w.shadow_stats.queries)
+        self.assertGreater(w.shadow_stats.hit_rate, 0)
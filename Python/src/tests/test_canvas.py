@@ -1,5 +1,8 @@
+import io
 import unittest
 
+import numpy as np
+
 from src.ray_tracer_challenge.canvas import Canvas
 from src.ray_tracer_challenge.color import Color, Colors
 
@@ -12,9 +15,9 @@ class TestCanvas(unittest.TestCase):
 
     def test_canvas_initializes_with_all_black_pixels(self):
         c = Canvas(10, 20)
-        for row in c.pixels:
-            for pixel in row:
-                self.assertEqual(pixel, Colors.BLACK)
+        for y in range(c.height):
+            for x in range(c.width):
+                self.assertEqual(c.get_pixel(x, y), Colors.BLACK)
 
     def test_canvas_writes_pixel(self):
         c = Canvas(10, 20)
@@ -22,6 +25,34 @@ class TestCanvas(unittest.TestCase):
         c.set_pixel(x, y, Colors.RED)
         self.assertEqual(c.get_pixel(x, y), Colors.RED)
 
+    def test_canvas_is_backed_by_a_single_buffer(self):
+        c = Canvas(10, 20, dtype=np.float32)
+        self.assertEqual((20, 10, 3), c.pixels.shape)
+        self.assertEqual(np.float32, c.pixels.dtype)
+        c.set_pixel(2, 3, Color(1, 0.5, 0.25))
+        self.assertEqual([1, 0.5, 0.25], c.pixels[3, 2].tolist())
+
+    def test_canvas_writes_tile(self):
+        c = Canvas(10, 20)
+        tile = np.zeros((2, 3, 3))
+        tile[:, :] = (0, 0.5, 1)
+        c.write_tile(4, 5, tile)
+        for y in range(c.height):
+            for x in range(c.width):
+                expected = Color(0, 0.5, 1) if 4 <= x < 7 and 5 <= y < 7 else Colors.BLACK
+                self.assertEqual(expected, c.get_pixel(x, y))
+
+    def test_canvas_writes_rows(self):
+        c = Canvas(4, 3)
+        rows = np.zeros((4 * 2, 3))
+        rows[:] = (1, 0, 0)
+        rows[5] = (0, 1, 0)
+        c.write_rows(1, rows)
+        self.assertEqual(Colors.BLACK, c.get_pixel(3, 0))
+        self.assertEqual(Colors.RED, c.get_pixel(0, 1))
+        self.assertEqual(Colors.GREEN, c.get_pixel(1, 2))
+        self.assertEqual(Colors.RED, c.get_pixel(3, 2))
+
     def test_canvas_to_ppm(self):
         (width, height) = (5, 3)
         c = Canvas(width, height)
@@ -60,3 +91,27 @@ class TestCanvas(unittest.TestCase):
         c = Canvas(5, 3)
         ppm = c.to_ppm()
         self.assertEqual("\n", ppm[-1])
+
+    def test_canvas_write_ppm_plain_matches_to_ppm(self):
+        c = Canvas(10, 2)
+        c.set_pixel(0, 0, Color(1.5, 0, 0))
+        c.set_pixel(9, 1, Color(1, 0.8, 0.6))
+        f = io.BytesIO()
+        c.write_ppm(f, binary=False)
+        self.assertEqual(c.to_ppm().encode("ascii"), f.getvalue())
+
+    def test_canvas_write_ppm_binary(self):
+        c = Canvas(5, 3)
+        c.set_pixel(0, 0, Color(1.5, 0, 0))
+        c.set_pixel(2, 1, Color(0, 0.5, 0))
+        c.set_pixel(4, 2, Color(-0.5, 0, 1))
+        f = io.BytesIO()
+        c.write_ppm(f)
+        header = b"P6\n5 3\n255\n"
+        data = f.getvalue()
+        self.assertTrue(data.startswith(header))
+        pixels = data[len(header):]
+        self.assertEqual(5 * 3 * 3, len(pixels))
+        self.assertEqual(bytes([255, 0, 0]), pixels[0:3])
+        self.assertEqual(bytes([0, 127, 0]), pixels[(1 * 5 + 2) * 3:(1 * 5 + 3) * 3])
+        self.assertEqual(bytes([0, 0, 255]), pixels[-3:])
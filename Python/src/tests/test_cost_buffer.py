@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from src.ray_tracer_challenge.color import Color
+from src.ray_tracer_challenge.cost_buffer import CostBuffer
+
+
+class TestCostBuffer(unittest.TestCase):
+    def test_new_cost_buffer_is_empty(self):
+        cost = CostBuffer(4, 3)
+        self.assertEqual((3, 4), cost.tests.shape)
+        self.assertEqual((3, 4), cost.time.shape)
+        self.assertEqual(0, cost.tests.sum())
+
+    def test_writing_a_tile(self):
+        (cost, tile) = (CostBuffer(4, 3), CostBuffer(2, 2))
+        tile.tests[:] = 5
+        tile.time[1, 1] = 0.5
+        cost.write_tile(2, 1, tile)
+        self.assertEqual(20, cost.tests.sum())
+        self.assertEqual(5, cost.tests[1, 2])
+        self.assertEqual(0, cost.tests[0, 2])
+        self.assertEqual(0.5, cost.time[2, 3])
+
+    def test_heatmap_runs_from_black_to_white(self):
+        cost = CostBuffer(3, 1)
+        cost.tests[0] = (0, 5, 10)
+        heatmap = cost.heatmap()
+        self.assertEqual(Color(0, 0, 0), heatmap.get_pixel(0, 0))
+        self.assertEqual(Color(1, 1, 1), heatmap.get_pixel(2, 0))
+        middle = heatmap.get_pixel(1, 0)
+        self.assertNotEqual(middle, Color(0, 0, 0))
+        self.assertNotEqual(middle, Color(1, 1, 1))
+
+    def test_heatmap_with_a_fixed_maximum(self):
+        cost = CostBuffer(2, 1)
+        cost.time[0] = (0.5, 2.0)
+        heatmap = cost.heatmap('time', maximum=1.0)
+        self.assertEqual(Color(1, 1, 1), heatmap.get_pixel(1, 0))
+        self.assertEqual(CostBuffer(2, 1).heatmap('time', maximum=1.0).get_pixel(0, 0), Color(0, 0, 0))
+        with self.assertRaises(ValueError):
+            cost.heatmap('colors')
+
+    def test_writing_heatmaps(self):
+        cost = CostBuffer(4, 2)
+        cost.tests[:] = np.arange(8).reshape(2, 4)
+        with tempfile.TemporaryDirectory() as directory:
+            ppm = os.path.join(directory, "cost.ppm")
+            png = os.path.join(directory, "cost.png")
+            cost.write_heatmap(ppm)
+            cost.write_heatmap(png)
+            with open(ppm, "rb") as f:
+                self.assertEqual(b"P6\n4 2\n255\n", f.read(11))
+            with Image.open(png) as image:
+                self.assertEqual((4, 2), image.size)
+                self.assertEqual((255, 255, 255), image.getpixel((3, 1)))
@@ -0,0 +1,205 @@
+import math
+import pickle
+import random
+import unittest
+
+import numpy as np
+
+from src.ray_tracer_challenge.color import Color, Colors
+from src.ray_tracer_challenge.frozen_world import FrozenWorld, PLANE, SHAPE, SPHERE, TRANSFORMED_SPHERE
+from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.plane import Plane
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.sphere import Sphere
+from src.ray_tracer_challenge.triangle import Triangle
+from src.ray_tracer_challenge.tuple import Light, Point, Vector
+from src.ray_tracer_challenge.world import World
+
+
+class TestFrozenWorld(unittest.TestCase):
+    def setup_world(self):
+        """
+        A world with every kind of object: a plain sphere, a squashed and rotated sphere,
+        a plane, and a triangle, which the frozen world hands back to the object.
+        """
+        floor = Plane()
+        floor.transform = Matrix.translation(0, -1, 0)
+        floor.material.color = Color(1, 0.9, 0.9)
+        floor.material.specular = 0
+
+        ball = Sphere(Point(-0.5, 0, 0.5), 1)
+        ball.material.color = Color(0.1, 1, 0.5)
+        ball.material.shininess = 50
+
+        egg = Sphere()
+        egg.transform = Matrix.translation(1.5, 0, -0.5) * Matrix.rotation_z(0.5) * Matrix.scaling(0.5, 0.8, 0.5)
+        egg.material = ball.material
+
+        triangle = Triangle(Point(-3, -1, 2), Point(-1, 2, 3), Point(-2, -1, 4))
+        triangle.material.color = Color(1, 0.8, 0.1)
+        triangle.material.ambient = 0.3
+
+        world = World()
+        world.objects.extend([floor, ball, egg, triangle])
+        world.light = Light(Point(-10, 10, -10), Colors.WHITE)
+        return world
+
+    def random_rays(self, count):
+        rng = random.Random(5)
+        origin = Point(0, 1, -5)
+        return [Ray(origin, Vector(rng.uniform(-0.6, 0.6), rng.uniform(-0.6, 0.3), 1).normalize())
+                for _ in range(count)]
+
+    def test_freeze_builds_tables(self):
+        world = self.setup_world()
+        frozen = world.freeze()
+        self.assertIs(frozen, world.frozen)
+        self.assertEqual(4, len(frozen))
+        self.assertEqual([PLANE, SPHERE, TRANSFORMED_SPHERE, SHAPE], frozen.kinds.tolist())
+        self.assertEqual((4, 4, 4), frozen.inverses.shape)
+        np.testing.assert_allclose([-0.5, 0, 0.5], frozen.centers[1])
+        self.assertEqual(1, frozen.radii[1])
+        # The ball and the egg share a material, so there are three rows in the table.
+        self.assertEqual((3, 7), frozen.materials.shape)
+        self.assertEqual(frozen.material_ids[1], frozen.material_ids[2])
+        np.testing.assert_allclose([0.1, 1, 0.5, 0.1, 0.9, 0.9, 50], frozen.materials[frozen.material_ids[1]])
+        self.assertEqual(3, frozen.index(world.objects[3]))
+
+    def test_frozen_world_renders_the_same(self):
+        world = self.setup_world()
+        rays = self.random_rays(200)
+        expected = [world.color_at(r) for r in rays]
+        hits = [world.closest_hit(r) for r in rays]
+        origins = np.array([[r.origin.x, r.origin.y, r.origin.z] for r in rays])
+        directions = np.array([[r.direction.x, r.direction.y, r.direction.z] for r in rays])
+        expected_many = world.color_at_many(origins, directions)
+
+        world.freeze()
+        for (r, color, hit) in zip(rays, expected, hits):
+            frozen_hit = world.closest_hit(r)
+            if hit is None:
+                self.assertIsNone(frozen_hit)
+            else:
+                self.assertIs(hit.object, frozen_hit.object)
+                self.assertAlmostEqual(hit.t, frozen_hit.t)
+            self.assertEqual(color, world.color_at(r))
+        np.testing.assert_allclose(expected_many, world.color_at_many(origins, directions), atol=1e-9)
+
+    def test_frozen_shadows(self):
+        world = self.setup_world()
+        points = np.array([[-0.5, -0.99, 0.5], [-0.5, 2, 0.5], [2.53, -0.99, 0.35], [5, -0.99, 5]])
+        expected = world.is_shadowed_many(points)
+        self.assertEqual([True, False, True, False], expected.tolist())
+        world.freeze()
+        self.assertEqual(expected.tolist(), world.is_shadowed_many(points).tolist())
+        self.assertEqual(expected.tolist(), [world.is_shadowed(Point(*p)) for p in points.tolist()])
+
+        # The cache remembers the egg, the last object to cast a shadow.
+        world.shadow_stats.reset()
+        self.assertTrue(world.is_shadowed(Point(2.52, -0.99, 0.36)))
+        self.assertEqual(1, world.shadow_stats.cache_hits)
+
+    def test_changing_objects_unfreezes_world(self):
+        world = self.setup_world()
+        world.freeze()
+        world.objects.append(Sphere(Point(0, 5, 0), 0.5))
+        self.assertIsNone(world.frozen)
+        world.freeze()
+        world.invalidate()
+        self.assertIsNone(world.frozen)
+
+    def test_changing_materials_and_transforms_unfreezes_world(self):
+        world = self.setup_world()
+        rays = self.random_rays(200)
+        changes = [lambda w: setattr(w.objects[1].material, 'color', Color(1, 0, 0)),
+                   lambda w: setattr(w.objects[0].material, 'diffuse', 0.2),
+                   lambda w: setattr(w.objects[3].material, 'specular', 0.5),
+                   lambda w: setattr(w.objects[3], 'material', w.objects[0].material),
+                   lambda w: setattr(w.objects[2], 'transform', Matrix.translation(0.5, 1, -1))]
+        for change in changes:
+            world.freeze()
+            change(world)
+            self.assertIsNone(world.frozen)
+            expected = self.setup_world()
+            for earlier in changes[:changes.index(change) + 1]:
+                earlier(expected)
+            self.assertEqual([expected.color_at(r) for r in rays], [world.color_at(r) for r in rays])
+
+    def test_changing_a_material_after_rendering_a_frozen_world(self):
+        world = self.setup_world()
+        rays = self.random_rays(200)
+        world.freeze()
+        for r in rays:
+            world.color_at(r)
+        world.objects[0].material.color = Color(1, 0, 0)
+        colors = [world.color_at(r) for r in rays]
+        expected = self.setup_world()
+        expected.objects[0].material.color = Color(1, 0, 0)
+        self.assertEqual([expected.color_at(r) for r in rays], colors)
+
+    def test_changing_a_material_keeps_the_bvh(self):
+        world = self.setup_world()
+        world.closest_hit(self.random_rays(1)[0])
+        bvh = world._bvh
+        world.freeze()
+        world.objects[1].material.color = Color(1, 0, 0)
+        self.assertIsNone(world.frozen)
+        self.assertIs(bvh, world._bvh)
+
+    def test_material_changes_after_pickling_unfreeze_world(self):
+        world = self.setup_world()
+        world.freeze()
+        copy = pickle.loads(pickle.dumps(world))
+        copy.objects[1].material.color = Color(1, 0, 0)
+        self.assertIsNone(copy.frozen)
+        self.assertIsNotNone(world.frozen)
+
+    def test_frozen_world_stays_frozen_when_pickled(self):
+        world = self.setup_world()
+        world.freeze()
+        copy = pickle.loads(pickle.dumps(world))
+        self.assertIsNotNone(copy.frozen)
+        ray = Ray(Point(0, 1, -5), Vector(0, -0.1, 1).normalize())
+        self.assertEqual(world.color_at(ray), copy.color_at(ray))
+
+    def test_lighting_agrees_with_material_lighting(self):
+        rng = random.Random(11)
+
+        def unit_vector():
+            return Vector(rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1)).normalize()
+
+        spheres = [Sphere() for _ in range(30)]
+        for s in spheres:
+            (s.material.color, s.material.ambient) = (Color(rng.random(), rng.random(), rng.random()), rng.random())
+            (s.material.diffuse, s.material.specular) = (rng.random(), rng.random())
+            s.material.shininess = rng.choice([1, 10, 50, 200, rng.uniform(1, 300)])
+        frozen = FrozenWorld(spheres)
+
+        cases = []
+        for i in range(600):
+            light = Light(Point(rng.uniform(-20, 20), rng.uniform(-20, 20), rng.uniform(-20, 20)),
+                          Color(rng.uniform(0, 2), rng.uniform(0, 2), rng.uniform(0, 2)))
+            position = Point(rng.uniform(-2, 2), rng.uniform(-2, 2), rng.uniform(-2, 2))
+            normal = unit_vector()
+            # Every third eye looks along the reflection of the light, so that the specular term is exercised.
+            eye = -(light.position - position).normalize().reflect(normal) if i % 3 == 0 else unit_vector()
+            cases.append((light, rng.randrange(len(spheres)), position, eye, normal, rng.random() < 0.25))
+
+        for (light, index, position, eye, normal, in_shadow) in cases:
+            expected = spheres[index].material.lighting(light, position, eye, normal, in_shadow)
+            actual = frozen.lighting(light, index, position, eye, normal, in_shadow)
+            np.testing.assert_allclose([expected.red, expected.green, expected.blue],
+                                       [actual.red, actual.green, actual.blue], rtol=1e-12, atol=1e-12)
+
+            many = frozen.lighting_many(light, np.array([[position.x, position.y, position.z]]),
+                                        np.array([[eye.x, eye.y, eye.z]]), np.array([[normal.x, normal.y, normal.z]]),
+                                        np.array([index]), np.array([in_shadow]))
+            np.testing.assert_allclose([expected.red, expected.green, expected.blue], many[0], rtol=1e-12, atol=1e-12)
+
+    def test_empty_frozen_world(self):
+        world = World()
+        world.light = Light(Point(-10, 10, -10), Colors.WHITE)
+        world.freeze()
+        self.assertIsNone(world.closest_hit(Ray(Point(0, 0, 0), Vector(0, 0, 1))))
+        self.assertFalse(world.is_shadowed(Point(0, 0, 0)))
+        self.assertEqual(0, math.fsum(world.color_at_many(np.zeros((2, 3)), np.array([[0, 0, 1.0]] * 2)).ravel()))
@@ -0,0 +1,82 @@
+import math
+import unittest
+
+import numpy as np
+
+from src.ray_tracer_challenge.camera import Camera
+from src.ray_tracer_challenge.color import Color, Colors
+from src.ray_tracer_challenge.gbuffer import GBuffer
+from src.ray_tracer_challenge.intersection import Intersection
+from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.plane import Plane
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.sphere import Sphere
+from src.ray_tracer_challenge.tuple import Light, Point, Vector
+from src.tests.test_world import TestWorld
+
+
+class TestGBuffer(unittest.TestCase):
+    def setup_scene(self):
+        world = TestWorld().setup_world()
+        floor = Plane()
+        floor.transform = Matrix.translation(0, -1, 0)
+        world.objects.append(floor)
+        camera = Camera(22, 18, math.pi / 2)
+        camera.transform = Matrix.view_transform(Point(0, 1, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        return world, camera
+
+    def test_recording_a_hit(self):
+        s = Sphere()
+        gbuffer = GBuffer(2, 1, [Plane(), s])
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        gbuffer.record(1, Intersection(4, s).prepare_computations(r))
+        self.assertEqual([-1, 1], gbuffer.object_ids.tolist())
+        self.assertEqual(4, gbuffer.t[1])
+        self.assertEqual([0, 0, -1], gbuffer.points[1].tolist())
+        self.assertEqual([0, 0, -1], gbuffer.eye_vectors[1].tolist())
+        self.assertEqual([0, 0, -1], gbuffer.normal_vectors[1].tolist())
+        self.assertEqual({1: [1]}, {k: v.tolist() for (k, v) in gbuffer.rows_by_object().items()})
+
+    def test_shading_a_gbuffer_matches_rendering(self):
+        (world, camera) = self.setup_scene()
+        gbuffer = camera.render_gbuffer(world)
+        self.assertEqual(len(gbuffer), 22 * 18)
+        # The smaller sphere is inside the larger one, so no pixel sees it.
+        self.assertEqual({0, 2}, set(gbuffer.rows_by_object()))
+        np.testing.assert_allclose(camera.render(world).pixels, world.shade_gbuffer(gbuffer).pixels, atol=1e-9)
+
+    def test_shading_again_after_changing_a_material(self):
+        (world, camera) = self.setup_scene()
+        gbuffer = camera.render_gbuffer(world)
+        world.shade_gbuffer(gbuffer)
+        world.objects[0].material.color = Color(1, 0, 0)
+        world.objects[2].material.specular = 0
+        np.testing.assert_allclose(camera.render(world).pixels, world.shade_gbuffer(gbuffer).pixels, atol=1e-9)
+
+    def test_shading_again_after_moving_the_light(self):
+        (world, camera) = self.setup_scene()
+        gbuffer = camera.render_gbuffer(world)
+        before = world.shade_gbuffer(gbuffer)
+        world.light = Light(Point(10, 10, -10), Colors.WHITE)
+        after = world.shade_gbuffer(gbuffer)
+        self.assertFalse(np.allclose(before.pixels, after.pixels))
+        np.testing.assert_allclose(camera.render(world).pixels, after.pixels, atol=1e-9)
+
+    def test_shading_a_frozen_world(self):
+        (world, camera) = self.setup_scene()
+        world.freeze()
+        gbuffer = camera.render_gbuffer(world)
+        np.testing.assert_allclose(camera.render(world).pixels, world.shade_gbuffer(gbuffer).pixels, atol=1e-9)
+
+    def test_shadows_are_reused_while_the_light_stays(self):
+        (world, camera) = self.setup_scene()
+        gbuffer = camera.render_gbuffer(world)
+        world.shade_gbuffer(gbuffer)
+        position = (world.light.position.x, world.light.position.y, world.light.position.z)
+        self.assertIsNotNone(gbuffer.shadows(position))
+        self.assertIsNone(gbuffer.shadows((0, 0, 0)))
+
+    def test_shading_a_gbuffer_with_no_hits(self):
+        (world, _) = self.setup_scene()
+        gbuffer = GBuffer(3, 2, world.objects)
+        self.assertEqual(0, world.shade_gbuffer(gbuffer).pixels.sum())
@@ -1,6 +1,8 @@
 import unittest
 
+from src.ray_tracer_challenge.constants import EPSILON
 from src.ray_tracer_challenge.intersection import Intersection, Intersections
+from src.ray_tracer_challenge.matrix import Matrix
 from src.ray_tracer_challenge.ray import Ray
 from src.ray_tracer_challenge.sphere import Sphere
 from src.ray_tracer_challenge.tuple import Point, Vector
@@ -83,3 +85,12 @@ class TestIntersection(unittest.TestCase):
         self.assertEqual(Vector(0, 0, -1), comps.eye_vector)
         self.assertTrue(comps.inside)
         self.assertEqual(Vector(0, 0, -1), comps.normal_vector)
+
+    def test_hit_offsets_the_point(self):
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        shape = Sphere()
+        shape.transform = Matrix.translation(0, 0, 1)
+        i = Intersection(5, shape)
+        comps = i.prepare_computations(r)
+        self.assertLess(comps.over_point.z, -EPSILON / 2)
+        self.assertGreater(comps.point.z, comps.over_point.z)
@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from src.ray_tracer_challenge.color import Color
 from src.ray_tracer_challenge.material import Material
 from src.ray_tracer_challenge.tuple import Light, Point, Vector
@@ -58,3 +60,39 @@ class TestMaterial(unittest.TestCase):
         light = Light(Point(0, 0, 10), Color(1, 1, 1))
         result = m.lighting(light, position, eye_v, normal_v)
         self.assertEqual(Color(0.1, 0.1, 0.1), result)
+
+    def test_lighting_with_surface_in_shadow(self):
+        m = Material()
+        position = Point(0, 0, 0)
+        normal_v = Vector(0, 0, -1)
+        eye_v = Vector(0, 0, -1)
+        light = Light(Point(0, 0, -10), Color(1, 1, 1))
+        result = m.lighting(light, position, eye_v, normal_v, in_shadow=True)
+        self.assertEqual(Color(0.1, 0.1, 0.1), result)
+
+    def test_lighting_many_with_surfaces_in_shadow(self):
+        m = Material()
+        light = Light(Point(0, 0, -10), Color(1, 1, 1))
+        positions = np.zeros((2, 3))
+        vectors = np.array([[0, 0, -1], [0, 0, -1]], dtype=float)
+        result = m.lighting_many(light, positions, vectors, vectors, np.array([True, False]))
+        self.assertEqual(Color(0.1, 0.1, 0.1), Color(*result[0]))
+        self.assertEqual(Color(1.9, 1.9, 1.9), Color(*result[1]))
+
+    def test_lighting_many_agrees_with_lighting(self):
+        m = Material()
+        m.color = Color(0.8, 1.0, 0.6)
+        normal_v = Vector(0, 0, -1)
+        position = Point(0, 0, 0)
+        eye_vectors = [Vector(0, 0, -1), Vector(0, 2 ** 0.5 / 2, -2 ** 0.5 / 2), Vector(0, -2 ** 0.5 / 2, -2 ** 0.5 / 2)]
+        lights = [Light(Point(0, 0, -10), Color(1, 1, 1)), Light(Point(0, 10, -10), Color(1, 0.5, 1)),
+                  Light(Point(0, 0, 10), Color(1, 1, 1))]
+        for light in lights:
+            count = len(eye_vectors)
+            positions = np.tile([position.x, position.y, position.z], (count, 1)).astype(float)
+            eyes = np.array([[v.x, v.y, v.z] for v in eye_vectors])
+            normals = np.tile([normal_v.x, normal_v.y, normal_v.z], (count, 1)).astype(float)
+            result = m.lighting_many(light, positions, eyes, normals)
+            self.assertEqual((count, 3), result.shape)
+            for i, eye_v in enumerate(eye_vectors):
+                self.assertEqual(m.lighting(light, position, eye_v, normal_v), Color(*result[i]))
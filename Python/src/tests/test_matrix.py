@@ -40,6 +40,15 @@ class TestMatrix(unittest.TestCase):
         self.assertEqual(3, m[1, 0])
         self.assertEqual(4, m[1, 1])
 
+    def test_matrix_can_construct_zero_matrix_from_size(self):
+        m = Matrix(2, 3)
+        self.assertEqual(2, m.rows)
+        self.assertEqual(3, m.columns)
+        self.assertEqual(Matrix([[0, 0, 0], [0, 0, 0]]), m)
+        m[1, 2] = 5
+        self.assertEqual(5, m[1, 2])
+        self.assertEqual(0, m[1, 1])
+
     def test_matix_unequal_rows_raises_value_error(self):
         with self.assertRaises(ValueError):
             Matrix([[1, 2], [3, 4, 5]])
@@ -101,6 +110,14 @@ class TestMatrix(unittest.TestCase):
 
         self.assertEqual(expected_product, m1 * m2)
 
+    def test_matrix_multiplied_by_non_square_matrix(self):
+        m1 = Matrix([[1, 2, 3],
+                     [4, 5, 6]])
+        m2 = Matrix([[7, 8],
+                     [9, 10],
+                     [11, 12]])
+        self.assertEqual(Matrix([[58, 64], [139, 154]]), m1 * m2)
+
     def test_matrix_multiplied_by_identity_matrix(self):
         m = Matrix([[0, 1, 2, 4],
                     [1, 2, 4, 8],
@@ -254,3 +271,30 @@ class TestMatrix(unittest.TestCase):
                     [6, -2, 0, 5]])
         c = a * b
         self.assertEqual(a, c * b.inverse())
+
+    def test_matrix_inverse_4_by_4_matches_cofactors(self):
+        matrix = Matrix([[8, -5, 9, 2],
+                         [7, 5, 6, 1],
+                         [-6, 0, 9, 6],
+                         [-3, 0, -9, -4]])
+        determinant = matrix.determinant()
+        inverse = matrix.inverse()
+        for row in range(4):
+            for column in range(4):
+                self.assertAlmostEqual(matrix.cofactor(row, column) / determinant, inverse[column, row])
+
+    def test_matrix_inverse_3_by_3(self):
+        matrix = Matrix([[1, 2, 6],
+                         [-5, 8, -4],
+                         [2, 6, 4]])
+        self.assertEqual(Matrix.identity(3), matrix * matrix.inverse())
+
+    def test_matrix_inverse_of_singular_matrix_raises_value_error(self):
+        not_invertible_matrix = Matrix([[-4, 2, -2, -3],
+                                        [9, 6, 2, 6],
+                                        [0, -5, 1, -5],
+                                        [0, 0, 0, 0]])
+        with self.assertRaises(ValueError):
+            not_invertible_matrix.inverse()
+        with self.assertRaises(ValueError):
+            Matrix([[1, 2, 3], [2, 4, 6], [0, 1, 1]]).inverse()
@@ -0,0 +1,28 @@
+import argparse
+import unittest
+
+from src.memory_profile import PHASES, format_report, profile_render_memory
+from src.utils import Resolution, parse_resolution, resolution_720p
+
+
+class TestMemoryProfile(unittest.TestCase):
+    def test_profiling_a_render(self):
+        phases = profile_render_memory(Resolution(8, 6), top=3)
+        self.assertEqual(list(PHASES), [phase.name for phase in phases])
+        by_name = {phase.name: phase for phase in phases}
+        # Every pixel keeps a Ray, with its origin and direction, until the end of the profile.
+        self.assertLessEqual(48 * 2, by_name['ray generation'].blocks)
+        self.assertLess(0, by_name['shading'].retained)
+        for phase in phases:
+            self.assertLessEqual(phase.retained, phase.peak)
+            self.assertLessEqual(len(phase.top), 3)
+        report = format_report(phases, 48)
+        for name in PHASES:
+            self.assertIn(name, report)
+
+    def test_parsing_resolutions(self):
+        self.assertEqual(resolution_720p, parse_resolution('720p'))
+        self.assertEqual(Resolution(160, 90), parse_resolution('160x90'))
+        for value in ('large', '0x0', '160x0', '0x90', '-160x90', '160x-90'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_resolution(value)
@@ -0,0 +1,91 @@
+import math
+import random
+import unittest
+
+import numpy as np
+
+from src.ray_tracer_challenge.bounds import BoundingBox
+from src.ray_tracer_challenge.color import Color
+from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.mesh import Mesh
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.sphere import Sphere
+from src.ray_tracer_challenge.triangle import SmoothTriangle, Triangle
+from src.ray_tracer_challenge.tuple import Light, Point, Vector
+from src.ray_tracer_challenge.world import World
+
+
+def octahedron():
+    vertices = [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)]
+    faces = [(0, 2, 4), (2, 1, 4), (1, 3, 4), (3, 0, 4), (2, 0, 5), (1, 2, 5), (3, 1, 5), (0, 3, 5)]
+    return vertices, faces
+
+
+class TestMesh(unittest.TestCase):
+    def test_mesh_agrees_with_separate_triangles(self):
+        (vertices, faces) = octahedron()
+        mesh = Mesh(vertices, faces)
+        triangles = [Triangle(*(Point(*vertices[i]) for i in face)) for face in faces]
+        rng = random.Random(3)
+        for _ in range(50):
+            r = Ray(Point(rng.uniform(-2, 2), rng.uniform(-2, 2), -5),
+                    Vector(rng.uniform(-0.3, 0.3), rng.uniform(-0.3, 0.3), 1))
+            expected = sorted(x.t for t in triangles for x in t.intersect(r).intersections)
+            xs = mesh.intersect(r)
+            self.assertEqual(len(expected), xs.count)
+            for (t, x) in zip(expected, xs.intersections):
+                self.assertAlmostEqual(t, x.t)
+                self.assertEqual(triangles[x.face].normal, mesh.normal_at(r.position(x.t), x))
+                self.assertEqual(triangles[x.face].normal, mesh.normal_at(r.position(x.t)))
+            hit = mesh.nearest_hit(r, 0, math.inf)
+            if expected:
+                self.assertAlmostEqual(expected[0], hit.t)
+            else:
+                self.assertIsNone(hit)
+
+    def test_mesh_is_a_bounded_shape(self):
+        (vertices, faces) = octahedron()
+        mesh = Mesh(vertices, faces)
+        mesh.transform = Matrix.translation(0, 2, 0)
+        self.assertEqual(BoundingBox(Point(-1, 1, -1), Point(1, 3, 1)), mesh.bounds())
+
+    def test_smooth_faces_interpolate_normals(self):
+        vertices = [(0, 1, 0), (-1, 0, 0), (1, 0, 0)]
+        normals = [(0, 1, 0), (-1, 0, 0), (1, 0, 0)]
+        mesh = Mesh(vertices, [(0, 1, 2)], normals, [(0, 1, 2)])
+        tri = SmoothTriangle(Point(0, 1, 0), Point(-1, 0, 0), Point(1, 0, 0),
+                             Vector(0, 1, 0), Vector(-1, 0, 0), Vector(1, 0, 0))
+        r = Ray(Point(-0.2, 0.3, -2), Vector(0, 0, 1))
+        hit = mesh.intersect(r)[0]
+        self.assertAlmostEqual(0.45, hit.u)
+        self.assertAlmostEqual(0.25, hit.v)
+        expected = tri.normal_at(r.position(hit.t), tri.intersect(r)[0])
+        self.assertEqual(expected, mesh.normal_at(r.position(hit.t), hit))
+        self.assertEqual(expected, mesh.normal_at(r.position(hit.t)))
+
+    def test_invalid_indices(self):
+        with self.assertRaises(ValueError):
+            Mesh([(0, 0, 0), (1, 0, 0)], [(0, 1, 2)])
+
+    def test_mesh_in_world(self):
+        (vertices, faces) = octahedron()
+        mesh = Mesh(vertices, faces)
+        mesh.transform = Matrix.translation(0, 0, 2)
+        sphere = Sphere()
+        sphere.transform = Matrix.translation(3, 0, 0)
+        world = World()
+        world.objects.extend([mesh, sphere])
+        world.light = Light(Point(-10, 10, -10), Color(1, 1, 1))
+
+        r = Ray(Point(0.1, 0.1, -5), Vector(0, 0, 1))
+        hit = world.closest_hit(r)
+        self.assertIs(mesh, hit.object)
+        self.assertAlmostEqual(6.2, hit.t)
+        self.assertEqual(2, world.intersect(r).count)
+
+        origins = np.array([[0.1, 0.1, -5], [3, 0, -5], [10, 10, -5]], dtype=float)
+        directions = np.array([[0, 0, 1], [0, 0, 1], [0, 0, 1]], dtype=float)
+        colors = world.color_at_many(origins, directions)
+        for i in range(len(origins)):
+            color = world.color_at(Ray(Point(*origins[i]), Vector(*directions[i])))
+            np.testing.assert_allclose([color.red, color.green, color.blue], colors[i], atol=1e-5)
@@ -0,0 +1,70 @@
+import io
+import os
+import tempfile
+import unittest
+
+from src.ray_tracer_challenge.obj_file import load_obj, parse_obj
+
+
+class TestObjFile(unittest.TestCase):
+    def test_ignoring_unrecognized_lines(self):
+        gibberish = io.StringIO("There was a young lady named Bright\n"
+                                "who traveled much faster than light.\n"
+                                "She set out one day\n"
+                                "in a relative way,\n"
+                                "and came back the previous night.\n")
+        obj = parse_obj(gibberish)
+        self.assertEqual(5, obj.ignored_lines)
+        self.assertEqual(0, obj.vertex_count)
+
+    def test_vertex_records(self):
+        obj = parse_obj(io.StringIO("v -1 1 0\nv -1.0000 0.5000 0.0000\nv 1 0 0\nv 1 1 0\n"))
+        self.assertEqual(4, obj.vertex_count)
+        self.assertEqual([-1, 1, 0, -1, 0.5, 0, 1, 0, 0, 1, 1, 0], list(obj.vertices))
+
+    def test_triangle_faces(self):
+        obj = parse_obj(io.StringIO("v -1 1 0\nv -1 0 0\nv 1 0 0\nv 1 1 0\n\nf 1 2 3\nf 1 3 4\n"))
+        self.assertEqual(2, obj.face_count)
+        self.assertEqual([0, 1, 2, 0, 2, 3], list(obj.faces))
+        self.assertEqual([-1] * 6, list(obj.face_normals))
+
+    def test_triangulating_polygons(self):
+        obj = parse_obj(io.StringIO("v -1 1 0\nv -1 0 0\nv 1 0 0\nv 1 1 0\nv 0 2 0\n\nf 1 2 3 4 5\n"))
+        self.assertEqual(3, obj.face_count)
+        self.assertEqual([0, 1, 2, 0, 2, 3, 0, 3, 4], list(obj.faces))
+
+    def test_vertex_normal_records(self):
+        obj = parse_obj(io.StringIO("vn 0 0 1\nvn 0.707 0 -0.707\nvn 1 2 3\n"))
+        self.assertEqual(3, obj.normal_count)
+        self.assertEqual([0, 0, 1, 0.707, 0, -0.707, 1, 2, 3], list(obj.normals))
+
+    def test_faces_with_normals(self):
+        obj = parse_obj(io.StringIO("v 0 1 0\nv -1 0 0\nv 1 0 0\n"
+                                    "vn -1 0 0\nvn 1 0 0\nvn 0 1 0\n"
+                                    "f 1//3 2//1 3//2\nf 1/0/3 2/102/1 3/14/2\n"))
+        self.assertEqual([0, 1, 2, 0, 1, 2], list(obj.faces))
+        self.assertEqual([2, 0, 1, 2, 0, 1], list(obj.face_normals))
+
+    def test_negative_indices_are_relative(self):
+        obj = parse_obj(io.StringIO("v 0 0 0\nv 1 0 0\nv 0 1 0\nf -3 -2 -1\n"))
+        self.assertEqual([0, 1, 2], list(obj.faces))
+
+    def test_invalid_lines_raise_with_line_number(self):
+        with self.assertRaisesRegex(ValueError, "line 2"):
+            parse_obj(io.StringIO("v 0 0 0\nf 1 2 3\n"))
+        with self.assertRaisesRegex(ValueError, "line 1"):
+            parse_obj(io.StringIO("v 0 zero 0\n"))
+        with self.assertRaises(ValueError):
+            parse_obj(io.StringIO("v 0 0 0\nv 1 0 0\nf 1 2\n"))
+
+    def test_load_obj_and_convert_to_mesh(self):
+        (handle, path) = tempfile.mkstemp(suffix='.obj')
+        try:
+            with os.fdopen(handle, 'w') as f:
+                f.write("# a square\nv -1 1 0\nv -1 0 0\nv 1 0 0\nv 1 1 0\ng square\nf 1 2 3 4\n")
+            obj = load_obj(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(1, obj.ignored_lines)
+        mesh = obj.to_mesh()
+        self.assertEqual(2, mesh.face_count)
@@ -0,0 +1,81 @@
+import math
+import unittest
+
+import numpy as np
+
+from src.ray_tracer_challenge.material import Material
+from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.plane import Plane
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.tuple import Point, Vector
+
+
+class TestPlane(unittest.TestCase):
+    def test_normal_of_plane_is_constant_everywhere(self):
+        p = Plane()
+        self.assertEqual(Vector(0, 1, 0), p.normal_at(Point(0, 0, 0)))
+        self.assertEqual(Vector(0, 1, 0), p.normal_at(Point(10, 0, -10)))
+        self.assertEqual(Vector(0, 1, 0), p.normal_at(Point(-5, 0, 150)))
+
+    def test_normal_of_transformed_plane(self):
+        p = Plane()
+        p.transform = Matrix.translation(0, 0, 5) * Matrix.rotation_x(math.pi / 2)
+        self.assertEqual(Vector(0, 0, 1), p.normal_at(Point(3, 4, 5)))
+
+    def test_intersect_with_ray_parallel_to_plane(self):
+        p = Plane()
+        r = Ray(Point(0, 10, 0), Vector(0, 0, 1))
+        self.assertEqual(0, p.intersect(r).count)
+
+    def test_intersect_with_coplanar_ray(self):
+        p = Plane()
+        r = Ray(Point(0, 0, 0), Vector(0, 0, 1))
+        self.assertEqual(0, p.intersect(r).count)
+
+    def test_ray_intersecting_plane_from_above(self):
+        p = Plane()
+        r = Ray(Point(0, 1, 0), Vector(0, -1, 0))
+        xs = p.intersect(r)
+        self.assertEqual(1, xs.count)
+        self.assertEqual(1, xs[0].t)
+        self.assertIs(p, xs[0].object)
+
+    def test_ray_intersecting_plane_from_below(self):
+        p = Plane()
+        r = Ray(Point(0, -1, 0), Vector(0, 1, 0))
+        xs = p.intersect(r)
+        self.assertEqual(1, xs.count)
+        self.assertEqual(1, xs[0].t)
+        self.assertIs(p, xs[0].object)
+
+    def test_ray_intersecting_transformed_plane(self):
+        p = Plane()
+        p.transform = Matrix.translation(0, 0, 5) * Matrix.rotation_x(math.pi / 2)
+        r = Ray(Point(0, 1, 0), Vector(0, 0, 1))
+        xs = p.intersect(r)
+        self.assertEqual(1, xs.count)
+        self.assertAlmostEqual(5, xs[0].t)
+        self.assertAlmostEqual(5, p.nearest_hit(r, 0, 10).t)
+        self.assertIsNone(p.nearest_hit(r, 0, 5))
+
+    def test_plane_is_unbounded(self):
+        self.assertFalse(Plane().bounds().is_bounded())
+
+    def test_intersect_many_agrees_with_intersect(self):
+        p = Plane()
+        p.transform = Matrix.translation(0, -1, 0) * Matrix.rotation_z(0.3)
+        rays = [Ray(Point(0, 1, 0), Vector(0, -1, 0)),
+                Ray(Point(0, 10, 0), Vector(1, 0, 0)),
+                Ray(Point(2, -5, 1), Vector(0.2, 1, 0).normalize())]
+        origins = np.array([[r.origin.x, r.origin.y, r.origin.z] for r in rays])
+        directions = np.array([[r.direction.x, r.direction.y, r.direction.z] for r in rays])
+        t_near, t_far, hit_mask = p.intersect_many(origins, directions)
+        for i, r in enumerate(rays):
+            xs = p.intersect(r)
+            self.assertEqual(xs.count == 1, hit_mask[i])
+            if xs.count:
+                self.assertAlmostEqual(xs[0].t, t_near[i])
+                self.assertAlmostEqual(xs[0].t, t_far[i])
+
+    def test_plane_has_default_material(self):
+        self.assertEqual(Material(), Plane().material)
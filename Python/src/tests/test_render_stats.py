@@ -0,0 +1,46 @@
+import unittest
+
+from src.ray_tracer_challenge.render_stats import RenderStats
+
+
+class TestRenderStats(unittest.TestCase):
+    def test_new_stats_are_empty(self):
+        stats = RenderStats()
+        self.assertEqual(0, stats.primary_rays)
+        self.assertEqual(0, stats.total_intersection_tests)
+        self.assertEqual({'ray_generation': 0.0, 'intersection': 0.0, 'shadows': 0.0, 'shading': 0.0},
+                         stats.phase_times)
+
+    def test_counted_hit_function(self):
+        stats = RenderStats()
+        hit_fn = stats.counted(lambda item, ray, t_min, t_max: item if t_min <= item < t_max else None,
+                               lambda item: "odd" if item % 2 else "even")
+        self.assertEqual(3, hit_fn(3, None, 0, 10))
+        self.assertIsNone(hit_fn(4, None, 0, 2))
+        self.assertIsNone(hit_fn(6, None, 0, 2))
+        self.assertEqual({"odd": 1, "even": 2}, stats.intersection_tests)
+        self.assertEqual(3, stats.total_intersection_tests)
+
+    def test_merging_stats(self):
+        (a, b) = (RenderStats(), RenderStats())
+        a.primary_rays = 10
+        a.hits = 4
+        a.count_tests("Sphere", 7)
+        a.add_time('shading', 1.5)
+        a.wall_time = 2.0
+        b.primary_rays = 5
+        b.shadow_rays = 3
+        b.lighting_calls = 3
+        b.count_tests("Sphere", 2)
+        b.count_tests("Plane", 1)
+        b.add_time('shading', 0.5)
+        b.wall_time = 3.0
+        self.assertIs(a, a.merge(b))
+        self.assertEqual(15, a.primary_rays)
+        self.assertEqual(3, a.shadow_rays)
+        self.assertEqual(4, a.hits)
+        self.assertEqual(3, a.lighting_calls)
+        self.assertEqual({"Sphere": 9, "Plane": 1}, a.intersection_tests)
+        self.assertEqual(2.0, a.phase_times['shading'])
+        self.assertEqual(3.0, a.wall_time)
+        self.assertEqual(1, b.intersection_tests["Plane"])
@@ -0,0 +1,116 @@
+import math
+import unittest
+
+import numpy as np
+
+from src.ray_tracer_challenge.bounds import BoundingBox
+from src.ray_tracer_challenge.intersection import Intersection, Intersections
+from src.ray_tracer_challenge.material import Material
+from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.shape import Shape
+from src.ray_tracer_challenge.tuple import Point, Vector
+
+
+class _TestShape(Shape):
+    """
+    Records the object space ray, and uses the object space point as the normal.
+    Intersects as the unit sphere would, but only through the default (non-vectorized) paths.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.saved_ray = None
+
+    def local_bounds(self) -> BoundingBox:
+        return BoundingBox(Point(-1, -1, -1), Point(1, 1, 1))
+
+    def local_intersect(self, ray: Ray) -> Intersections:
+        self.saved_ray = ray
+        to_ray = ray.origin - Point(0, 0, 0)
+        a = ray.direction.dot(ray.direction)
+        b = 2 * ray.direction.dot(to_ray)
+        c = to_ray.dot(to_ray) - 1
+        discriminant = b ** 2 - 4 * a * c
+        if discriminant < 0:
+            return Intersections()
+        return Intersections(Intersection((-b + discriminant ** 0.5) / (2 * a), self),
+                             Intersection((-b - discriminant ** 0.5) / (2 * a), self))
+
+    def local_normal_at(self, p: Point, hit: Intersection = None) -> Vector:
+        return Vector(p.x, p.y, p.z)
+
+
+class TestShape(unittest.TestCase):
+    def test_shape_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Shape()
+
+    def test_default_transformation(self):
+        s = _TestShape()
+        self.assertEqual(Matrix.identity(), s.transform)
+        self.assertEqual(Matrix.identity(), s.inverse_transform)
+
+    def test_assigning_transformation_updates_cached_inverses(self):
+        s = _TestShape()
+        s.transform = Matrix.translation(2, 3, 4)
+        self.assertEqual(Matrix.translation(-2, -3, -4), s.inverse_transform)
+        self.assertEqual(Matrix.translation(-2, -3, -4).transpose(), s.inverse_transpose)
+
+    def test_default_material(self):
+        self.assertEqual(Material(), _TestShape().material)
+
+    def test_intersect_scaled_shape_with_ray(self):
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        s = _TestShape()
+        s.transform = Matrix.scaling(2, 2, 2)
+        s.intersect(r)
+        self.assertEqual(Point(0, 0, -2.5), s.saved_ray.origin)
+        self.assertEqual(Vector(0, 0, 0.5), s.saved_ray.direction)
+
+    def test_intersect_translated_shape_with_ray(self):
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        s = _TestShape()
+        s.transform = Matrix.translation(5, 0, 0)
+        s.intersect(r)
+        self.assertEqual(Point(-5, 0, -5), s.saved_ray.origin)
+        self.assertEqual(Vector(0, 0, 1), s.saved_ray.direction)
+
+    def test_normal_on_translated_shape(self):
+        s = _TestShape()
+        s.transform = Matrix.translation(0, 1, 0)
+        self.assertEqual(Vector(0, 0.70711, -0.70711), s.normal_at(Point(0, 1.70711, -0.70711)))
+
+    def test_normal_on_transformed_shape(self):
+        s = _TestShape()
+        s.transform = Matrix.scaling(1, 0.5, 1) * Matrix.rotation_z(math.pi / 5)
+        self.assertEqual(Vector(0, 0.97014, -0.24254), s.normal_at(Point(0, 2 ** 0.5 / 2, -2 ** 0.5 / 2)))
+
+    def test_bounds_are_transformed_local_bounds(self):
+        s = _TestShape()
+        s.transform = Matrix.translation(1, 0, 0) * Matrix.scaling(2, 2, 2)
+        self.assertEqual(BoundingBox(Point(-1, -2, -2), Point(3, 2, 2)), s.bounds())
+
+    def test_default_nearest_hit_picks_nearest_in_range(self):
+        s = _TestShape()
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        self.assertEqual(4, s.nearest_hit(r, 0, 10).t)
+        self.assertEqual(6, s.nearest_hit(r, 5, 10).t)
+        self.assertIsNone(s.nearest_hit(r, 0, 4))
+
+    def test_default_batch_methods_agree_with_scalar_methods(self):
+        s = _TestShape()
+        s.transform = Matrix.translation(0.5, 0, 0) * Matrix.scaling(2, 1, 1)
+        origins = np.array([[0, 0, -5], [0, 3, -5], [1, 0.5, -5]], dtype=float)
+        directions = np.array([[0, 0, 1], [0, 0, 1], [0, 0, 1]], dtype=float)
+        t_near, t_far, hit_mask = s.intersect_many(origins, directions)
+        for i in range(len(origins)):
+            r = Ray(Point(*origins[i]), Vector(*directions[i]))
+            xs = s.intersect(r)
+            self.assertEqual(xs.count > 0, hit_mask[i])
+            if xs.count:
+                self.assertAlmostEqual(min(x.t for x in xs.intersections), t_near[i])
+                self.assertAlmostEqual(max(x.t for x in xs.intersections), t_far[i])
+                point = r.position(t_near[i])
+                normal = s.normal_at_many(np.array([[point.x, point.y, point.z]]))[0]
+                self.assertEqual(s.normal_at(point), Vector(*normal))
@@ -1,9 +1,12 @@
 import math
 import unittest
 
+import numpy as np
+
 from src.ray_tracer_challenge.material import Material
 from src.ray_tracer_challenge.matrix import Matrix
 from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.shape import Shape
 from src.ray_tracer_challenge.sphere import Sphere
 from src.ray_tracer_challenge.tuple import Point, Vector
 
@@ -19,6 +22,17 @@ class TestSphere(unittest.TestCase):
         s.transform = t
         self.assertIs(s.transform, t)
 
+    def test_inverse_transform_is_cached_until_transform_changes(self):
+        s = Sphere()
+        s.transform = Matrix.translation(2, 3, 4)
+        inverse = s.inverse_transform
+        self.assertEqual(Matrix.translation(-2, -3, -4), inverse)
+        self.assertEqual(inverse.transpose(), s.inverse_transpose)
+        self.assertIs(inverse, s.inverse_transform)
+
+        s.transform = Matrix.scaling(2, 2, 2)
+        self.assertEqual(Matrix.scaling(0.5, 0.5, 0.5), s.inverse_transform)
+
     def test_intersect_scaled_sphere_with_ray(self):
         r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
         s = Sphere()
@@ -83,3 +97,97 @@ class TestSphere(unittest.TestCase):
         m.ambient = 1
         s.material = m
         self.assertIs(m, s.material)
+
+    def test_intersect_many_agrees_with_intersect(self):
+        rays = [Ray(Point(0, 0, -5), Vector(0, 0, 1)),
+                Ray(Point(0, 1, -5), Vector(0, 0, 1)),
+                Ray(Point(0, 2, -5), Vector(0, 0, 1)),
+                Ray(Point(0, 0, 0), Vector(0, 0, 1)),
+                Ray(Point(0, 0, 5), Vector(0, 0, 1))]
+        origins = np.array([[r.origin.x, r.origin.y, r.origin.z] for r in rays])
+        directions = np.array([[r.direction.x, r.direction.y, r.direction.z] for r in rays])
+
+        for transform in (Matrix.identity(), Matrix.scaling(2, 2, 2), Matrix.translation(5, 0, 0),
+                          Matrix.scaling(1, 0.5, 1) * Matrix.rotation_z(math.pi / 5)):
+            s = Sphere()
+            s.transform = transform
+            t_near, t_far, hit_mask = s.intersect_many(origins, directions)
+            for i, r in enumerate(rays):
+                xs = s.intersect(r)
+                self.assertEqual(xs.count == 2, hit_mask[i])
+                if xs.count == 2:
+                    self.assertAlmostEqual(xs[0].t, t_near[i])
+                    self.assertAlmostEqual(xs[1].t, t_far[i])
+                else:
+                    self.assertEqual(np.inf, t_near[i])
+                    self.assertEqual(np.inf, t_far[i])
+
+    def test_normal_at_many_agrees_with_normal_at(self):
+        s = Sphere()
+        s.transform = Matrix.translation(0, 1, 0) * Matrix.scaling(1, 0.5, 1) * Matrix.rotation_z(math.pi / 5)
+        points = [s.transform * Point(1, 0, 0), s.transform * Point(0, 2 ** 0.5 / 2, -(2 ** 0.5) / 2)]
+        normals = s.normal_at_many(np.array([[p.x, p.y, p.z] for p in points]))
+        for i, p in enumerate(points):
+            self.assertEqual(s.normal_at(p), Vector(*normals[i]))
+
+    def test_nearest_hit_within_range(self):
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        s = Sphere()
+        s.transform = Matrix.scaling(2, 2, 2)
+        self.assertEqual(3, s.nearest_hit(r, 0, 100).t)
+        self.assertIs(s, s.nearest_hit(r, 0, 100).object)
+        self.assertEqual(7, s.nearest_hit(r, 3.5, 100).t)
+        self.assertIsNone(s.nearest_hit(r, 0, 3))
+        self.assertIsNone(s.nearest_hit(r, 7.5, 100))
+
+    def test_translation_and_uniform_scaling_is_detected(self):
+        s = Sphere()
+        self.assertEqual(Point(0, 0, 0), s.center)
+        self.assertEqual(1, s.radius)
+        s.transform = Matrix.translation(1.5, 0.5, -0.5) * Matrix.scaling(0.5, 0.5, 0.5)
+        self.assertEqual(Point(1.5, 0.5, -0.5), s.center)
+        self.assertEqual(0.5, s.radius)
+        s.transform = Matrix.scaling(1, 0.5, 1)
+        self.assertIsNone(s.center)
+        self.assertIsNone(s.radius)
+        s.transform = Matrix.rotation_y(math.pi / 4)
+        self.assertIsNone(s.radius)
+
+    def test_sphere_with_center_and_radius(self):
+        s = Sphere(Point(1, 2, 3), 2)
+        self.assertEqual(Matrix.translation(1, 2, 3) * Matrix.scaling(2, 2, 2), s.transform)
+        self.assertEqual(Point(1, 2, 3), s.center)
+        self.assertEqual(2, s.radius)
+        self.assertEqual(Point(0, 0, 0), Sphere(radius=3).center)
+        self.assertEqual(1, Sphere(Point(1, 0, 0)).radius)
+        with self.assertRaises(ValueError):
+            Sphere(Point(0, 0, 0), 0)
+
+    def test_fast_path_agrees_with_general_path(self):
+        s = Sphere(Point(0.5, -1, 2), 1.5)
+        rays = [Ray(Point(0, 0, -5), Vector(0, 0, 1)),
+                Ray(Point(0.5, -1, 2), Vector(0.2, 0.3, 1).normalize()),
+                Ray(Point(3, 3, -5), Vector(0, 0, 1)),
+                Ray(Point(-2, 0.5, -3), Vector(0.3, -0.2, 0.9))]
+        for r in rays:
+            fast = s.intersect(r)
+            general = Shape.intersect(s, r)
+            self.assertEqual(general.count, fast.count)
+            for (expected, actual) in zip(general.intersections, fast.intersections):
+                self.assertAlmostEqual(expected.t, actual.t)
+                point = r.position(actual.t)
+                self.assertEqual(Shape.normal_at(s, point), s.normal_at(point))
+            expected = Shape.nearest_hit(s, r, 0, 100)
+            actual = s.nearest_hit(r, 0, 100)
+            self.assertEqual(expected is None, actual is None)
+            if actual is not None:
+                self.assertAlmostEqual(expected.t, actual.t)
+        self.assertEqual(Shape.bounds(s), s.bounds())
+
+        origins = np.array([[r.origin.x, r.origin.y, r.origin.z] for r in rays])
+        directions = np.array([[r.direction.x, r.direction.y, r.direction.z] for r in rays])
+        general = Shape.intersect_many(s, origins, directions)
+        for (expected, actual) in zip(general, s.intersect_many(origins, directions)):
+            np.testing.assert_allclose(expected, actual)
+        points = origins + directions
+        np.testing.assert_allclose(Shape.normal_at_many(s, points), s.normal_at_many(points))
@@ -0,0 +1,80 @@
+import unittest
+
+from src.ray_tracer_challenge.bounds import BoundingBox
+from src.ray_tracer_challenge.intersection import Intersection
+from src.ray_tracer_challenge.ray import Ray
+from src.ray_tracer_challenge.triangle import SmoothTriangle, Triangle
+from src.ray_tracer_challenge.tuple import Point, Vector
+
+
+class TestTriangle(unittest.TestCase):
+    def setUp(self):
+        self.t = Triangle(Point(0, 1, 0), Point(-1, 0, 0), Point(1, 0, 0))
+
+    def test_constructing_triangle(self):
+        self.assertEqual(Point(0, 1, 0), self.t.p1)
+        self.assertEqual(Point(-1, 0, 0), self.t.p2)
+        self.assertEqual(Point(1, 0, 0), self.t.p3)
+        self.assertEqual(Vector(-1, -1, 0), self.t.e1)
+        self.assertEqual(Vector(1, -1, 0), self.t.e2)
+        self.assertEqual(Vector(0, 0, -1), self.t.normal)
+
+    def test_normal_on_triangle(self):
+        self.assertEqual(self.t.normal, self.t.normal_at(Point(0, 0.5, 0)))
+        self.assertEqual(self.t.normal, self.t.normal_at(Point(-0.5, 0.75, 0)))
+        self.assertEqual(self.t.normal, self.t.normal_at(Point(0.5, 0.25, 0)))
+
+    def test_bounds_of_triangle(self):
+        self.assertEqual(BoundingBox(Point(-1, 0, 0), Point(1, 1, 0)), self.t.bounds())
+
+    def test_ray_parallel_to_triangle(self):
+        r = Ray(Point(0, -1, -2), Vector(0, 1, 0))
+        self.assertEqual(0, self.t.intersect(r).count)
+
+    def test_ray_misses_p1_p3_edge(self):
+        r = Ray(Point(1, 1, -2), Vector(0, 0, 1))
+        self.assertEqual(0, self.t.intersect(r).count)
+
+    def test_ray_misses_p1_p2_edge(self):
+        r = Ray(Point(-1, 1, -2), Vector(0, 0, 1))
+        self.assertEqual(0, self.t.intersect(r).count)
+
+    def test_ray_misses_p2_p3_edge(self):
+        r = Ray(Point(0, -1, -2), Vector(0, 0, 1))
+        self.assertEqual(0, self.t.intersect(r).count)
+
+    def test_ray_strikes_triangle(self):
+        r = Ray(Point(0, 0.5, -2), Vector(0, 0, 1))
+        xs = self.t.intersect(r)
+        self.assertEqual(1, xs.count)
+        self.assertEqual(2, xs[0].t)
+        self.assertEqual(2, self.t.nearest_hit(r, 0, 10).t)
+        self.assertIsNone(self.t.nearest_hit(r, 0, 2))
+
+
+class TestSmoothTriangle(unittest.TestCase):
+    def setUp(self):
+        self.tri = SmoothTriangle(Point(0, 1, 0), Point(-1, 0, 0), Point(1, 0, 0),
+                                  Vector(0, 1, 0), Vector(-1, 0, 0), Vector(1, 0, 0))
+
+    def test_intersection_stores_u_and_v(self):
+        r = Ray(Point(-0.2, 0.3, -2), Vector(0, 0, 1))
+        xs = self.tri.intersect(r)
+        self.assertAlmostEqual(0.45, xs[0].u)
+        self.assertAlmostEqual(0.25, xs[0].v)
+
+    def test_normal_is_interpolated_with_u_and_v(self):
+        i = Intersection(1, self.tri, 0.45, 0.25)
+        self.assertEqual(Vector(-0.5547, 0.83205, 0), self.tri.normal_at(Point(0, 0, 0), i))
+
+    def test_normal_without_hit_uses_the_point(self):
+        r = Ray(Point(-0.2, 0.3, -2), Vector(0, 0, 1))
+        hit = self.tri.intersect(r)[0]
+        point = r.position(hit.t)
+        self.assertEqual(self.tri.normal_at(point, hit), self.tri.normal_at(point))
+
+    def test_preparing_normal_on_smooth_triangle(self):
+        r = Ray(Point(-0.2, 0.3, -2), Vector(0, 0, 1))
+        i = Intersection(1, self.tri, 0.45, 0.25)
+        comps = i.prepare_computations(r)
+        self.assertEqual(Vector(-0.5547, 0.83205, 0), comps.normal_vector)
@@ -1,7 +1,9 @@
 """
 Unit tests for the Point class.
 """
+import copy
 import math
+import pickle
 import unittest
 
 from src.ray_tracer_challenge.tuple import Tuple, Point, Vector
@@ -28,6 +30,22 @@ class TestTuple(unittest.TestCase):
         self.assertIsInstance(t, Vector)
         self.assertNotIsInstance(t, Point)
 
+    def test_tuple_invalid_w_raises_type_error(self):
+        with self.assertRaises(TypeError):
+            Tuple(1, 2, 3, 2)
+
+    def test_tuple_has_no_instance_dict(self):
+        self.assertFalse(hasattr(Point(1, 2, 3), "__dict__"))
+        self.assertFalse(hasattr(Vector(1, 2, 3), "__dict__"))
+
+    def test_tuple_can_be_copied_and_pickled(self):
+        p = Point(1, 2, 3)
+        v = Vector(4, 5, 6)
+        self.assertIsInstance(copy.copy(p), Point)
+        self.assertEqual(p, pickle.loads(pickle.dumps(p)))
+        self.assertIsInstance(pickle.loads(pickle.dumps(v)), Vector)
+        self.assertEqual(v, copy.deepcopy(v))
+
     def test_tuple_equality(self):
         t1 = Tuple(0.1, 0.2, (0.2 + 0.1), 1)
         t2 = Tuple(0.1, 0.2, 0.3, 1)
@@ -58,6 +76,10 @@ class TestTuple(unittest.TestCase):
         v = Vector(5, 6, 7)
         self.assertEqual(p - v, Point(-2, -4, -6))
 
+    def test_tuple_subtraction_of_points_returns_vector(self):
+        self.assertIsInstance(Point(3, 2, 1) - Point(5, 6, 7), Vector)
+        self.assertIsInstance(Point(3, 2, 1) - Vector(5, 6, 7), Point)
+
     def test_tuple_subtraction_of_vectors(self):
         v1 = Vector(3, 2, 1)
         v2 = Vector(5, 6, 7)
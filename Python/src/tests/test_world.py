@@ -1,12 +1,16 @@
+import pickle
 import unittest
 
+import numpy as np
+
 from src.ray_tracer_challenge.color import Color, Colors
 from src.ray_tracer_challenge.intersection import Intersection
 from src.ray_tracer_challenge.matrix import Matrix
+from src.ray_tracer_challenge.plane import Plane
 from src.ray_tracer_challenge.ray import Ray
 from src.ray_tracer_challenge.sphere import Sphere
 from src.ray_tracer_challenge.tuple import Light, Point, Vector
-from src.ray_tracer_challenge.world import World
+from src.ray_tracer_challenge.world import ShadowCacheStats, World
 
 
 class TestWorld(unittest.TestCase):
@@ -89,3 +93,184 @@ class TestWorld(unittest.TestCase):
         ray = Ray(Point(0, 0, 0.75), Vector(0, 0, -1))
         color = world.color_at(ray)
         self.assertEqual(inner.material.color, color)
+
+    def test_color_at_many_agrees_with_color_at(self):
+        world = self.setup_world()
+        rays = [Ray(Point(0, 0, -5), Vector(0, 0, 1)),
+                Ray(Point(0, 0, -5), Vector(0, 1, 0)),
+                Ray(Point(0, 0, 0.75), Vector(0, 0, -1)),
+                Ray(Point(0.5, 0.3, -5), Vector(0, 0, 1)),
+                Ray(Point(-3, 2, -5), Vector(0.5, -0.3, 1).normalize())]
+        origins = np.array([[r.origin.x, r.origin.y, r.origin.z] for r in rays])
+        directions = np.array([[r.direction.x, r.direction.y, r.direction.z] for r in rays])
+        colors = world.color_at_many(origins, directions)
+        for i, ray in enumerate(rays):
+            self.assertEqual(world.color_at(ray), Color(*colors[i]))
+
+    def test_intersect_uses_bounding_volume_hierarchy(self):
+        world = World()
+        for i in range(50):
+            s = Sphere()
+            s.transform = Matrix.translation(3 * (i % 10), 3 * (i // 10), 0)
+            world.objects.append(s)
+        ray = Ray(Point(6, 3, -5), Vector(0, 0, 1))
+        intersections = world.intersect(ray)
+        self.assertEqual(2, intersections.count)
+        self.assertIs(world.objects[12], intersections[0].object)
+        self.assertEqual(4, intersections[0].t)
+        self.assertEqual(6, intersections[1].t)
+
+    def test_intersect_sees_objects_added_after_first_intersection(self):
+        world = self.setup_world()
+        ray = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        self.assertEqual(4, world.intersect(ray).count)
+
+        s = Sphere()
+        s.transform = Matrix.translation(0, 0, 5)
+        world.objects.append(s)
+        self.assertEqual(6, world.intersect(ray).count)
+
+        world.objects.remove(s)
+        self.assertEqual(4, world.intersect(ray).count)
+
+        world.objects = [s]
+        self.assertEqual(2, world.intersect(ray).count)
+
+        s.transform = Matrix.translation(0, 5, 5)
+        self.assertEqual(0, world.intersect(ray).count)
+
+    def test_moving_an_object_already_in_the_world(self):
+        world = World()
+        s = Sphere()
+        s.transform = Matrix.translation(10, 0, 0)
+        world.objects.append(s)
+        ray = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        self.assertIsNone(world.closest_hit(ray))
+
+        s.transform = Matrix.identity()
+        self.assertEqual(4, world.closest_hit(ray).t)
+        self.assertEqual(6, world.intersect(ray)[1].t)
+
+        s.transform = Matrix.translation(0, 10, 0)
+        self.assertIsNone(world.closest_hit(ray))
+
+    def test_objects_removed_from_the_world_no_longer_invalidate_it(self):
+        world = self.setup_world()
+        removed = world.objects.pop()
+        ray = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        world.closest_hit(ray)
+        bvh = world._bvh
+        removed.transform = Matrix.translation(0, 5, 0)
+        self.assertIs(bvh, world._bvh)
+
+    def test_moving_an_object_in_an_unpickled_world(self):
+        world = self.setup_world()
+        copy = pickle.loads(pickle.dumps(world))
+        ray = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        self.assertEqual(4, copy.intersect(ray).count)
+        copy.objects[0].transform = Matrix.translation(0, 10, 0)
+        self.assertEqual(2, copy.intersect(ray).count)
+
+    def test_world_can_be_pickled(self):
+        world = self.setup_world()
+        ray = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        world.intersect(ray)
+        copy = pickle.loads(pickle.dumps(world))
+        self.assertEqual(4, copy.intersect(ray).count)
+        copy.objects.pop()
+        self.assertEqual(2, copy.intersect(ray).count)
+
+    def test_closest_hit_agrees_with_intersect_hit(self):
+        world = self.setup_world()
+        rays = [Ray(Point(0, 0, -5), Vector(0, 0, 1)),
+                Ray(Point(0, 0, -5), Vector(0, 1, 0)),
+                Ray(Point(0, 0, 0.75), Vector(0, 0, -1)),
+                Ray(Point(0, 0, 0), Vector(0, 0, 1)),
+                Ray(Point(0.5, 0.3, -5), Vector(0, 0, 1))]
+        for ray in rays:
+            expected = world.intersect(ray).hit()
+            hit = world.closest_hit(ray)
+            if expected is None:
+                self.assertIsNone(hit)
+            else:
+                self.assertEqual(expected.t, hit.t)
+                self.assertIs(expected.object, hit.object)
+
+    def test_closest_hit_respects_t_range(self):
+        world = self.setup_world()
+        ray = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        self.assertEqual(4.5, world.closest_hit(ray, t_min=4.1).t)
+        self.assertIs(world.objects[1], world.closest_hit(ray, t_min=4.1).object)
+        self.assertEqual(6, world.closest_hit(ray, t_min=5.6).t)
+        self.assertIsNone(world.closest_hit(ray, t_max=4))
+        self.assertIsNone(world.closest_hit(ray, t_min=6.5))
+
+    def test_no_shadow_when_nothing_is_collinear_with_point_and_light(self):
+        world = self.setup_world()
+        self.assertFalse(world.is_shadowed(Point(0, 10, 0)))
+
+    def test_shadow_when_object_is_between_point_and_light(self):
+        world = self.setup_world()
+        self.assertTrue(world.is_shadowed(Point(10, -10, 10)))
+
+    def test_no_shadow_when_object_is_behind_light(self):
+        world = self.setup_world()
+        self.assertFalse(world.is_shadowed(Point(-20, 20, -20)))
+
+    def test_no_shadow_when_object_is_behind_point(self):
+        world = self.setup_world()
+        self.assertFalse(world.is_shadowed(Point(-2, 2, -2)))
+
+    def test_shade_hit_is_given_an_intersection_in_shadow(self):
+        world = World()
+        world.light = Light(Point(0, 0, -10), Colors.WHITE)
+        s1 = Sphere()
+        s2 = Sphere()
+        s2.transform = Matrix.translation(0, 0, 10)
+        world.objects.extend([s1, s2])
+        ray = Ray(Point(0, 0, 5), Vector(0, 0, 1))
+        comps = Intersection(4, s2).prepare_computations(ray)
+        self.assertEqual(Color(0.1, 0.1, 0.1), world.shade_hit(comps))
+
+        colors = world.color_at_many(np.array([[0, 0, 5]], dtype=float), np.array([[0, 0, 1]], dtype=float))
+        self.assertEqual(Color(0.1, 0.1, 0.1), Color(*colors[0]))
+
+    def test_shadow_queries_try_the_last_occluder_first(self):
+        world = self.setup_world()
+        self.assertTrue(world.is_shadowed(Point(10, -10, 10)))
+        self.assertTrue(world.is_shadowed(Point(10, -10.5, 10)))
+        self.assertTrue(world.is_shadowed(Point(10.5, -10, 10)))
+        self.assertFalse(world.is_shadowed(Point(0, 10, 0)))
+        self.assertEqual(4, world.shadow_stats.queries)
+        self.assertEqual(2, world.shadow_stats.cache_hits)
+        self.assertEqual(0.5, world.shadow_stats.hit_rate)
+
+        world.shadow_stats.reset()
+        self.assertEqual(0, world.shadow_stats.hit_rate)
+
+    def test_shadow_cache_stats_can_be_merged(self):
+        (first, second) = (ShadowCacheStats(), ShadowCacheStats())
+        (first.queries, first.cache_hits) = (3, 1)
+        (second.queries, second.cache_hits) = (5, 3)
+        self.assertIs(first, first.merge(second))
+        self.assertEqual((8, 4), (first.queries, first.cache_hits))
+        self.assertEqual(0.5, first.hit_rate)
+
+    def test_world_with_a_plane(self):
+        world = self.setup_world()
+        floor = Plane()
+        floor.transform = Matrix.translation(0, -1, 0)
+        world.objects.append(floor)
+        ray = Ray(Point(0, 0, -5), Vector(0, -1, 1).normalize())
+        hit = world.closest_hit(ray)
+        self.assertIs(floor, hit.object)
+        self.assertAlmostEqual(2 ** 0.5, hit.t)
+
+        # Both spheres are crossed twice on the way down to the floor.
+        xs = world.intersect(Ray(Point(0, 5, 0), Vector(0, -1, 0)))
+        self.assertEqual(5, xs.count)
+        self.assertIs(floor, xs[4].object)
+
+        colors = world.color_at_many(np.array([[0, 0, -5]], dtype=float),
+                                     np.array([[0, -2 ** 0.5 / 2, 2 ** 0.5 / 2]]))
+        self.assertEqual(world.color_at(ray), Color(*colors[0]))
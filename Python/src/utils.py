@@ -1,11 +1,14 @@
+import argparse
 import math
+import os
 from collections import namedtuple
 
 from PIL import Image
 
 from src.ray_tracer_challenge.camera import Camera
-from src.ray_tracer_challenge.canvas import Canvas
+from src.ray_tracer_challenge.canvas import Canvas, PPMWriter
 from src.ray_tracer_challenge.color import Color, Colors
+from src.ray_tracer_challenge.plane import Plane
 from src.ray_tracer_challenge.ray import Ray
 from src.ray_tracer_challenge.sphere import Sphere
 from src.ray_tracer_challenge.tuple import Light, Point, Vector
@@ -16,11 +19,10 @@ from src.ray_tracer_challenge.world import World
 def create_test_image():
     (width, height) = (1024, 1024)
     c = Canvas(width, height)
-    pixels = c.pixels
     for y in range(1024):
         for x in range(1024):
             color = Color(y / 1024, x / 1024, (2024 - x - y) / 2024)
-            pixels[y][x] = color
+            c.set_pixel(x, y, color)
     with open("test_image.ppm", "w") as f:
         f.write(c.to_ppm())
 
@@ -125,45 +127,54 @@ def plot_clock():
         f.write(c.to_ppm())
 
 
-def adjust_plane(sphere):
-    scaling = Matrix.scaling(10, 0.01, 10)
+def adjust_plane(shape):
     color = Color(1, 0.9, 0.9)
     specular = 0
-    sphere.transform = sphere.transform * scaling
-    sphere.material.color = color
-    sphere.material.specular = specular
+    shape.material.color = color
+    shape.material.specular = specular
 
 
-def render_with_camera(resolution):
-    floor = Sphere()
+def squashed_sphere():
+    """
+    A sphere flattened into a disc, as the floor and walls were modelled before planes existed.
+    """
+    sphere = Sphere()
+    sphere.transform = Matrix.scaling(10, 0.01, 10)
+    return sphere
+
+
+def create_world(wall_shape=Plane):
+    """
+    :param wall_shape: callable creating the floor and walls, e.g. Plane or squashed_sphere
+    """
+    floor = wall_shape()
     adjust_plane(floor)
 
-    left_wall = Sphere()
+    left_wall = wall_shape()
     left_wall.transform = (Matrix.translation(0, 0, 5) *
                            Matrix.rotation_y(-math.pi / 4) *
-                           Matrix.rotation_x(math.pi / 2))
+                           Matrix.rotation_x(math.pi / 2) *
+                           left_wall.transform)
     adjust_plane(left_wall)
 
-    right_wall = Sphere()
+    right_wall = wall_shape()
     right_wall.transform = (Matrix.translation(0, 0, 5) *
                             Matrix.rotation_y(math.pi / 4) *
-                            Matrix.rotation_x(math.pi / 2))
+                            Matrix.rotation_x(math.pi / 2) *
+                            right_wall.transform)
     adjust_plane(right_wall)
 
-    middle = Sphere()
-    middle.transform = Matrix.translation(-0.5, 1, 0.5)
+    middle = Sphere(Point(-0.5, 1, 0.5), 1)
     middle.material.color = Color(0.1, 1, 0.5)
     middle.material.diffuse = 0.7
     middle.material.specular = 0.3
 
-    right = Sphere()
-    right.transform = Matrix.translation(1.5, 0.5, -0.5) * Matrix.scaling(0.5, 0.5, 0.5)
+    right = Sphere(Point(1.5, 0.5, -0.5), 0.5)
     right.material.color = Color(0.5, 1, 0.1)
     right.material.diffuse = 0.7
     right.material.specular = 0.3
 
-    left = Sphere()
-    left.transform = Matrix.translation(-1.5, 0.33, -0.75) * Matrix.scaling(0.33, 0.33, 0.33)
+    left = Sphere(Point(-1.5, 0.33, -0.75), 0.33)
     left.material.color = Color(1, 0.8, 0.1)
     left.material.diffuse = 0.7
     left.material.specular = 0.3
@@ -171,31 +182,94 @@ def render_with_camera(resolution):
     world = World()
     world.objects.extend([floor, left_wall, right_wall, middle, right, left])
     world.light = Light(Point(-10, 10, -10), Colors.WHITE)
-    print('Created world!')
+    return world
 
+
+def create_camera(resolution):
     camera = Camera(resolution.horizontal_pixels, resolution.vertical_pixels, math.pi / 3)
     camera.transform = Matrix.view_transform(Point(0, 1.5, -5), Point(0, 1, 0), Vector(0, 1, 0))
+    return camera
+
+
+def render_with_camera(resolution):
+    world = create_world()
+    print('Created world!')
+
+    camera = create_camera(resolution)
     print('Created camera!')
 
     print('Rendering world!')
-    canvas = camera.render(world)
     name = 'render_with_camera'
     ppm_file = f'{name}.ppm'
-    with open(ppm_file, 'w') as f:
-        f.write(canvas.to_ppm())
+    # Stream the rows into the image file as they finish, rather than holding the whole canvas.
+    with open(ppm_file, 'wb') as f:
+        writer = PPMWriter(f, camera.hsize, camera.vsize)
+        for (_, y, pixels) in camera.render_iter(world, order="scanline", workers=os.cpu_count()):
+            writer.write_rows(pixels)
+            print('{y} of {vsize}'.format(y=y + 1, vsize=camera.vsize))
     image = Image.open(ppm_file)
     image.save(f'{name}.jpg')
     print('Done!')
 
 
+def render_cost_heatmap(resolution, wall_shape=Plane, name='render_cost'):
+    """
+    Render the render_with_camera scene and write heatmaps of the intersection tests and time per pixel,
+    to see which parts of the scene are expensive.
+    :param wall_shape: as for create_world; compare Plane with squashed_sphere
+    """
+    world = create_world(wall_shape)
+    camera = create_camera(resolution)
+    (_, stats) = camera.render(world, cost=True)
+    stats.cost.write_heatmap(f'{name}_tests.png', 'tests')
+    stats.cost.write_heatmap(f'{name}_time.png', 'time')
+    print(stats)
+
+
 Resolution = namedtuple("Resolution", "horizontal_pixels vertical_pixels")
 resolution_480p = Resolution(640, 480)  # 307 200 px
 resolution_720p = Resolution(1280, 720)  # 921 600 px
 resolution_1080p = Resolution(1920, 1080)  # 2 073 600 px
 
-if __name__ == "__main__":
+resolutions = {'480p': resolution_480p, '720p': resolution_720p, '1080p': resolution_1080p}
+
+
+def parse_resolution(value: str) -> Resolution:
+    """
+    :param value: a name such as 720p, or WIDTHxHEIGHT
+    """
+    if value in resolutions:
+        return resolutions[value]
+    try:
+        (width, height) = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected one of {', '.join(resolutions)} or WIDTHxHEIGHT, not {value!r}")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"the width and height must be positive, not {value!r}")
+    return Resolution(width, height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the example scene.")
+    parser.add_argument('--resolution', type=parse_resolution, default=resolution_720p,
+                        help="480p, 720p, 1080p or WIDTHxHEIGHT (default: 720p)")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="instead of writing the image, report the memory used by each phase of the render")
+    parser.add_argument('--top', type=int, default=10, help="allocation sites to report per phase (default: 10)")
+    args = parser.parse_args(argv)
+
+    if args.profile_memory:
+        from src.memory_profile import format_report, profile_render_memory
+        phases = profile_render_memory(args.resolution, top=args.top)
+        print(format_report(phases, args.resolution.horizontal_pixels * args.resolution.vertical_pixels))
+        return
+
     # Create a test image with `create_test_image()`, or
     # Plot the trajectory of a projectile with `plot_projectile_trajectory()`
     # Plot the face of a clock with `plot_clock()`
     # Render a pretty sphere with render_sphere(with_ligthing=True)
-    render_with_camera(resolution_720p)
+    render_with_camera(args.resolution)
+
+
+if __name__ == "__main__":
+    main()